@@ -0,0 +1,103 @@
+"""
+## array_mcts.py
+
+This module compares the array-backed MCTS tree with the MCTNode tree of `monte_carlo_tree_search` at equal
+iteration counts: search time, optionally the peak memory, and whether both built the same tree
+(they should, as both run from the same random seed).
+
+Functions:
+- compare(game, iterations, seed, capacity): Runs both searches from the initial state and compares them.
+- main(): Command line entry point, e.g. `python -m benchmark.array_mcts --iterations 20000 --memory`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from benchmark.perft import make_game
+from monte_carlo.monte_carlo_tree_search import build_tree
+from monte_carlo.array_mcts import ArrayTree, array_monte_carlo_tree_search
+
+
+def _run(search, seed, trace=False):
+    # Returns the result of search(), its time and, if traced, the peak memory it allocated
+    random.seed(seed)
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = search()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def compare(game, iterations, seed=0, capacity=None, memory=False):
+    """
+    Runs `iterations` iterations of both implementations from the initial state of `game`.
+
+    Args:
+        memory (bool): Also run both searches once more under tracemalloc, to measure their peak memory.
+            Tracing is slow, so it is not done during the timed runs.
+
+    Returns:
+        dict: The seconds (and peak traced memory) of both searches, and whether their root visit counts agree.
+    """
+    capacity = capacity or 16 * iterations + 64
+
+    def node_search():
+        root = build_tree(game.initial, game, iterations)
+        return {action: child.N for child, action in root.children.items()}
+
+    def array_search():
+        tree = ArrayTree(game.initial, capacity)
+        array_monte_carlo_tree_search(game.initial, game, iterations, tree=tree)
+        return tree
+
+    node_visits, node_seconds, _ = _run(node_search, seed)
+    tree, array_seconds, _ = _run(array_search, seed)
+    report = {
+        'iterations': iterations,
+        'node_seconds': node_seconds,
+        'array_seconds': array_seconds,
+        'array_nodes': tree.size,
+        'same_tree': node_visits == tree.root_visits(),
+    }
+    if memory:
+        report['node_memory'] = _run(node_search, seed, trace=True)[2]
+        report['array_memory'] = _run(array_search, seed, trace=True)[2]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Array-backed MCTS against the MCTNode implementation.')
+    parser.add_argument('--games', nargs='+', default=['tictactoe', 'bitboard'],
+                        choices=['tictactoe', 'reversi', 'bitboard'])
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--capacity', type=int, default=None, help='The node capacity of the array tree.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', action='store_true', help='Also measure the peak memory (slow).')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    report = {name: compare(make_game(name), args.iterations, args.seed, args.capacity, args.memory) for name in args.games}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, row in report.items():
+            print(f"{name}: MCTNode {row['node_seconds']:.2f}s, array {row['array_seconds']:.2f}s"
+                  f" ({row['array_nodes']} nodes), same tree: {row['same_tree']}")
+            if 'node_memory' in row:
+                print(f"  peak memory: MCTNode {row['node_memory'] / 2**20:.1f} MiB,"
+                      f" array {row['array_memory'] / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+## batch_rollout.py
+
+This module compares the playouts per second of the sequential `simulate` rollouts (on Reversi and
+BitboardReversi) with the vectorized `batch_rollouts` engine, for several batch sizes, and checks that both give
+the same average result from the same position.
+
+Functions:
+- sequential(game, state, count, seed): Playouts per second and mean result of `simulate`.
+- batched(state, count, seed): Playouts per second and mean result of `batch_rollouts`.
+- main(): Command line entry point, e.g. `python -m benchmark.batch_rollout --batches 256 4096 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from benchmark.perft import make_game
+from monte_carlo.batch_rollout import batch_rollouts
+from monte_carlo.monte_carlo_tree_search import simulate
+
+
+def sequential(game, state, count, seed=0):
+    """Plays `count` games one at a time with `simulate`, returns (playouts per second, mean result)."""
+    random.seed(seed)
+    start = time.perf_counter()
+    results = [simulate(game, state) for _ in range(count)]
+    return count / (time.perf_counter() - start), sum(results) / count
+
+
+def batched(state, count, seed=0):
+    """Plays `count` games at once with `batch_rollouts`, returns (playouts per second, mean result)."""
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    results = batch_rollouts(state, count, rng)
+    return count / (time.perf_counter() - start), float(results.mean())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Playouts per second of sequential and batched Reversi rollouts.')
+    parser.add_argument('--playouts', type=int, default=200, help='The playouts of each sequential run.')
+    parser.add_argument('--batches', type=int, nargs='+', default=[64, 1024, 16384],
+                        help='The batch sizes of the vectorized runs.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    report = []
+    state = None
+    for name in ('reversi', 'bitboard'):
+        game = make_game(name)
+        state = game.initial
+        rate, mean = sequential(game, state, args.playouts, args.seed)
+        report.append({'engine': name, 'playouts': args.playouts, 'playouts_per_second': rate, 'mean_result': mean})
+    for count in args.batches:
+        rate, mean = batched(state, count, args.seed)
+        report.append({'engine': 'batch', 'playouts': count, 'playouts_per_second': rate, 'mean_result': mean})
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            print(f"{row['engine']:8} {row['playouts']:6} playouts {row['playouts_per_second']:10.0f} playouts/s"
+                  f" mean result {row['mean_result']:+.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+## compact_state.py
+
+This module compares the namedtuple GameState states of Reversi and BitboardReversi with the compact
+ReversiState states of CompactReversi, during a depth-5 search:
+
+- memory: every state of the game tree down to the depth is created with `result` and kept, and the memory they
+  take (measured with tracemalloc) is divided by their number;
+- throughput: the time of a perft walk with `result` and of an `alpha_beta_cutoff_search` at the depth, from
+  the initial position.
+
+Functions:
+- tree_states(game, depth): All the states of the game tree down to `depth`.
+- state_memory(game, depth): The number of states down to `depth` and the bytes per state.
+- search_speed(game, depth): The nodes per second of a perft walk and of an alpha-beta cutoff search.
+- main(): Command line entry point, e.g. `python -m benchmark.compact_state --depth 5 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmark.perft import make_game, perft
+
+
+def tree_states(game, depth):
+    """Returns all the states of the game tree down to `depth` plies, created with `result`."""
+    states = [game.initial]
+    frontier = [game.initial]
+    for _ in range(depth):
+        frontier = [game.result(state, a) for state in frontier if not game.terminal_test(state)
+                    for a in game.actions(state)]
+        states.extend(frontier)
+    return states
+
+
+def state_memory(game, depth):
+    """Returns the number of states down to `depth` and the bytes they take per state."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = tree_states(game, depth)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return len(states), used / len(states)
+
+
+def search_speed(game, depth):
+    """Returns the nodes per second of a perft walk and of an alpha-beta cutoff search of `depth` plies."""
+    start = time.perf_counter()
+    nodes = perft(game, game.initial, depth)
+    perft_rate = nodes / (time.perf_counter() - start)
+
+    stats = {}
+    start = time.perf_counter()
+    game.alpha_beta_cutoff_search(game.initial, depth, stats=stats)
+    search_rate = stats['nodes'] / (time.perf_counter() - start)
+    return perft_rate, search_rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory and speed of the Reversi state types.')
+    parser.add_argument('--games', nargs='+', default=['reversi', 'bitboard', 'compact'],
+                        choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--depth', type=int, default=5, help='The search depth (default=5).')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    report = []
+    for name in args.games:
+        game = make_game(name)
+        states, bytes_per_state = state_memory(game, args.depth)
+        perft_rate, search_rate = search_speed(game, args.depth)
+        report.append({'game': name, 'state': type(game.initial).__name__, 'states': states,
+                       'bytes_per_state': bytes_per_state, 'perft_nodes_per_second': perft_rate,
+                       'search_nodes_per_second': search_rate})
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            print(f"{row['game']:9} {row['state']:13} {row['states']} states {row['bytes_per_state']:7.0f} bytes/state"
+                  f" perft {row['perft_nodes_per_second']:8.0f} nodes/s"
+                  f" search {row['search_nodes_per_second']:8.0f} nodes/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+## endgame.py
+
+This module measures the exact endgame solver. For every number of empty squares it reaches positions with that
+many empty squares by random play, solves them with a fresh solver and reports the number of positions solved,
+the solve times (mean and worst), the searched nodes and the hit rate of the solver's transposition table. The
+times grow about 3 to 8 times per extra empty square, which is what the `threshold` of the solver trades off.
+
+Functions:
+- endgame_positions(game, empties, count, seed): Positions with `empties` empty squares reached by random play.
+- measure(game, positions, empties): Solves the positions and returns the counters and times.
+- main(): Command line entry point, e.g. `python -m benchmark.endgame --empties 8 10 12 14 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmark.perft import make_game
+from search.endgame import EndgameSolver
+
+
+def endgame_positions(game, empties, count=5, seed=0):
+    """
+    Returns `count` positions with `empties` empty squares, each one the first position of a random game with
+    that many empty squares. Games that end before are replayed with the next random moves.
+    """
+    rng = random.Random(seed)
+    solver = EndgameSolver()
+    positions = []
+    while len(positions) < count:
+        state = game.initial
+        while not game.terminal_test(state) and solver.empties(state) > empties:
+            state = game.result(state, rng.choice(game.actions(state)))
+        if not game.terminal_test(state):
+            positions.append(state)
+    return positions
+
+
+def measure(game, positions, empties):
+    """
+    Solves the positions with a new EndgameSolver.
+
+    Returns:
+        dict: The number of positions solved, the mean and worst seconds per position, the searched nodes,
+        the nodes per second and the counters of the solver's table.
+    """
+    solver = EndgameSolver(threshold=empties)
+    seconds = []
+    for state in positions:
+        start = time.perf_counter()
+        solver.solve(state)
+        seconds.append(time.perf_counter() - start)
+    stats = solver.stats()
+    return {
+        'empties': empties,
+        'solved': stats['solved'],
+        'mean_seconds': sum(seconds) / len(seconds),
+        'max_seconds': max(seconds),
+        'nodes': stats['nodes'],
+        'nodes_per_second': stats['nodes'] / sum(seconds),
+        'tt': stats['tt'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve times of the Reversi endgame solver.')
+    parser.add_argument('--game', default='bitboard', choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--empties', type=int, nargs='+', default=[6, 8, 10, 12],
+                        help='The numbers of empty squares to measure (default: 6 8 10 12).')
+    parser.add_argument('--positions', type=int, default=5, help='The number of positions solved per count.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    game = make_game(args.game)
+    report = [measure(game, endgame_positions(game, empties, args.positions, args.seed), empties)
+              for empties in args.empties]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            print(f"{row['empties']:2} empties: {row['solved']} solved, {row['mean_seconds']:.3f}s mean,"
+                  f" {row['max_seconds']:.3f}s max, {row['nodes']} nodes ({row['nodes_per_second']:.0f}/s),"
+                  f" tt hit rate {100 * row['tt']['hit_rate']:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+## evaluation.py
+
+This module measures the leaf evaluations per second of `heuristic_score`, of the IncrementalEvaluator
+(game/incremental_eval.py) and of `heuristic_score_batch` (game/batch_eval.py), and checks that they give the
+same scores.
+
+The leaves are the children of positions reached by random play. `heuristic_score` scores each child from
+scratch; the evaluator is moved to the child and back (`play`, `score`, `undo`), as in a search, so its rate
+includes the cost of following the move. The time of `alpha_beta_cutoff_search` with and without the evaluator
+is reported too, since in a search the evaluator also follows the moves of the inner nodes. The batch rate is
+that of one call over all the leaves, already converted to an array.
+
+Functions:
+- leaf_positions(game, count, seed): Positions reached by random play, with their mutable states.
+- evaluation_rates(game, positions): Leaf evaluations per second of the evaluators, and whether the scores match.
+- search_times(game, positions, depth): The search time with and without the evaluator.
+- main(): Command line entry point, e.g. `python -m benchmark.evaluation --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmark.perft import make_game
+from game.batch_eval import states_to_array
+
+
+def leaf_positions(game, count=200, seed=0):
+    """Returns `count` non-terminal positions reached by random play, from random games."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = game.initial
+        for _ in range(rng.randrange(1, 50)):
+            if game.terminal_test(state):
+                break
+            state = game.result(state, rng.choice(game.actions(state)))
+        if not game.terminal_test(state):
+            positions.append(state)
+    return positions
+
+
+def evaluation_rates(game, positions):
+    """
+    Scores every child of the positions with `heuristic_score`, with an IncrementalEvaluator and in one batch.
+
+    Returns:
+        dict: The number of leaves, the evaluations per second of each, and whether all the scores are equal.
+    """
+    states = [game.mutable_state(state) for state in positions]
+    children = []
+    for state in states:
+        for a in list(game.actions(state)):
+            undo = game.make_move(state, a)
+            children.append(game.mutable_state(state))
+            game.unmake_move(state, undo)
+
+    start = time.perf_counter()
+    plain_scores = [game.heuristic_score(child) for child in children]
+    plain_time = time.perf_counter() - start
+
+    # only the evaluator calls are timed, not make_move / unmake_move
+    incremental_scores = []
+    incremental_time = 0.0
+    clock = time.perf_counter
+    for state in states:
+        evaluator = game.incremental_evaluator(state)
+        for a in list(game.actions(state)):
+            undo = game.make_move(state, a)
+            start = clock()
+            evaluator.play(a)
+            incremental_scores.append(evaluator.score(state))
+            incremental_time += clock() - start
+            game.unmake_move(state, undo)
+            start = clock()
+            evaluator.undo()
+            incremental_time += clock() - start
+
+    boards, x_to_move = states_to_array(children)
+    start = time.perf_counter()
+    batch_scores = game.heuristic_score_batch(boards, x_to_move)
+    batch_time = time.perf_counter() - start
+
+    return {
+        'leaves': len(children),
+        'plain_per_second': len(children) / plain_time,
+        'incremental_per_second': len(children) / incremental_time,
+        'batch_per_second': len(children) / batch_time,
+        'same_scores': plain_scores == incremental_scores == batch_scores.tolist(),
+    }
+
+
+def search_times(game, positions, depth=3):
+    """Returns the seconds of `alpha_beta_cutoff_search` over the positions, with and without the evaluator."""
+    times = {}
+    default = game.INCREMENTAL_EVAL
+    try:
+        for incremental in (False, True):
+            game.INCREMENTAL_EVAL = incremental
+            start = time.perf_counter()
+            for state in positions:
+                game.alpha_beta_cutoff_search(state, depth)
+            times['incremental' if incremental else 'plain'] = time.perf_counter() - start
+    finally:
+        game.INCREMENTAL_EVAL = default
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Leaf evaluations per second of the Reversi heuristic.')
+    parser.add_argument('--games', nargs='+', default=['reversi', 'bitboard', 'compact'],
+                        choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--positions', type=int, default=200, help='The number of positions whose children are scored.')
+    parser.add_argument('--search-positions', type=int, default=4, help='The number of positions searched.')
+    parser.add_argument('--depth', type=int, default=3, help='The search depth (default=3).')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    report = []
+    for name in args.games:
+        game = make_game(name)
+        positions = leaf_positions(game, args.positions, args.seed)
+        row = {'game': name}
+        row.update(evaluation_rates(game, positions))
+        row['search_seconds'] = search_times(game, positions[:args.search_positions], args.depth)
+        report.append(row)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            print(f"{row['game']:9} {row['leaves']} leaves: heuristic_score {row['plain_per_second']:8.0f}/s,"
+                  f" incremental {row['incremental_per_second']:8.0f}/s, batch {row['batch_per_second']:8.0f}/s,"
+                  f" same scores {row['same_scores']};"
+                  f" search {row['search_seconds']['plain']:.2f}s -> {row['search_seconds']['incremental']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+## gomoku.py
+
+This module measures the time per move of `alpha_beta_cutoff_player` on Gomoku (game/gomoku.py, 15 x 15, five in
+a row), the goal being moves in well under a second. The player plays whole games against itself and against a
+random player, with and without a transposition table, and the report gives the mean, 95th percentile and
+maximum seconds per move of the searching player, the nodes searched per move and the results. Every game starts
+from a few random moves, so that the games of the deterministic players differ.
+
+Functions:
+- play(game, player_x, player_o, timed, state): Plays one game and returns its utility for 'X' and the move times.
+- measure(game, depth, games, opponent, tt, seed, opening): The move times of the player over several games.
+- main(): Command line entry point, e.g. `python -m benchmark.gomoku --depth 3 --games 2 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import functools
+import json
+import random
+import time
+from statistics import mean
+
+import numpy as np
+
+from game.gomoku import Gomoku
+from players.players import alpha_beta_cutoff_player, random_player
+from search.transposition_table import TranspositionTable
+
+
+def play(game, player_x, player_o, timed=('X', 'O'), state=None):
+    """
+    Plays one game, from `state` (default: the initial state), and returns the utility of the final state for
+    'X' and the seconds of every move of the players in `timed`.
+    """
+    players = {'X': player_x, 'O': player_o}
+    seconds = []
+    state = state if state is not None else game.initial
+    while not game.terminal_test(state):
+        to_move = game.to_move(state)
+        start = time.perf_counter()
+        move = players[to_move](game, state)
+        if to_move in timed:
+            seconds.append(time.perf_counter() - start)
+        state = game.result(state, move)
+    return game.utility(state, 'X'), seconds
+
+
+def measure(game, depth=3, games=2, opponent='self', tt=False, seed=0, opening=2):
+    """
+    Plays `games` games of `alpha_beta_cutoff_player` at `depth` against itself ('self') or against
+    `random_player` ('random', the searching player alternating colours), each from `opening` random moves,
+    and returns the seconds per move ('mean', 'p95', 'max'), the mean 'nodes' per move and the 'results'
+    (utilities for 'X') of the games.
+    """
+    seconds, nodes, results = [], [], []
+    for i in range(games):
+        random.seed(seed + i)
+        np.random.seed(seed + i)
+        start = game.initial
+        for _ in range(opening):
+            start = game.result(start, random.choice(game.actions(start)))
+        stats = {}
+        player = functools.partial(alpha_beta_cutoff_player, depth=depth, stats=stats,
+                                   tt=TranspositionTable() if tt else None)
+        if opponent == 'self':
+            utility, times = play(game, player, player, state=start)
+        elif i % 2 == 0:
+            utility, times = play(game, player, random_player, ('X',), start)
+        else:
+            utility, times = play(game, random_player, player, ('O',), start)
+        seconds.extend(times)
+        nodes.append(stats.get('nodes', 0) / max(len(times), 1))
+        results.append(utility)
+    seconds.sort()
+    return {
+        'moves': len(seconds),
+        'mean': mean(seconds),
+        'p95': seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))],
+        'max': seconds[-1],
+        'nodes': mean(nodes),
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time per move of the alpha-beta cutoff player on Gomoku.')
+    parser.add_argument('--size', type=int, default=15, help='The board size (default=15).')
+    parser.add_argument('--k', type=int, default=5, help='The stones in a row that win (default=5).')
+    parser.add_argument('--depth', type=int, default=3, help='The search depth (default=3, the player default).')
+    parser.add_argument('--games', type=int, default=2, help='The games of each setting.')
+    parser.add_argument('--opening', type=int, default=2, help='The random moves every game starts with.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    game = Gomoku(args.size, args.size, args.k)
+    report = {}
+    for opponent in ('self', 'random'):
+        for tt in (False, True):
+            name = opponent + (' + tt' if tt else '')
+            report[name] = measure(game, args.depth, args.games, opponent, tt, args.seed, args.opening)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, row in report.items():
+            print(f"{name:13}: {row['moves']} moves, {1000 * row['mean']:.0f} ms mean,"
+                  f" {1000 * row['p95']:.0f} ms p95, {1000 * row['max']:.0f} ms max,"
+                  f" {row['nodes']:.0f} nodes per move, results {row['results']}")
+
+
+if __name__ == '__main__':
+    main()
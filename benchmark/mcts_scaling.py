@@ -0,0 +1,82 @@
+"""
+## mcts_scaling.py
+
+This module measures how the playouts per second of parallel Monte Carlo Tree Search scale with the number of
+worker processes, for root and leaf parallelism, on TicTacToe and Reversi. The serial `build_tree` is measured
+too, as the single-core baseline.
+
+Functions:
+- measure(game, workers, mode, iterations, seed): Playouts per second of one configuration.
+- main(): Command line entry point, e.g. `python -m benchmark.mcts_scaling --workers 1 2 4 8 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from benchmark.perft import make_game
+from monte_carlo.monte_carlo_tree_search import build_tree
+from monte_carlo.parallel_mcts import parallel_monte_carlo_tree_search
+
+
+def measure(game, workers, mode, iterations, seed=0):
+    """
+    Runs one search from the initial state and returns its playouts per second.
+    The pool is started before the clock starts, so process start-up is not counted.
+    """
+    if mode == 'serial':
+        random.seed(seed)
+        start = time.perf_counter()
+        build_tree(game.initial, game, iterations)
+        return iterations / (time.perf_counter() - start)
+
+    stats = {}
+    with multiprocessing.Pool(workers) as pool:
+        if mode == 'root':
+            # every worker grows one tree with its share of the playouts
+            parallel_monte_carlo_tree_search(game.initial, game, max(1, iterations // workers), mode,
+                                             workers=workers, seed=seed, pool=pool, stats=stats)
+        else:
+            parallel_monte_carlo_tree_search(game.initial, game, iterations, mode,
+                                             workers=workers, seed=seed, pool=pool, stats=stats)
+    return stats['playouts'] / stats['seconds']
+
+
+def main(argv=None):
+    cpus = os.cpu_count()
+    parser = argparse.ArgumentParser(description='Playouts per second of parallel MCTS against the worker count.')
+    parser.add_argument('--games', nargs='+', default=['tictactoe', 'bitboard'],
+                        choices=['tictactoe', 'reversi', 'bitboard'])
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus} | {cpus}))
+    parser.add_argument('--iterations', type=int, default=2000, help='The playouts of every search.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    report = []
+    for name in args.games:
+        game = make_game(name)
+        report.append({'game': name, 'mode': 'serial', 'workers': 1,
+                       'playouts_per_second': measure(game, 1, 'serial', args.iterations, args.seed)})
+        for mode in ('root', 'leaf'):
+            for workers in args.workers:
+                report.append({'game': name, 'mode': mode, 'workers': workers,
+                               'playouts_per_second': measure(game, workers, mode, args.iterations, args.seed)})
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            print(f"{row['game']:10} {row['mode']:6} {row['workers']:3} workers"
+                  f" {row['playouts_per_second']:10.0f} playouts/s")
+
+
+if __name__ == '__main__':
+    main()
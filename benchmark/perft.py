@@ -0,0 +1,269 @@
+"""
+## perft.py
+
+This module contains a perft-style benchmark and correctness suite for the move generation of the games.
+Perft walks the full game tree from `Game.initial` down to a fixed depth and counts the positions reached at
+that depth. The counts are known in advance, so a wrong count means a bug in `actions`/`result`/`terminal_test`,
+and the time it takes measures the speed of these functions.
+
+Positions are counted only at exactly the requested depth; games that end earlier do not count as leaves.
+A Reversi pass is a move like any other, as in the usual Othello perft counts.
+
+Functions:
+- perft(game, state, depth, timings=None): Counts the positions reached at `depth` plies from `state`.
+- perft_in_place(game, state, depth): The same count, walking the tree with make_move / unmake_move.
+- run_perft(game, depth): Runs perft from the initial state and reports nodes per second and per-phase timings.
+- compare_games(game_a, game_b, depth, ...): Walks the trees of two implementations side by side, node for node.
+- main(): Command line entry point, e.g. `python -m benchmark.perft reversi bitboard --depth 6 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+from game.tic_tac_toe import TicTacToe
+from game.reversi import Reversi
+from game.bitboard_reversi import BitboardReversi, bitboard_to_board
+from game.compact_reversi import CompactReversi
+from game.gomoku import Gomoku
+
+# Known number of positions reached at each depth from the initial state.
+REFERENCE_COUNTS = {
+    'tictactoe': [1, 9, 72, 504, 3024, 15120, 54720, 148176, 200448, 127872],
+    'reversi': [1, 4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288, 24571284],
+}
+REFERENCE_COUNTS['bitboard'] = REFERENCE_COUNTS['reversi']
+REFERENCE_COUNTS['compact'] = REFERENCE_COUNTS['reversi']
+
+GAMES = {
+    'tictactoe': TicTacToe,
+    'reversi': Reversi,
+    'bitboard': BitboardReversi,
+    'compact': CompactReversi,
+    'gomoku': Gomoku,
+}
+
+# Converts the board of each game to a dict board, so boards of different implementations can be compared.
+BOARD_VIEWS = {
+    'bitboard': bitboard_to_board,
+    'compact': bitboard_to_board,
+}
+
+
+def make_game(name):
+    """Creates the game registered under `name`, silencing anything its constructor prints."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return GAMES[name]()
+
+
+def perft(game, state, depth, timings=None):
+    """
+    Counts the positions reached at exactly `depth` plies from `state`.
+
+    Args:
+        game: The game object.
+        state: The state to start from.
+        depth: The number of plies to walk.
+        timings (dict, optional): If given, the time spent in `terminal_test`, `actions` and `result`
+            is added to its 'terminal_test', 'actions' and 'result' keys.
+
+    Returns:
+        int: The number of positions at `depth`.
+    """
+    if timings is not None:
+        return _timed_perft(game, state, depth, timings)
+    if depth == 0:
+        return 1
+    if game.terminal_test(state):
+        return 0
+    if depth == 1:
+        return len(game.actions(state))
+    nodes = 0
+    for a in game.actions(state):
+        nodes += perft(game, game.result(state, a), depth - 1)
+    return nodes
+
+
+def perft_in_place(game, state, depth):
+    """
+    Counts the positions reached at exactly `depth` plies from `state`, like perft, but walks the tree in place
+    on a single mutable state with `make_move` / `unmake_move` instead of creating a state per node.
+    """
+
+    def walk(state, depth):
+        if depth == 0:
+            return 1
+        if game.terminal_test(state):
+            return 0
+        if depth == 1:
+            return len(game.actions(state))
+        nodes = 0
+        for a in game.actions(state):
+            undo = game.make_move(state, a)
+            nodes += walk(state, depth - 1)
+            game.unmake_move(state, undo)
+        return nodes
+
+    return walk(game.mutable_state(state), depth)
+
+
+def _timed_perft(game, state, depth, timings):
+    # Same walk as perft, but timing every call. Bulk counting at depth 1 is not done here,
+    # so that `result` is timed on the last ply too.
+    if depth == 0:
+        return 1
+    start = time.perf_counter()
+    terminal = game.terminal_test(state)
+    timings['terminal_test'] += time.perf_counter() - start
+    if terminal:
+        return 0
+    start = time.perf_counter()
+    actions = game.actions(state)
+    timings['actions'] += time.perf_counter() - start
+    nodes = 0
+    for a in actions:
+        start = time.perf_counter()
+        child = game.result(state, a)
+        timings['result'] += time.perf_counter() - start
+        nodes += _timed_perft(game, child, depth - 1, timings)
+    return nodes
+
+
+def run_perft(game, depth, name=None):
+    """
+    Runs perft from the initial state of `game` for every depth up to `depth`.
+
+    Args:
+        game: The game object.
+        depth: The maximum depth.
+        name (optional): The name of the game in REFERENCE_COUNTS, used to check the counts.
+
+    Returns:
+        list: One dict per depth with the node count, the expected count (or None if unknown),
+        whether they match (the in place walk must match too), the elapsed time with `result` and with
+        `make_move` / `unmake_move`, the nodes per second and the per-phase timings.
+    """
+    expected_counts = REFERENCE_COUNTS.get(name, [])
+    report = []
+    for d in range(1, depth + 1):
+        start = time.perf_counter()
+        nodes = perft(game, game.initial, d)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        nodes_in_place = perft_in_place(game, game.initial, d)
+        elapsed_in_place = time.perf_counter() - start
+
+        timings = {'terminal_test': 0.0, 'actions': 0.0, 'result': 0.0}
+        perft(game, game.initial, d, timings)
+
+        expected = expected_counts[d] if d < len(expected_counts) else None
+        report.append({
+            'depth': d,
+            'nodes': nodes,
+            'expected': expected,
+            'ok': (expected is None or nodes == expected) and nodes_in_place == nodes,
+            'seconds': elapsed,
+            'seconds_in_place': elapsed_in_place,
+            'nodes_per_second': nodes / elapsed if elapsed > 0 else float('inf'),
+            'timings': timings,
+        })
+    return report
+
+
+def compare_games(game_a, game_b, depth, board_view_a=None, board_view_b=None):
+    """
+    Walks the trees of two implementations of the same game side by side, node for node.
+
+    At every node the player to move, the terminal test, the utility for 'X' and the list of actions
+    (in order) must be the same. If board views are given, the boards are compared through them too.
+
+    Args:
+        game_a, game_b: The two game objects.
+        depth: The number of plies to walk.
+        board_view_a, board_view_b (optional): Functions converting the board of each game to a common form.
+
+    Returns:
+        The first mismatch as a `(path, message)` tuple, where path is the list of moves leading to it,
+        or None if the trees are the same.
+    """
+
+    def walk(state_a, state_b, depth, path):
+        if game_a.to_move(state_a) != game_b.to_move(state_b):
+            return path, 'player to move differs'
+        if board_view_a is not None or board_view_b is not None:
+            board_a = board_view_a(state_a.board) if board_view_a else state_a.board
+            board_b = board_view_b(state_b.board) if board_view_b else state_b.board
+            if board_a != board_b:
+                return path, 'board differs'
+        terminal = game_a.terminal_test(state_a)
+        if terminal != game_b.terminal_test(state_b):
+            return path, 'terminal test differs'
+        if game_a.utility(state_a, 'X') != game_b.utility(state_b, 'X'):
+            return path, 'utility differs'
+        if depth == 0 or terminal:
+            return None
+        actions = list(game_a.actions(state_a))
+        if actions != list(game_b.actions(state_b)):
+            return path, 'actions differ: {} != {}'.format(actions, list(game_b.actions(state_b)))
+        for a in actions:
+            mismatch = walk(game_a.result(state_a, a), game_b.result(state_b, a), depth - 1, path + [a])
+            if mismatch:
+                return mismatch
+        return None
+
+    return walk(game_a.initial, game_b.initial, depth, [])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Perft benchmark for the move generation of the games.')
+    parser.add_argument('games', nargs='+', choices=sorted(GAMES),
+                        help='The games to benchmark. With two games their trees are also compared node for node.')
+    parser.add_argument('--depth', type=int, default=5, help='The maximum perft depth (default=5).')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    output = {'games': {}}
+    ok = True
+    for name in args.games:
+        report = run_perft(make_game(name), args.depth, name)
+        output['games'][name] = report
+        ok = ok and all(row['ok'] for row in report)
+
+    if len(args.games) == 2:
+        name_a, name_b = args.games
+        mismatch = compare_games(make_game(name_a), make_game(name_b), args.depth,
+                                 BOARD_VIEWS.get(name_a), BOARD_VIEWS.get(name_b))
+        output['comparison'] = None if mismatch is None else {'path': mismatch[0], 'message': mismatch[1]}
+        ok = ok and mismatch is None
+    output['ok'] = ok
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        for name, report in output['games'].items():
+            print(name)
+            for row in report:
+                t = row['timings']
+                print(f"  depth {row['depth']}: {row['nodes']} nodes"
+                      f" (expected {row['expected']}) {'ok' if row['ok'] else 'MISMATCH'}"
+                      f" {row['seconds']:.3f}s ({row['seconds_in_place']:.3f}s in place)"
+                      f" {row['nodes_per_second']:.0f} nodes/s"
+                      f" [actions {t['actions']:.3f}s, result {t['result']:.3f}s,"
+                      f" terminal_test {t['terminal_test']:.3f}s]")
+        if 'comparison' in output:
+            if output['comparison'] is None:
+                print('trees are identical')
+            else:
+                print('trees differ at {path}: {message}'.format(**output['comparison']))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
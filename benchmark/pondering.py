@@ -0,0 +1,121 @@
+"""
+## pondering.py
+
+This module measures the latency saved per move by the pondering players (players/pondering.py). The players
+play against an opponent that thinks for a fixed time without using the CPU, like a human, and then plays a
+random move. The same games (same seeds) are played with and without pondering, and the report gives the mean
+time per move of the player in both cases, the time saved per move, the time spent pondering and, for the
+cutoff player, the fraction of moves answered from pondering (ponder hits).
+
+Functions:
+- thinking_player(think, seed): An opponent that sleeps for `think` seconds and plays a random move.
+- play(game, player, opponent): Plays one game, telling the players of the moves as `Game.play_game` does.
+- measure(game, make_player, games, think, seed): The move latencies of a player with and without pondering.
+- main(): Command line entry point, e.g. `python -m benchmark.pondering --player cutoff --think 0.5 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import random
+import time
+from statistics import mean
+
+from benchmark.perft import make_game
+from players.pondering import PonderingCutoffPlayer, PonderingMCTSPlayer
+
+
+def thinking_player(think=0.5, seed=None):
+    """Returns an opponent that sleeps for `think` seconds, then plays a random move."""
+    rng = random.Random(seed)
+
+    def player(game, state):
+        time.sleep(think)
+        return rng.choice(game.actions(state))
+    return player
+
+
+def play(game, player, opponent):
+    """Plays one game, `player` moving first, and notifies the players of every move as `Game.play_game`."""
+    players = (player, opponent)
+    state = game.initial
+    while True:
+        for current in players:
+            move = current(game, state)
+            state = game.result(state, move)
+            game.notify(players, move, state)
+            if game.terminal_test(state):
+                return game.utility(state, game.to_move(game.initial))
+
+
+def measure(game, make_player, games=2, think=0.5, seed=0):
+    """
+    Plays `games` games of a player against `thinking_player`, with and without pondering.
+
+    Args:
+        game: The game object.
+        make_player: A function `make_player(ponder)` returning a new pondering player.
+        games (int): The games played in each mode.
+        think (float): The thinking time of the opponent in seconds.
+        seed (int): The seed of the opponent's moves; the modes play against the same opponents.
+
+    Returns:
+        dict: The mean seconds per move with and without pondering, the seconds saved per move, the mean
+        seconds pondered per reply and the ponder hit rate (None for players that do not count hits).
+    """
+    report = {}
+    for ponder in (False, True):
+        seconds, pondered, hits = [], [], 0
+        for i in range(games):
+            player = make_player(ponder)
+            play(game, player, thinking_player(think, seed + i))
+            seconds.extend(player.move_seconds)
+            pondered.extend(player.ponder_seconds)
+            hits += getattr(player, 'hits', 0)
+        report['ponder' if ponder else 'plain'] = {
+            'moves': len(seconds),
+            'move_seconds': mean(seconds),
+            'ponder_seconds': mean(pondered) if pondered else 0.0,
+            'hit_rate': hits / len(seconds) if hasattr(player, 'hits') else None,
+        }
+    report['saved_per_move'] = report['plain']['move_seconds'] - report['ponder']['move_seconds']
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Latency saved per move by pondering on the opponent\'s time.')
+    parser.add_argument('--game', default='bitboard', choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--player', default='cutoff', choices=['cutoff', 'mcts'])
+    parser.add_argument('--depth', type=int, default=3, help='The depth of the cutoff player (default=3).')
+    parser.add_argument('--replies', type=int, default=3, help='The replies the cutoff player ponders on.')
+    parser.add_argument('--iterations', type=int, default=500, help='The root visits of the MCTS player.')
+    parser.add_argument('--games', type=int, default=2, help='The games played with and without pondering.')
+    parser.add_argument('--think', type=float, default=0.5, help='The thinking time of the opponent in seconds.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    game = make_game(args.game)
+    if args.player == 'cutoff':
+        def make_player(ponder):
+            return PonderingCutoffPlayer(args.depth, args.replies, ponder=ponder)
+    else:
+        def make_player(ponder):
+            return PonderingMCTSPlayer(args.iterations, ponder=ponder)
+    report = measure(game, make_player, args.games, args.think, args.seed)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for mode in ('plain', 'ponder'):
+            row = report[mode]
+            hits = f", ponder hits {100 * row['hit_rate']:.0f}%" if row['hit_rate'] is not None else ''
+            print(f"{mode:6}: {row['moves']} moves, {1000 * row['move_seconds']:.1f} ms per move,"
+                  f" {1000 * row['ponder_seconds']:.1f} ms pondered per reply{hits}")
+        print(f"saved {1000 * report['saved_per_move']:.1f} ms per move")
+
+
+if __name__ == '__main__':
+    main()
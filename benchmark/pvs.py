@@ -0,0 +1,113 @@
+"""
+## pvs.py
+
+This module compares the principal variation search of Reversi with the alpha-beta cutoff search at equal depth.
+Both searches are run over the same positions, at a fixed depth and with iterative deepening (where PVS also uses
+aspiration windows), with and without move ordering and a transposition table. The report gives the node counts,
+the fraction of nodes PVS saves, the re-search rate (the fraction of null window tests that failed high and were
+searched again), the aspiration re-searches, and whether both searches chose the same moves.
+
+Functions:
+- compare(game, positions, depth, variant, deepening): Searches the positions with both searches.
+- main(): Command line entry point, e.g. `python -m benchmark.pvs --depth 5 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import time
+
+from benchmark.perft import make_game
+from benchmark.transposition import sample_positions
+from search.iterative_deepening import iterative_deepening_search
+from search.move_ordering import MoveOrderer
+from search.transposition_table import TranspositionTable
+
+# name: (move ordering, transposition table)
+VARIANTS = {
+    'plain': (False, False),
+    'ordered': (True, False),
+    'ordered+tt': (True, True),
+}
+
+
+def _search(game, positions, depth, search, variant, deepening):
+    # The moves, counters and seconds of one search over the positions
+    use_ordering, use_tt = VARIANTS[variant]
+    ordering = MoveOrderer.for_game(game) if use_ordering else None
+    tt = TranspositionTable() if use_tt else None
+    stats = {'nodes': 0}
+    moves = []
+    start = time.perf_counter()
+    for state in positions:
+        if deepening:
+            moves.append(iterative_deepening_search(game, state, float('inf'), max_depth=depth, tt=tt, stats=stats,
+                                                    ordering=ordering, search=search))
+        else:
+            if ordering is not None:
+                ordering.new_search()
+            function = game.principal_variation_search if search == 'pvs' else game.alpha_beta_cutoff_search
+            moves.append(function(state, depth, tt=tt, stats=stats, ordering=ordering))
+    return moves, stats, time.perf_counter() - start
+
+
+def compare(game, positions, depth, variant='ordered+tt', deepening=True):
+    """
+    Searches the positions with `alpha_beta_cutoff_search` and `principal_variation_search`.
+
+    Returns:
+        dict: The node counts and seconds of both searches, the fraction of nodes saved, the PVS counters and
+        whether the moves are the same.
+    """
+    alpha_beta_moves, alpha_beta, alpha_beta_seconds = _search(game, positions, depth, 'alpha_beta', variant,
+                                                               deepening)
+    pvs_moves, pvs, pvs_seconds = _search(game, positions, depth, 'pvs', variant, deepening)
+    null_windows = pvs.get('null_windows', 0)
+    return {
+        'depth': depth,
+        'variant': variant,
+        'deepening': deepening,
+        'nodes': alpha_beta['nodes'],
+        'nodes_pvs': pvs['nodes'],
+        'saved': 1 - pvs['nodes'] / alpha_beta['nodes'],
+        'seconds': alpha_beta_seconds,
+        'seconds_pvs': pvs_seconds,
+        'null_windows': null_windows,
+        'researches': pvs.get('researches', 0),
+        'research_rate': pvs.get('researches', 0) / null_windows if null_windows else 0.0,
+        'aspiration_researches': pvs.get('aspiration_researches', 0),
+        'same_moves': alpha_beta_moves == pvs_moves,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Node counts of PVS against the alpha-beta cutoff search.')
+    parser.add_argument('--game', default='bitboard', choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--depth', type=int, default=5, help='The search depth, odd (default=5).')
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument('--positions', type=int, default=8, help='The number of positions searched.')
+    parser.add_argument('--plies', type=int, default=16, help='The number of random opening moves.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    game = make_game(args.game)
+    positions = sample_positions(game, args.positions, args.plies, args.seed)
+    report = [compare(game, positions, args.depth, variant, deepening)
+              for deepening in (False, True) for variant in args.variants]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            mode = 'deepening' if row['deepening'] else 'fixed    '
+            print(f"{mode} {row['variant']:10}: {row['nodes']:8} -> {row['nodes_pvs']:8} nodes"
+                  f" ({100 * row['saved']:5.1f}% saved), {row['seconds']:.2f}s -> {row['seconds_pvs']:.2f}s,"
+                  f" re-searches {100 * row['research_rate']:.1f}%, aspiration re-searches"
+                  f" {row['aspiration_researches']}, same moves {row['same_moves']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+## transposition.py
+
+This module measures how much of the alpha-beta cutoff search tree the transposition table saves. It plays a
+fixed random opening, then searches the reached positions with and without a table at each depth, and reports
+the node counts, the search times and the hit / miss / collision counters of the table.
+
+Functions:
+- sample_positions(game, count, plies, seed): Returns positions reached by random play.
+- measure(game, positions, depth, tt_size, replacement): Searches the positions with and without a table.
+- main(): Command line entry point, e.g. `python -m benchmark.transposition --depths 5 6 7 8 --json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmark.perft import make_game
+from search.transposition_table import TranspositionTable
+
+
+def sample_positions(game, count=4, plies=10, seed=0):
+    """Returns `count` consecutive positions of a game that starts with `plies` random moves."""
+    rng = random.Random(seed)
+    state = game.initial
+    positions = []
+    for i in range(plies + count):
+        if game.terminal_test(state):
+            break
+        if i >= plies:
+            positions.append(state)
+        state = game.result(state, rng.choice(game.actions(state)))
+    return positions
+
+
+def measure(game, positions, depth, tt_size=1 << 18, replacement='depth'):
+    """
+    Searches the positions in order, first without and then with a transposition table
+    (kept between the positions, as a player keeps it between moves).
+
+    Returns:
+        dict: The node counts and times of both searches, the fraction of nodes saved and the table counters.
+    """
+    plain = {'nodes': 0}
+    start = time.perf_counter()
+    plain_moves = [game.alpha_beta_cutoff_search(state, depth, stats=plain) for state in positions]
+    plain_time = time.perf_counter() - start
+
+    tt = TranspositionTable(tt_size, replacement)
+    cached = {'nodes': 0}
+    start = time.perf_counter()
+    cached_moves = [game.alpha_beta_cutoff_search(state, depth, tt=tt, stats=cached) for state in positions]
+    cached_time = time.perf_counter() - start
+
+    return {
+        'depth': depth,
+        'nodes': plain['nodes'],
+        'nodes_tt': cached['nodes'],
+        'saved': 1 - cached['nodes'] / plain['nodes'],
+        'seconds': plain_time,
+        'seconds_tt': cached_time,
+        'same_moves': plain_moves == cached_moves,
+        'tt': tt.stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Transposition table savings of alpha_beta_cutoff_search.')
+    parser.add_argument('--game', default='bitboard', choices=['reversi', 'bitboard'])
+    parser.add_argument('--depths', type=int, nargs='+', default=[3, 4, 5],
+                        help='The search depths to measure (default: 3 4 5).')
+    parser.add_argument('--positions', type=int, default=4, help='The number of positions searched per depth.')
+    parser.add_argument('--plies', type=int, default=10, help='The number of random opening moves.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--size', type=int, default=1 << 18, help='The number of table slots.')
+    parser.add_argument('--replacement', default='depth', choices=TranspositionTable.POLICIES)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args(argv)
+
+    game = make_game(args.game)
+    positions = sample_positions(game, args.positions, args.plies, args.seed)
+    report = [measure(game, positions, depth, args.size, args.replacement) for depth in args.depths]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            tt = row['tt']
+            print(f"depth {row['depth']}: {row['nodes']} -> {row['nodes_tt']} nodes ({100 * row['saved']:.1f}% saved),"
+                  f" {row['seconds']:.2f}s -> {row['seconds_tt']:.2f}s,"
+                  f" hits {tt['hits']} misses {tt['misses']} collisions {tt['collisions']}")
+
+
+if __name__ == '__main__':
+    main()
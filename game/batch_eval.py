@@ -0,0 +1,126 @@
+"""
+## batch_eval.py
+
+This module contains a vectorized version of `Reversi.heuristic_score`, which scores many positions with a few
+NumPy array operations instead of one Python call per position.
+
+A batch of positions is an (N, 8, 8) int8 array, with 1 for a disc of 'X', -1 for a disc of 'O' and 0 for an
+empty square (`boards[i, x, y]` is the square (x, y)), and a boolean array of N flags, True where 'X' is to move.
+Every term of the heuristic is computed for all the boards at once:
+
+- tile dominance, corners and corner proximity from the disc masks;
+- mobility from the move masks of both players, generated on uint64 bitboards (see monte_carlo/batch_rollout.py);
+- the positional weights as a product with WEIGHT_MATRIX.
+
+The terms are computed and combined with the same arithmetic, in the same order, as the scalar functions, so the
+scores are equal to those of `heuristic_score`.
+
+Functions:
+- states_to_array(states): The (N, 8, 8) array and the side to move flags of a list of states.
+- heuristic_score_batch(boards, x_to_move, weights=None): The heuristic scores of a batch of positions.
+- children_scores(game, state): The heuristic scores of all the children of a state, in the order of its actions.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import numpy as np
+
+from game.bitboard_reversi import board_to_bitboard, CORNERS
+from game.reversi import Reversi
+from monte_carlo.batch_rollout import move_masks, popcount
+
+WEIGHT_MATRIX = np.array(Reversi.WEIGHT_MATRIX, dtype=np.int64)
+
+# The squares enclosing each corner, as in Reversi.proximityCorners
+CORNER_NEIGHBOURS = {
+    (0, 0): [(0, 1), (1, 0), (1, 1)],
+    (0, 7): [(0, 6), (1, 7), (1, 6)],
+    (7, 0): [(6, 0), (7, 1), (6, 1)],
+    (7, 7): [(6, 7), (7, 6), (6, 6)],
+}
+
+# The value of the bit of every square, in the order of a flattened 8 x 8 board (bit x * 8 + y)
+_SQUARE_BITS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+
+def states_to_array(states):
+    """
+    Returns the (N, 8, 8) int8 array of the boards of the states, and the array of their side to move flags.
+    The states can be of any of the Reversi classes.
+    """
+    boards = np.zeros((len(states), 8, 8), dtype=np.int8)
+    for i, state in enumerate(states):
+        x_bits, o_bits = board_to_bitboard(state.board) if isinstance(state.board, dict) else state.board
+        for square in range(64):
+            if x_bits >> square & 1:
+                boards[i, square // 8, square % 8] = 1
+            elif o_bits >> square & 1:
+                boards[i, square // 8, square % 8] = -1
+    x_to_move = np.array([state.to_move == 'X' for state in states], dtype=bool)
+    return boards, x_to_move
+
+
+def _dominance(counts_x, counts_o):
+    # 100 * count / total for the player with more, 0 when equal (countTiles, calcMobility)
+    total = counts_x + counts_o
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts_x > counts_o, 100 * counts_x / total,
+                        np.where(counts_x < counts_o, 100 * counts_o / total, 0.0))
+
+
+def heuristic_score_batch(boards, x_to_move, weights=None):
+    """
+    Scores a batch of positions with the heuristic of `Reversi.heuristic_score`.
+
+    Args:
+        boards (np.ndarray): An (N, 8, 8) int8 array, 1 for 'X', -1 for 'O', 0 for empty.
+        x_to_move (np.ndarray): N booleans, True where 'X' is to move.
+        weights (tuple, optional): The weights of the terms (default: Reversi.HEURISTIC_WEIGHTS).
+
+    Returns:
+        np.ndarray: The N scores, from the point of view of the player to move in each position.
+    """
+    tiles_weight, corners_weight, proximity_weight, mobility_weight, discs_weight = (
+        weights if weights is not None else Reversi.HEURISTIC_WEIGHTS)
+    boards = np.asarray(boards)
+    is_x = boards == 1
+    is_o = boards == -1
+
+    tiles_term = _dominance(is_x.sum(axis=(1, 2)), is_o.sum(axis=(1, 2)))
+
+    corners_x = sum(is_x[:, x, y].astype(np.int64) for x, y in CORNERS)
+    corners_o = sum(is_o[:, x, y].astype(np.int64) for x, y in CORNERS)
+    corners_term = 25 * (corners_x - corners_o)
+
+    proximity_x = np.zeros(len(boards), dtype=np.int64)
+    proximity_o = np.zeros(len(boards), dtype=np.int64)
+    for (cx, cy), squares in CORNER_NEIGHBOURS.items():
+        empty_corner = boards[:, cx, cy] == 0
+        for x, y in squares:
+            proximity_x += empty_corner & is_x[:, x, y]
+            proximity_o += empty_corner & is_o[:, x, y]
+    proximity_corners_term = -12.5 * (proximity_x - proximity_o)
+
+    x_bits = np.bitwise_or.reduce(np.where(is_x.reshape(-1, 64), _SQUARE_BITS, np.uint64(0)), axis=1)
+    o_bits = np.bitwise_or.reduce(np.where(is_o.reshape(-1, 64), _SQUARE_BITS, np.uint64(0)), axis=1)
+    mobility_term = _dominance(popcount(move_masks(x_bits, o_bits)), popcount(move_masks(o_bits, x_bits)))
+
+    discs_term = (is_x * WEIGHT_MATRIX).sum(axis=(1, 2)) - (is_o * WEIGHT_MATRIX).sum(axis=(1, 2))
+
+    score = (tiles_weight * tiles_term +
+             corners_weight * corners_term +
+             proximity_weight * proximity_corners_term +
+             mobility_weight * mobility_term +
+             discs_weight * discs_term)
+    return np.where(x_to_move, score, -score)
+
+
+def children_scores(game, state):
+    """
+    Returns the heuristic scores of all the children of a state, in the order of `game.actions(state)`, scored
+    in one batch. Each score is from the point of view of the player to move in the child, as `heuristic_score`.
+    """
+    children = [game.result(state, a) for a in game.actions(state)]
+    boards, x_to_move = states_to_array(children)
+    return game.heuristic_score_batch(boards, x_to_move)
@@ -0,0 +1,396 @@
+"""
+## bitboard_reversi.py
+
+This module contains a bitboard implementation of the Reversi game. Each side is stored as a 64-bit integer,
+with bit `x * 8 + y` set when the square `(x, y)` holds one of that side's discs. Legal moves and flipped discs
+are generated with shift-and-mask operations over all squares at once, instead of walking the 8 directions of
+every square through dictionary lookups.
+
+The square numbering follows the scan order of `Reversi.getValidMoves`, so both implementations list the legal
+moves in the same order and searches on either of them visit the same tree.
+
+Classes:
+- BitboardReversi: A drop-in alternative to the Reversi class. A state holds the board as a tuple of two
+  integers `(x_bits, o_bits)` instead of a dict.
+
+Functions:
+- board_to_bitboard(board): Converts a dict board to a `(x_bits, o_bits)` tuple.
+- bitboard_to_board(bitboard): Converts a `(x_bits, o_bits)` tuple to a dict board.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+from game.reversi import Reversi, PASS
+from gamestate.gamestate import GameState
+from search.zobrist import PIECE_KEYS, FLIP_KEYS, SIDE_KEY
+
+FULL = 0xFFFFFFFFFFFFFFFF
+
+# Squares that are not on the first / last column (y == 0 / y == 7).
+# Shifting by one along y wraps into the neighbouring row, these masks cut the wrapped bits off.
+NOT_Y0 = 0xFEFEFEFEFEFEFEFE
+NOT_Y7 = 0x7F7F7F7F7F7F7F7F
+
+# (dx, dy) directions, in the same order as Reversi.isValidMove
+DIRECTIONS = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
+
+SQUARES = [(x, y) for x in range(8) for y in range(8)]
+
+CORNERS = [(0, 0), (0, 7), (7, 0), (7, 7)]
+
+
+def square_bit(x, y):
+    """Returns the bit of the square (x, y)."""
+    return 1 << (x * 8 + y)
+
+
+def shift(bits, dx, dy):
+    """
+    Moves every disc of `bits` one square in the direction (dx, dy).
+
+    Discs that would leave the board are dropped.
+    """
+    step = dx * 8 + dy
+    if step > 0:
+        bits = (bits << step) & FULL
+    else:
+        bits >>= -step
+    if dy == 1:
+        return bits & NOT_Y0
+    if dy == -1:
+        return bits & NOT_Y7
+    return bits
+
+
+def move_mask(own, opp):
+    """
+    Returns the bitboard of the legal moves for the side owning `own` against `opp`.
+
+    For each direction, the runs of opponent discs adjacent to our discs are grown one square at a time
+    (at most 6 opponent discs fit between two squares of a line), and the empty square right after a run is a move.
+    """
+    empty = ~(own | opp) & FULL
+    moves = 0
+    for dx, dy in DIRECTIONS:
+        run = shift(own, dx, dy) & opp
+        run |= shift(run, dx, dy) & opp
+        run |= shift(run, dx, dy) & opp
+        run |= shift(run, dx, dy) & opp
+        run |= shift(run, dx, dy) & opp
+        run |= shift(run, dx, dy) & opp
+        moves |= shift(run, dx, dy) & empty
+    return moves
+
+
+def flip_mask(own, opp, bit):
+    """
+    Returns the bitboard of the opponent discs that are flipped when a disc is placed on `bit`.
+    """
+    flips = 0
+    for dx, dy in DIRECTIONS:
+        line = 0
+        square = shift(bit, dx, dy)
+        while square & opp:
+            line |= square
+            square = shift(square, dx, dy)
+        if square & own:
+            flips |= line
+    return flips
+
+
+def mask_to_moves(mask):
+    """Returns the squares of the set bits of `mask` as a list of (x, y) tuples, in scan order."""
+    moves = []
+    while mask:
+        low = mask & -mask
+        moves.append(SQUARES[low.bit_length() - 1])
+        mask ^= low
+    return moves
+
+
+def board_to_bitboard(board):
+    """
+    Converts a dict board to a bitboard.
+
+    Args:
+        board (dict): A board of {(x, y): Player} entries, where Player is 'X' or 'O'.
+
+    Returns:
+        tuple: The `(x_bits, o_bits)` bitboard of the same position.
+    """
+    x_bits = 0
+    o_bits = 0
+    for (x, y), tile in board.items():
+        if tile == 'X':
+            x_bits |= square_bit(x, y)
+        elif tile == 'O':
+            o_bits |= square_bit(x, y)
+    return (x_bits, o_bits)
+
+
+def bitboard_to_board(bitboard):
+    """
+    Converts a bitboard to a dict board.
+
+    Args:
+        bitboard (tuple): The `(x_bits, o_bits)` bitboard of a position.
+
+    Returns:
+        dict: A board of {(x, y): Player} entries, where Player is 'X' or 'O'.
+    """
+    x_bits, o_bits = bitboard
+    board = {}
+    for square in mask_to_moves(x_bits):
+        board[square] = 'X'
+    for square in mask_to_moves(o_bits):
+        board[square] = 'O'
+    return board
+
+
+# Positional weights of Reversi.calcDiscs, grouped as {weight: bitboard of the squares with that weight}
+WEIGHT_MASKS = {}
+for _x, _y in SQUARES:
+    _weight = Reversi.WEIGHT_MATRIX[_x][_y]
+    WEIGHT_MASKS[_weight] = WEIGHT_MASKS.get(_weight, 0) | square_bit(_x, _y)
+
+CORNER_MASK = 0
+for _corner in CORNERS:
+    CORNER_MASK |= square_bit(*_corner)
+
+# (corner bit, bitboard of the squares enclosing the corner), as in Reversi.proximityCorners
+CORNER_NEIGHBOURS = [
+    (square_bit(0, 0), square_bit(0, 1) | square_bit(1, 0) | square_bit(1, 1)),
+    (square_bit(0, 7), square_bit(0, 6) | square_bit(1, 7) | square_bit(1, 6)),
+    (square_bit(7, 0), square_bit(6, 0) | square_bit(7, 1) | square_bit(6, 1)),
+    (square_bit(7, 7), square_bit(6, 7) | square_bit(7, 6) | square_bit(6, 6)),
+]
+
+
+class BitboardReversi(Reversi):
+    """Play Reversi on an 8 x 8 board, with Max (first player) playing 'X'.
+    A state has the player to move, a cached utility, a list of moves in
+    the form of a list of (x, y) positions, and a board, in the form of
+    a tuple of two 64-bit integers `(x_bits, o_bits)`.
+
+    The game follows the rules of the Reversi class exactly, so players and
+    searches written against Reversi run unchanged on it, and the states can be
+    converted back and forth with `to_reversi_state` and `from_reversi_state`."""
+
+    def __init__(self):
+        board = board_to_bitboard({(3, 3): 'X', (3, 4): 'O', (4, 3): 'O', (4, 4): 'X'})
+        moves_x, moves_o = self.getBothValidMoves(board)
+        self.initial = GameState(to_move='X', utility=0, board=board, moves=moves_x,
+                                 key=self.zobrist_key(board, 'X'), mobility=(len(moves_x), len(moves_o)))
+
+    def result(self, state, move):
+        if move not in state.moves:
+            return state  # Illegal move has no effect
+        return GameState(*self.play(state, move))
+
+    def make_move(self, state, move):
+        """Make a move in place on a MutableGameState and return the undo token.
+        The board is an immutable tuple, so the token is just the old field values."""
+        if move not in state.moves:
+            return None
+        undo = (state.to_move, state.utility, state.board, state.moves, state.key, state.mobility)
+        state.to_move, state.utility, state.board, state.moves, state.key, state.mobility = self.play(state, move)
+        return undo
+
+    def unmake_move(self, state, undo):
+        """Take back the move of the undo token returned by make_move."""
+        if undo is not None:
+            state.to_move, state.utility, state.board, state.moves, state.key, state.mobility = undo
+
+    def play(self, state, move):
+        """Returns the fields (to_move, utility, board, moves, key, mobility) of the state after a legal move."""
+        if move == PASS:
+            other = 'O' if state.to_move == 'X' else 'X'
+            key = state.key ^ SIDE_KEY if state.key is not None else None
+            return (other, 0, state.board, self.getValidMoves(state.board, other), key, state.mobility)
+        own, opp = self.sides(state.board, state.to_move)
+        bit = square_bit(*move)
+        flips = flip_mask(own, opp, bit)
+        own |= bit | flips
+        opp &= ~flips
+        if state.to_move == 'X':
+            board = (own, opp)
+            other = 'O'
+        else:
+            board = (opp, own)
+            other = 'X'
+        key = state.key
+        if key is not None:
+            key ^= PIECE_KEYS[state.to_move][move[0] * 8 + move[1]] ^ SIDE_KEY
+            while flips:
+                low = flips & -flips
+                key ^= FLIP_KEYS[low.bit_length() - 1]
+                flips ^= low
+        # Both players' moves: those of the player to move, and those of the player who just moved,
+        # which tell whether the player to move has to pass or the game is over
+        next_moves = move_mask(opp, own)
+        mover_moves = move_mask(own, opp)
+        if state.to_move == 'X':
+            mobility = (mover_moves.bit_count(), next_moves.bit_count())
+        else:
+            mobility = (next_moves.bit_count(), mover_moves.bit_count())
+        if next_moves:
+            moves = mask_to_moves(next_moves)
+        else:
+            moves = [PASS] if mover_moves else []
+        return (other, self.compute_utility(board, move, state.to_move, mobility), board, moves, key, mobility)
+
+    def terminal_test(self, state):
+        """A state is terminal if neither player can move."""
+        return not state.moves
+
+    def display(self, state):
+        super().display(self.to_reversi_state(state))
+
+    def compute_utility(self, board, move, player, mobility=None):
+        """If 'X' wins with this move, return 1; if 'O' wins return -1; else return 0.
+        The game is over after the move if neither player can move."""
+        x_bits, o_bits = board
+        if mobility is None:
+            mobility = (move_mask(x_bits, o_bits).bit_count(), move_mask(o_bits, x_bits).bit_count())
+        if mobility == (0, 0):
+            xscore = x_bits.bit_count()
+            oscore = o_bits.bit_count()
+            if xscore > oscore:
+                return 1
+            elif xscore == oscore:
+                return 0
+            else:
+                return -1
+        else:
+            return 0
+
+    def zobrist_key(self, board, to_move):
+        # Returns the Zobrist hash of the given bitboard with the given player to move.
+        x_bits, o_bits = board
+        key = SIDE_KEY if to_move == 'O' else 0
+        while x_bits:
+            low = x_bits & -x_bits
+            key ^= PIECE_KEYS['X'][low.bit_length() - 1]
+            x_bits ^= low
+        while o_bits:
+            low = o_bits & -o_bits
+            key ^= PIECE_KEYS['O'][low.bit_length() - 1]
+            o_bits ^= low
+        return key
+
+    def sides(self, board, tile):
+        """Returns the bitboards of the given player and of its opponent, in that order."""
+        if tile == 'X':
+            return board
+        return (board[1], board[0])
+
+    def getValidMoves(self, board, tile):
+        # Returns a list of (x, y) tuples of valid moves for the given player on the given bitboard.
+        own, opp = self.sides(board, tile)
+        return mask_to_moves(move_mask(own, opp))
+
+    def getBothValidMoves(self, board):
+        # Returns the lists of valid moves of 'X' and of 'O'.
+        x_bits, o_bits = board
+        return mask_to_moves(move_mask(x_bits, o_bits)), mask_to_moves(move_mask(o_bits, x_bits))
+
+    def isValidMove(self, board, tile, xstart, ystart):
+        # Returns False if the player's move on space xstart, ystart is invalid.
+        # If it is a valid move, returns a list of spaces that would become the player's if they made a move here.
+        if not self.isOnBoard(xstart, ystart):
+            return False
+        own, opp = self.sides(board, tile)
+        bit = square_bit(xstart, ystart)
+        if (own | opp) & bit:
+            return False
+        flips = flip_mask(own, opp, bit)
+        if flips == 0:
+            return False
+        return [list(square) for square in mask_to_moves(flips)]
+
+    def getBoardCopy(self, board):
+        # Bitboards are immutable integers, there is nothing to copy.
+        return board
+
+    def getScoreOfBoard(self, board):
+        # Determine the score by counting the tiles. Returns a dictionary with keys 'X' and 'O'.
+        return {'X': board[0].bit_count(), 'O': board[1].bit_count()}
+
+    def to_reversi_state(self, state):
+        """Converts a state of this game to the equivalent dict board state of the Reversi class."""
+        return GameState(to_move=state.to_move, utility=state.utility,
+                         board=bitboard_to_board(state.board), moves=list(state.moves), key=state.key,
+                         mobility=getattr(state, 'mobility', None))
+
+    def from_reversi_state(self, state):
+        """Converts a dict board state of the Reversi class to the equivalent state of this game."""
+        return GameState(to_move=state.to_move, utility=state.utility,
+                         board=board_to_bitboard(state.board), moves=list(state.moves), key=state.key,
+                         mobility=getattr(state, 'mobility', None))
+
+    # ----------------- Start of heuristic functions -----------------
+
+    def countTiles(self, board):
+        """Bitboard version of `Reversi.countTiles`."""
+        tiles_x = board[0].bit_count()
+        tiles_o = board[1].bit_count()
+
+        total_tiles = tiles_x + tiles_o
+
+        if tiles_x > tiles_o:
+            return 100 * tiles_x / total_tiles
+        elif tiles_x < tiles_o:
+            return 100 * tiles_o / total_tiles
+        else:
+            return 0
+
+    def countCorners(self, board):
+        """Bitboard version of `Reversi.countCorners`."""
+        corners_x = (board[0] & CORNER_MASK).bit_count()
+        corners_o = (board[1] & CORNER_MASK).bit_count()
+
+        return 25 * (corners_x - corners_o)
+
+    def proximityCorners(self, board):
+        """Bitboard version of `Reversi.proximityCorners`."""
+        x_bits, o_bits = board
+        proximity_angle_x = 0
+        proximity_angle_o = 0
+
+        for corner, enclosing_squares in CORNER_NEIGHBOURS:
+            if not (x_bits | o_bits) & corner:  # If the corner is empty
+                proximity_angle_x += (x_bits & enclosing_squares).bit_count()
+                proximity_angle_o += (o_bits & enclosing_squares).bit_count()
+
+        return -12.5 * (proximity_angle_x - proximity_angle_o)
+
+    def calcMobility(self, state):
+        """Bitboard version of `Reversi.calcMobility`."""
+        if state.mobility is not None:
+            moves_x, moves_o = state.mobility
+        else:
+            x_bits, o_bits = state.board
+            moves_x = move_mask(x_bits, o_bits).bit_count()
+            moves_o = move_mask(o_bits, x_bits).bit_count()
+
+        total_moves = moves_x + moves_o
+
+        if moves_x > moves_o:
+            return 100 * moves_x / total_moves
+        elif moves_x < moves_o:
+            return 100 * moves_o / total_moves
+        else:
+            return 0
+
+    def calcDiscs(self, board):
+        """Bitboard version of `Reversi.calcDiscs`."""
+        x_bits, o_bits = board
+        total_weight_x = 0
+        total_weight_o = 0
+
+        for weight, squares in WEIGHT_MASKS.items():
+            total_weight_x += weight * (x_bits & squares).bit_count()
+            total_weight_o += weight * (o_bits & squares).bit_count()
+
+        return total_weight_x - total_weight_o
@@ -0,0 +1,140 @@
+"""
+## compact_reversi.py
+
+This module contains a Reversi implementation with compact states. The states are ReversiState objects
+(`__slots__`, bitboard board) that hold, computed once when the state is created, the legal moves, whether the
+player to move must pass, whether the game is over, the mobility of the opponent and the disc counts. The game
+then answers `terminal_test`, `utility` and `actions` with attribute lookups, and the mobility term of the
+heuristic without generating any moves.
+
+The moves of the player who just moved are generated anyway, to know whether the player to move has to pass or
+the game is over, so the opponent mobility comes for free.
+
+Classes:
+- CompactReversi: A drop-in alternative to the Reversi and BitboardReversi classes, with ReversiState states.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+from game.bitboard_reversi import (BitboardReversi, board_to_bitboard, flip_mask, mask_to_moves, move_mask,
+                                   square_bit)
+from game.reversi import PASS
+from gamestate.gamestate import ReversiState
+from search.zobrist import PIECE_KEYS, FLIP_KEYS, SIDE_KEY
+
+
+class CompactReversi(BitboardReversi):
+    """Play Reversi on an 8 x 8 board, with Max (first player) playing 'X'.
+    The rules, the move order and the heuristic are those of the Reversi class;
+    only the state type differs. A state is a ReversiState with a
+    `(x_bits, o_bits)` bitboard."""
+
+    def __init__(self):
+        board = board_to_bitboard({(3, 3): 'X', (3, 4): 'O', (4, 3): 'O', (4, 4): 'X'})
+        self.initial = self.new_state('X', 0, board, self.zobrist_key(board, 'X'))
+
+    def new_state(self, to_move, utility, board, key=None, opponent_moves=None):
+        """
+        Creates the ReversiState of a position, computing its cached fields.
+
+        Args:
+            opponent_moves (int, optional): The move bitboard of the opponent of `to_move`, if already known.
+        """
+        own, opp = self.sides(board, to_move)
+        moves = move_mask(own, opp)
+        if opponent_moves is None:
+            opponent_moves = move_mask(opp, own)
+        must_pass = not moves and opponent_moves != 0
+        return ReversiState(to_move, utility, board, (PASS,) if must_pass else tuple(mask_to_moves(moves)), key,
+                            must_pass=must_pass,
+                            terminal=not moves and not opponent_moves,
+                            opponent_mobility=opponent_moves.bit_count(),
+                            x_discs=board[0].bit_count(), o_discs=board[1].bit_count())
+
+    def result(self, state, move):
+        if move not in state.moves:
+            return state  # Illegal move has no effect
+        return self.play(state, move)
+
+    def mutable_state(self, state):
+        """Return a copy of state that make_move and unmake_move can change in place."""
+        return state.copy()
+
+    def make_move(self, state, move):
+        """Make a move in place on a ReversiState and return the undo token (the old field values)."""
+        if move not in state.moves:
+            return None
+        undo = state.fields()
+        state.set_fields(self.play(state, move).fields())
+        return undo
+
+    def unmake_move(self, state, undo):
+        """Take back the move of the undo token returned by make_move."""
+        if undo is not None:
+            state.set_fields(undo)
+
+    def play(self, state, move):
+        """Returns the ReversiState after a legal move."""
+        if move == PASS:
+            # The board does not change: the moves of the two players are swapped
+            other = 'O' if state.to_move == 'X' else 'X'
+            key = state.key ^ SIDE_KEY if state.key is not None else None
+            own, opp = self.sides(state.board, other)
+            return ReversiState(other, 0, state.board, tuple(mask_to_moves(move_mask(own, opp))), key,
+                                opponent_mobility=0, x_discs=state.x_discs, o_discs=state.o_discs)
+        tile = state.to_move
+        own, opp = self.sides(state.board, tile)
+        bit = square_bit(*move)
+        flips = flip_mask(own, opp, bit)
+        own |= bit | flips
+        opp &= ~flips
+        if tile == 'X':
+            board = (own, opp)
+            other = 'O'
+        else:
+            board = (opp, own)
+            other = 'X'
+        key = state.key
+        if key is not None:
+            key ^= PIECE_KEYS[tile][move[0] * 8 + move[1]] ^ SIDE_KEY
+            while flips:
+                low = flips & -flips
+                key ^= FLIP_KEYS[low.bit_length() - 1]
+                flips ^= low
+        # The game is over if neither player can move (the player to move is checked in new_state)
+        mover_moves = move_mask(own, opp)
+        utility = 0
+        if mover_moves == 0 and move_mask(opp, own) == 0:
+            xscore = board[0].bit_count()
+            oscore = board[1].bit_count()
+            utility = 1 if xscore > oscore else -1 if xscore < oscore else 0
+        return self.new_state(other, utility, board, key, mover_moves)
+
+    def terminal_test(self, state):
+        """A state is terminal if neither player can move."""
+        return state.terminal
+
+    def from_reversi_state(self, state):
+        """Converts a dict board state of the Reversi class (or a bitboard state) to a state of this game."""
+        board = board_to_bitboard(state.board) if isinstance(state.board, dict) else state.board
+        return self.new_state(state.to_move, state.utility, board, state.key)
+
+    # ----------------- Start of heuristic functions -----------------
+
+    def calcMobility(self, state):
+        """`Reversi.calcMobility` from the cached mobility of the two players."""
+        mobility = 0 if state.must_pass else len(state.moves)
+        if state.to_move == 'X':
+            moves_x, moves_o = mobility, state.opponent_mobility
+        else:
+            moves_x, moves_o = state.opponent_mobility, mobility
+
+        total_moves = moves_x + moves_o
+
+        if moves_x > moves_o:
+            return 100 * moves_x / total_moves
+        elif moves_x < moves_o:
+            return 100 * moves_o / total_moves
+        else:
+            return 0
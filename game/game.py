@@ -1,3 +1,11 @@
+import random
+import time
+
+import numpy as np
+
+from gamestate.gamestate import MutableGameState
+
+
 class Game:
     """A game is similar to a problem, but it has a utility for each
     state and a terminal test instead of a path cost and a goal
@@ -15,6 +23,28 @@ class Game:
         """Return the state that results from making a move from a state."""
         raise NotImplementedError
     
+    def mutable_state(self, state):
+        """Return a copy of state that make_move and unmake_move can change in place."""
+        return MutableGameState.from_state(state)
+
+    def make_move(self, state, move):
+        """Make a move on a MutableGameState in place and return an undo token
+        for unmake_move. This default goes through result(); games override it
+        to update the board without copying it."""
+        undo = (state.to_move, state.utility, state.board, state.moves, state.key, state.mobility)
+        child = self.result(state, move)
+        state.to_move = child.to_move
+        state.utility = child.utility
+        state.board = child.board
+        state.moves = child.moves
+        state.key = child.key
+        state.mobility = child.mobility
+        return undo
+
+    def unmake_move(self, state, undo):
+        """Take back the move that returned the undo token, restoring state."""
+        state.to_move, state.utility, state.board, state.moves, state.key, state.mobility = undo
+
     def utility(self, state, player):
         """Return the value of this final state to player."""
         raise NotImplementedError
@@ -34,13 +64,41 @@ class Game:
     def __repr__(self):
         return '<{}>'.format(self.__class__.__name__)
     
-    def play_game(self, *players):
-        """Play an n-person, move-alternating game."""
+    def play_game(self, *players, recorder=None, seed=None):
+        """Play an n-person, move-alternating game.
+
+        Players that have an `observe(game, move, state)` method are told of
+        every move, theirs and the others', with the state after it, e.g. to
+        search on the opponent's time (see players/pondering.py).
+
+        With a `recorder` (a GameRecordWriter, see records/game_records.py)
+        the game is appended to its file, with the time of every move. A
+        `seed` seeds `random` and `numpy.random` before the game and is
+        recorded with it."""
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        moves = []
+        seconds = []
         state = self.initial
         while True:
             for player in players:
+                start = time.perf_counter()
                 move = player(self, state)
+                seconds.append(time.perf_counter() - start)
+                moves.append(move)
                 state = self.result(state, move)
+                self.notify(players, move, state)
                 if self.terminal_test(state):
                     self.display(state)
-                    return self.utility(state, self.to_move(self.initial))
+                    utility = self.utility(state, self.to_move(self.initial))
+                    if recorder is not None:
+                        recorder.write_game(self, players, moves, seconds, self.utility(state, 'X'), seed)
+                    return utility
+
+    def notify(self, players, move, state):
+        """Calls the `observe` method of the players that have one with a move and the state after it."""
+        for player in players:
+            observe = getattr(player, 'observe', None)
+            if observe is not None:
+                observe(self, move, state)
@@ -0,0 +1,489 @@
+"""
+## gomoku.py
+
+This module contains a k-in-a-row engine for large boards, e.g. Gomoku (15 x 15, five in a row), built on the
+TicTacToe class. The board is a pair of bitboards (Python integers), one per player, with one padding column
+after every row, so that shifting a bitboard moves every stone one square in a direction without wrapping into
+the next row:
+
+- win detection ANDs k shifted copies of the bitboard of the player who just moved, per direction;
+- the actions of a state are the empty squares near the stones (the candidate moves), not every empty square;
+- the evaluation counts, for every line window of k squares without an opponent stone, how many stones of the
+  player it holds (a bit-sliced counter over the shifted bitboards), and weights the windows by that count.
+
+A stone only changes the windows through its square (at most 4 k of them), so the search does not evaluate
+positions from scratch: the gain of a move, the change of the evaluation it makes, is computed from those
+windows, and the evaluation of a position is that of its parent plus the gain of the move. The gain also
+orders the moves, and only the BEAM_WIDTH moves with the largest gains are searched below the root's children
+(all the moves are still scored at the last ply). States carry a Zobrist key, so a TranspositionTable can be
+used. With these, `alpha_beta_cutoff_player` at its default depth plays 15 x 15 moves in well under a second
+(see benchmark/gomoku.py).
+
+Classes:
+- Gomoku: A TicTacToe game with the bitboard board, candidate moves, threat evaluation and an
+  `alpha_beta_cutoff_search` for `alpha_beta_cutoff_player`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import random
+import time
+import numpy as np
+
+from game.tic_tac_toe import TicTacToe
+from gamestate.gamestate import GameState
+from search.iterative_deepening import SearchTimeout, CHECK_INTERVAL
+from search.transposition_table import EXACT, LOWER, UPPER
+
+
+class Gomoku(TicTacToe):
+    """Play k in a row on an h x v board, with Max (first player) playing 'X'.
+    A state has the player to move, a cached utility, the list of candidate
+    moves in the form of (x, y) positions (1-based, as in TicTacToe), a
+    board, in the form of a tuple of two integers `(x_bits, o_bits)`, and the
+    Zobrist key of the board.
+
+    Every empty square is a legal move for `result`, but `actions` only lists
+    the empty squares within `radius` squares of a stone (the centre square on
+    an empty board). The game is over when a player has k in a row or the board
+    is full."""
+
+    # Weight of a window of k squares free of opponent stones, by the number of own stones it holds:
+    # THREAT_BASE ** stones
+    THREAT_BASE = 10
+    # The number of moves searched at the nodes below the root's children, those with the largest gains
+    BEAM_WIDTH = 8
+
+    def __init__(self, h=15, v=15, k=5, radius=1):
+        self.h = h
+        self.v = v
+        self.k = k
+        self.radius = radius
+        self.width = v + 1  # bits per row, including the padding column
+        self.squares = {}  # bit index -> (x, y)
+        self.board_mask = 0
+        for x in range(1, h + 1):
+            for y in range(1, v + 1):
+                index = self.bit_index((x, y))
+                self.squares[index] = (x, y)
+                self.board_mask |= 1 << index
+        # Shifts of the 4 line directions: along a row, along a column, and the two diagonals
+        self.line_shifts = [1, self.width, self.width + 1, self.width - 1]
+        self.win_value = self.THREAT_BASE ** (k + 1)
+        self.line_counts = {square: self.count_lines(square) for square in self.squares.values()}
+        # threat_values[m]: the evaluation of a window with m stones and no opponent stone; k stones is a win
+        self.threat_values = [0] + [self.THREAT_BASE ** m for m in range(1, k)] + [self.win_value]
+        self.square_windows = self.windows_by_square()
+        self.neighbourhood = {}  # bit index -> the squares within `radius` of it
+        for index in self.squares:
+            near = 1 << index
+            for _ in range(radius):
+                near = self.grow(near)
+            self.neighbourhood[index] = near
+        rng = random.Random(0x60D0)
+        self.zobrist = {tile: {index: rng.getrandbits(64) for index in self.squares} for tile in 'XO'}
+        centre = ((h + 1) // 2, (v + 1) // 2)
+        self.initial = GameState(to_move='X', utility=0, board=(0, 0), moves=[centre], key=0)
+
+    def bit_index(self, move):
+        """Returns the bit of the square (x, y) in the bitboards."""
+        return (move[0] - 1) * self.width + (move[1] - 1)
+
+    def shift(self, bits, step):
+        """Moves every stone of `bits` by `step` bits (negative: towards bit 0), dropping those leaving the board."""
+        if step > 0:
+            return (bits << step) & self.board_mask
+        return (bits >> -step) & self.board_mask
+
+    def grow(self, bits):
+        """Returns `bits` with the squares next to them in the 8 directions."""
+        grown = bits
+        for step in self.line_shifts:
+            grown |= self.shift(bits, step) | self.shift(bits, -step)
+        return grown
+
+    def candidates(self, board):
+        """Returns the empty squares within `radius` squares of a stone, in bit order."""
+        stones = board[0] | board[1]
+        if not stones:
+            return [((self.h + 1) // 2, (self.v + 1) // 2)]
+        near = stones
+        for _ in range(self.radius):
+            near = self.grow(near)
+        return self.mask_to_moves(near & ~stones & self.board_mask)
+
+    def windows_by_square(self):
+        """Returns, for every bit index, the masks of the line windows of k squares on the board through it."""
+        windows = {index: [] for index in self.squares}
+        for dx, dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for x, y in self.squares.values():
+                line = [(x + i * dx, y + i * dy) for i in range(self.k)]
+                if all(1 <= lx <= self.h and 1 <= ly <= self.v for lx, ly in line):
+                    mask = 0
+                    for square in line:
+                        mask |= 1 << self.bit_index(square)
+                    for square in line:
+                        windows[self.bit_index(square)].append(mask)
+        return {index: tuple(masks) for index, masks in windows.items()}
+
+    def mask_to_moves(self, mask):
+        """Returns the squares of the set bits of `mask` as a list of (x, y) tuples, in bit order."""
+        moves = []
+        squares = self.squares
+        while mask:
+            low = mask & -mask
+            moves.append(squares[low.bit_length() - 1])
+            mask ^= low
+        return moves
+
+    def sides(self, board, tile):
+        """Returns the bitboards of the given player and of its opponent, in that order."""
+        if tile == 'X':
+            return board
+        return (board[1], board[0])
+
+    def result(self, state, move):
+        if state.utility != 0 or not self.is_empty(state.board, move):
+            return state  # Illegal move has no effect
+        index = self.bit_index(move)
+        bit = 1 << index
+        if state.to_move == 'X':
+            board = (state.board[0] | bit, state.board[1])
+        else:
+            board = (state.board[0], state.board[1] | bit)
+        key = None if state.key is None else state.key ^ self.zobrist[state.to_move][index]
+        return GameState(to_move=('O' if state.to_move == 'X' else 'X'),
+                         utility=self.compute_utility(board, move, state.to_move),
+                         board=board, moves=self.candidates(board), key=key)
+
+    def is_empty(self, board, move):
+        """Returns True if the move is an empty square of the board."""
+        if not (1 <= move[0] <= self.h and 1 <= move[1] <= self.v):
+            return False
+        return not (board[0] | board[1]) >> self.bit_index(move) & 1
+
+    def make_move(self, state, move):
+        """Make a move in place on a MutableGameState and return the undo token.
+        The board is an immutable tuple, so the token is just the old field values."""
+        if state.utility != 0 or not self.is_empty(state.board, move):
+            return None
+        undo = (state.to_move, state.utility, state.board, state.moves, state.key)
+        child = self.result(state, move)
+        state.to_move, state.utility, state.board, state.moves, state.key = (
+            child.to_move, child.utility, child.board, child.moves, child.key)
+        return undo
+
+    def unmake_move(self, state, undo):
+        """Take back the move of the undo token returned by make_move."""
+        if undo is not None:
+            state.to_move, state.utility, state.board, state.moves, state.key = undo
+
+    def display(self, state):
+        super().display(GameState(to_move=state.to_move, utility=state.utility,
+                                  board=self.to_dict_board(state.board), moves=state.moves))
+
+    def to_dict_board(self, board):
+        """Converts a bitboard to a TicTacToe dict board of {(x, y): Player} entries."""
+        dict_board = {square: 'X' for square in self.mask_to_moves(board[0])}
+        dict_board.update({square: 'O' for square in self.mask_to_moves(board[1])})
+        return dict_board
+
+    def compute_utility(self, board, move, player):
+        """If 'X' wins with this move, return 1; if 'O' wins return -1; else return 0."""
+        own = board[0] if player == 'X' else board[1]
+        if self.has_line(own):
+            return +1 if player == 'X' else -1
+        return 0
+
+    def has_line(self, bits):
+        """Returns True if `bits` holds k stones in a row in any direction."""
+        for step in self.line_shifts:
+            run = bits
+            for i in range(1, self.k):
+                run &= bits >> (i * step)
+                if not run:
+                    break
+            if run:
+                return True
+        return False
+
+    # ----------------- Start of heuristic functions -----------------
+
+    def threats(self, own, opp):
+        """
+        Counts the line windows of k squares that hold no stone of `opp`, by the number of stones of `own`
+        they hold.
+
+        Returns:
+            list: `counts[m]` is the number of such windows with m stones of `own`, for m in 0..k.
+        """
+        k = self.k
+        free = self.board_mask & ~opp
+        counts = [0] * (k + 1)
+        planes_count = k.bit_length()
+        for step in self.line_shifts:
+            # windows are identified by their first square; all k squares must be free and on the board
+            windows = free
+            for i in range(1, k):
+                windows &= free >> (i * step)
+            if not windows:
+                continue
+            # bit-sliced counter of the own stones of every window
+            planes = [0] * planes_count
+            for i in range(k):
+                carry = own >> (i * step)
+                for j in range(planes_count):
+                    planes[j], carry = planes[j] ^ carry, planes[j] & carry
+                    if not carry:
+                        break
+            for m in range(1, k + 1):
+                mask = windows
+                for j in range(planes_count):
+                    mask &= planes[j] if m >> j & 1 else ~planes[j]
+                counts[m] += mask.bit_count()
+        return counts
+
+    def threat_score(self, counts):
+        """Returns the weighted sum of the window counts returned by `threats`."""
+        return sum(self.THREAT_BASE ** m * counts[m] for m in range(1, self.k))
+
+    def evaluate(self, state, player):
+        """
+        Returns the threat evaluation of a non-terminal state from the point of view of `player`: the weighted
+        windows of `player` minus those of the opponent. A player to move with k - 1 stones in an open window
+        wins on the next move, which scores as half a win.
+        """
+        board = state.board
+        own, opp = self.sides(board, player)
+        own_counts = self.threats(own, opp)
+        opp_counts = self.threats(opp, own)
+        to_move_counts = own_counts if state.to_move == player else opp_counts
+        if to_move_counts[self.k - 1]:
+            return self.win_value // 2 if state.to_move == player else -self.win_value // 2
+        return self.threat_score(own_counts) - self.threat_score(opp_counts)
+
+    def heuristic_score(self, state):
+        """The threat evaluation for the player to move, see `evaluate`."""
+        return self.evaluate(state, state.to_move)
+
+    def zobrist_key(self, board):
+        """Computes the Zobrist key of a board from scratch: the XOR of the numbers of its stones."""
+        key = 0
+        for tile, bits in zip('XO', board):
+            for square in self.mask_to_moves(bits):
+                key ^= self.zobrist[tile][self.bit_index(square)]
+        return key
+
+    def threat_squares(self, own, opp):
+        """Returns the mask of the empty squares that complete a line of k for the stones of `own`."""
+        k = self.k
+        empty = self.board_mask & ~(own | opp)
+        squares = 0
+        for step in self.line_shifts:
+            shifted = [own >> (i * step) for i in range(k)]
+            for j in range(k):
+                # windows (by their first square) with the j-th square empty and the others own
+                run = empty >> (j * step)
+                for i in range(k):
+                    if i != j:
+                        run &= shifted[i]
+                        if not run:
+                            break
+                if run:
+                    squares |= run << (j * step)
+        return squares
+
+    def move_gain(self, own, opp, index):
+        """
+        Returns the change of the threat evaluation of the player of `own` (see `evaluate`, without the bonus of
+        the player to move) when it puts a stone on the square of bit `index`: the windows through the square
+        free of `opp` gain a stone, and those of `opp` free of `own` are blocked.
+        """
+        values = self.threat_values
+        gain = 0
+        for window in self.square_windows[index]:
+            if window & opp:
+                if not window & own:
+                    gain += values[(window & opp).bit_count()]
+            else:
+                m = (window & own).bit_count()
+                gain += values[m + 1] - values[m]
+        return gain
+
+    def order_moves(self, state):
+        """Orders the candidate moves by their gain for the player to move (see `move_gain`), largest first."""
+        own, opp = self.sides(state.board, state.to_move)
+        gains = {move: self.move_gain(own, opp, self.bit_index(move)) for move in state.moves}
+        return sorted(state.moves, key=lambda move: -gains[move])
+
+    def winning_moves(self, state, player):
+        """Returns the candidate moves that complete a line of k for `player`."""
+        own, opp = self.sides(state.board, player)
+        return self.mask_to_moves(self.threat_squares(own, opp))
+
+    def alpha_beta_cutoff_search(self, state, depth=3, tt=None, stats=None, deadline=None, ordering=None):
+        """
+        Performs an alpha-beta cutoff search with the threat evaluation to find the best action for the state.
+
+        A move that wins at once is played without searching, and if the opponent threatens to win on its next
+        move only the moves that stop it are searched. The moves are ordered by their gain, and below the root's
+        children only the BEAM_WIDTH best are searched. The nodes are searched in negamax form on the bitboards,
+        with the evaluation updated by the gain of every move instead of recomputed.
+
+        Args:
+            state: The current state of the game.
+            depth (optional): The maximum depth to search in the game tree. Defaults to 3.
+            tt (TranspositionTable, optional): A transposition table to read and store searched positions,
+                keyed by the Zobrist key of the board. It can be kept between calls.
+            stats (dict, optional): If given, the counters of the search are added to its keys: 'searches',
+                'nodes', 'leaves' (evaluated positions), 'cutoffs', 'tt_probes' and 'tt_hits'.
+            deadline (float, optional): A `time.perf_counter()` value. Once it has passed, the search is
+                aborted with SearchTimeout.
+            ordering (MoveOrderer, optional): Orders the searched moves of every node, instead of their gains.
+                The best move stored in `tt` is used as the PV move.
+
+        Returns:
+            The best action to take based on the alpha-beta cutoff search.
+        """
+        player = self.to_move(state)
+        own, opp = self.sides(state.board, player)
+        nodes = leaves = cutoffs = 0
+        check_mask = CHECK_INTERVAL - 1
+        top = depth + 1  # ply of a node = top - its remaining depth
+        squares = self.squares
+        neighbourhood = self.neighbourhood
+        zobrist = self.zobrist
+        move_gain = self.move_gain
+        threat_squares = self.threat_squares
+        win_value = self.win_value
+        width = self.BEAM_WIDTH
+
+        wins = threat_squares(own, opp)
+        if wins:
+            return squares[(wins & -wins).bit_length() - 1]
+        if tt is not None:
+            tt.new_search()
+            tt_probes, tt_hits = tt.hits + tt.misses, tt.hits
+
+        def report(root):
+            # Adds the counters to `stats`; `root` is 1 once the search is done
+            stats['searches'] = stats.get('searches', 0) + root
+            stats['nodes'] = stats.get('nodes', 0) + nodes + root
+            stats['leaves'] = stats.get('leaves', 0) + leaves
+            stats['cutoffs'] = stats.get('cutoffs', 0) + cutoffs
+            if tt is not None:
+                stats['tt_probes'] = stats.get('tt_probes', 0) + tt.hits + tt.misses - tt_probes
+                stats['tt_hits'] = stats.get('tt_hits', 0) + tt.hits - tt_hits
+
+        def bits(mask):
+            indices = []
+            while mask:
+                low = mask & -mask
+                indices.append(low.bit_length() - 1)
+                mask ^= low
+            return indices
+
+        def moves_of(own, opp, near, score, blocks, depth, tile, pv_move):
+            # The moves to search at a node and their gains, best first, narrowed to the beam
+            gains = {i: move_gain(own, opp, i) for i in bits(blocks or near & ~(own | opp))}
+            moves = sorted(gains, key=gains.get, reverse=True)
+            if depth < top - 1:
+                moves = moves[:width]
+            if ordering is not None:
+                ordered = ordering.order([squares[i] for i in moves], top - depth, tile, pv_move)
+                moves = [self.bit_index(move) for move in ordered]
+            elif pv_move is not None:
+                pv = self.bit_index(pv_move)
+                if pv in gains:
+                    moves = [pv] + [i for i in moves if i != pv]
+            return moves, gains
+
+        def value(own, opp, near, key, score, alpha, beta, depth, tile):
+            # The negamax value of a node for the player to move, whose stones are `own`; `score` is the
+            # threat evaluation for that player and `near` the squares near the stones
+            nonlocal nodes, leaves, cutoffs
+            nodes += 1
+            if deadline is not None and not nodes & check_mask and time.perf_counter() > deadline:
+                if stats is not None:
+                    report(0)
+                raise SearchTimeout()
+            if threat_squares(own, opp):
+                # the player to move wins with its next move
+                leaves += 1
+                return win_value // 2 if depth == 0 else win_value + depth - 1
+            if depth == 0:
+                leaves += 1
+                return score
+            if not near & ~(own | opp) & self.board_mask:
+                leaves += 1
+                return 0
+            blocks = threat_squares(opp, own)
+            pv_move = None
+            if tt is not None:
+                entry = tt.probe(key)
+                if entry is not None:
+                    if entry.depth >= depth:
+                        if entry.flag == EXACT:
+                            return entry.score
+                        if entry.flag == LOWER and entry.score >= beta:
+                            return entry.score
+                        if entry.flag == UPPER and entry.score <= alpha:
+                            return entry.score
+                    pv_move = entry.move
+                alpha_orig = alpha
+            moves, gains = moves_of(own, opp, near, score, blocks, depth, tile, pv_move)
+            other = 'O' if tile == 'X' else 'X'
+            v = -np.inf
+            best_move = None
+            for i, a in enumerate(moves):
+                if depth == 1:
+                    # the children are leaves: the opponent to move wins next if a threat is left unblocked
+                    nodes += 1
+                    leaves += 1
+                    child_value = -win_value // 2 if blocks & ~(1 << a) else score + gains[a]
+                else:
+                    child_value = -value(opp, own | 1 << a, near | neighbourhood[a], key ^ zobrist[tile][a],
+                                         -(score + gains[a]), -beta, -alpha, depth - 1, other)
+                if child_value > v:
+                    v = child_value
+                    best_move = a
+                if v >= beta:
+                    cutoffs += 1
+                    if ordering is not None:
+                        ordering.record_cutoff(squares[a], top - depth, tile, depth, i)
+                    break
+                alpha = max(alpha, v)
+            if tt is not None:
+                flag = LOWER if v >= beta else UPPER if v <= alpha_orig else EXACT
+                tt.store(key, depth, v, flag, squares[best_move])
+            return v
+
+        # Body of alpha_beta_cutoff_search:
+        stones = own | opp
+        near = stones
+        for _ in range(self.radius):
+            near = self.grow(near)
+        key = state.key if state.key is not None else self.zobrist_key(state.board)
+        score = (self.threat_score(self.threats(own, opp)) - self.threat_score(self.threats(opp, own))
+                 if stones else 0)
+        blocks = threat_squares(opp, own)
+        if stones:
+            pv_move = tt.best_move(key) if tt is not None else None
+            actions, gains = moves_of(own, opp, near, score, blocks, depth + 1, player, pv_move)
+        else:
+            actions, gains = [self.bit_index(state.moves[0])], {self.bit_index(state.moves[0]): 0}
+        other = 'O' if player == 'X' else 'X'
+        best_score = -np.inf
+        best_action = None
+        for a in actions:
+            v = -value(opp, own | 1 << a, near | self.neighbourhood[a], key ^ zobrist[player][a],
+                       -(score + gains[a]), -np.inf, -best_score, depth, other)
+            if v > best_score:
+                best_score = v
+                best_action = a
+        if tt is not None and best_action is not None:
+            tt.store(key, depth + 1, best_score, EXACT, squares[best_action])
+        if stats is not None:
+            report(1)
+        return squares[best_action] if best_action is not None else None
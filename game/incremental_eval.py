@@ -0,0 +1,142 @@
+"""
+## incremental_eval.py
+
+This module contains an incremental version of `Reversi.heuristic_score`. The heuristic rescans the board for
+every term on every leaf of a search; the evaluator instead follows the moves of the search and keeps the board
+facts the terms are made of up to date:
+
+- the number of tiles of each player (tile dominance);
+- the corners each player owns;
+- the number of tiles of each player on the X/C-squares around each corner (corner proximity);
+- the sum of the positional weights of each player's tiles (WEIGHT_MATRIX).
+
+A move changes only the placed disc and the flipped ones, so an update costs a few bit counts and one weight
+lookup per flipped disc. The mobility term is the only one computed at the leaf, by the `calcMobility` of the
+game, which reads the move counts cached in the state.
+
+The terms are computed with the same arithmetic as the Reversi functions and combined by `Reversi.combine_terms`,
+so the scores are identical to those of `heuristic_score`, not just close.
+
+Classes:
+- IncrementalEvaluator: The evaluator of a search, moved along with the searched state.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+from game.bitboard_reversi import board_to_bitboard, flip_mask, square_bit, CORNER_MASK, CORNER_NEIGHBOURS
+from game.reversi import Reversi, PASS
+
+# WEIGHTS[i] is the positional weight of the square with bit i
+WEIGHTS = [Reversi.WEIGHT_MATRIX[i // 8][i % 8] for i in range(64)]
+
+
+class IncrementalEvaluator:
+    """
+    Keeps the terms of the heuristic of a position up to date while a search makes and takes back moves.
+
+    Create it from the root state of the search, then call `play` after every `make_move` and `undo` after every
+    `unmake_move`. `score` returns `heuristic_score` of the current state.
+
+    Attributes:
+        - game: The Reversi game (any of the Reversi classes) whose `calcMobility` is used.
+        - to_move: The player to move in the current position.
+        - bits (list): The bitboards of 'X' and of 'O'.
+        - tiles, corners, weights (list): The tile count, the corner count and the weight sum of 'X' and 'O'.
+        - near (list): near[c] is the [X, O] tile count on the squares around corner c of CORNER_NEIGHBOURS.
+    """
+
+    def __init__(self, game, state):
+        self.game = game
+        self.to_move = state.to_move
+        board = state.board
+        x_bits, o_bits = board_to_bitboard(board) if isinstance(board, dict) else board
+        self.bits = [x_bits, o_bits]
+        self.tiles = [x_bits.bit_count(), o_bits.bit_count()]
+        self.corners = [(x_bits & CORNER_MASK).bit_count(), (o_bits & CORNER_MASK).bit_count()]
+        self.weights = [self.weight_sum(x_bits), self.weight_sum(o_bits)]
+        self.near = [[(x_bits & squares).bit_count(), (o_bits & squares).bit_count()]
+                     for _, squares in CORNER_NEIGHBOURS]
+        self.history = []
+
+    def weight_sum(self, bits):
+        """Returns the sum of the positional weights of the squares of `bits`."""
+        total = 0
+        while bits:
+            low = bits & -bits
+            total += WEIGHTS[low.bit_length() - 1]
+            bits ^= low
+        return total
+
+    def play(self, move):
+        """Updates the terms after the player to move plays `move` (a square or PASS)."""
+        side = 0 if self.to_move == 'X' else 1
+        self.to_move = 'O' if side == 0 else 'X'
+        if move == PASS:
+            self.history.append(None)
+            return
+        own = self.bits[side]
+        opp = self.bits[1 - side]
+        bit = square_bit(*move)
+        flips = flip_mask(own, opp, bit)
+        self.history.append((bit, flips))
+        self.update(side, bit, flips, 1)
+
+    def undo(self):
+        """Takes back the last move given to `play`."""
+        self.to_move = 'O' if self.to_move == 'X' else 'X'
+        change = self.history.pop()
+        if change is not None:
+            bit, flips = change
+            self.update(0 if self.to_move == 'X' else 1, bit, flips, -1)
+
+    def update(self, side, bit, flips, sign):
+        # Adds (sign=1) or removes (sign=-1) the disc placed by `side` on `bit` and the discs it flipped
+        other = 1 - side
+        flip_count = flips.bit_count()
+        flip_weight = self.weight_sum(flips)
+        if sign > 0:
+            self.bits[side] |= bit | flips
+            self.bits[other] &= ~flips
+        else:
+            self.bits[side] &= ~(bit | flips)
+            self.bits[other] |= flips
+        self.tiles[side] += sign * (1 + flip_count)
+        self.tiles[other] -= sign * flip_count
+        self.weights[side] += sign * (WEIGHTS[bit.bit_length() - 1] + flip_weight)
+        self.weights[other] -= sign * flip_weight
+        changed = bit | flips
+        if changed & CORNER_MASK:
+            self.corners[side] += sign * (changed & CORNER_MASK).bit_count()
+            self.corners[other] -= sign * (flips & CORNER_MASK).bit_count()
+        for near, (_, squares) in zip(self.near, CORNER_NEIGHBOURS):
+            if changed & squares:
+                near[side] += sign * (changed & squares).bit_count()
+                near[other] -= sign * (flips & squares).bit_count()
+
+    def score(self, state):
+        """Returns `heuristic_score(state)` of the current state, which must be the state the moves led to."""
+        tiles_x, tiles_o = self.tiles
+        total_tiles = tiles_x + tiles_o
+        if tiles_x > tiles_o:
+            tiles_term = 100 * tiles_x / total_tiles
+        elif tiles_x < tiles_o:
+            tiles_term = 100 * tiles_o / total_tiles
+        else:
+            tiles_term = 0
+
+        corners_term = 25 * (self.corners[0] - self.corners[1])
+
+        occupied = self.bits[0] | self.bits[1]
+        proximity_angle_x = 0
+        proximity_angle_o = 0
+        for near, (corner, _) in zip(self.near, CORNER_NEIGHBOURS):
+            if not occupied & corner:
+                proximity_angle_x += near[0]
+                proximity_angle_o += near[1]
+        proximity_corners_term = -12.5 * (proximity_angle_x - proximity_angle_o)
+
+        mobility_term = self.game.calcMobility(state)
+        discs_term = self.weights[0] - self.weights[1]
+        return self.game.combine_terms(state, tiles_term, corners_term, proximity_corners_term, mobility_term,
+                                       discs_term)
@@ -9,6 +9,13 @@ disk just placed and another disk of the current player's color are turned over
 The object of the game is to have the majority of disks turned to display your color when the last playable 
 empty square is filled.
 
+A player who has no legal move while the opponent has one must pass: the only action of the state is PASS,
+which hands the turn to the opponent without changing the board. The game is over when neither player can move.
+
+Constants:
+- PASS: The action of a player who has no legal move.
+- ASPIRATION_WINDOW: The default half width of the aspiration window of `Reversi.principal_variation_search`.
+
 Classes:
 - Reversi: This class represents a Reversi game. It inherits from the Game class and overrides its methods 
   to implement the Reversi game rules.
@@ -17,9 +24,22 @@ Authors:
 - Giannopoulos Georgios
 - Giannopoulos Ioannis
 """
+import copy
+import math
+import time
 import numpy as np
 from game.game import Game
 from gamestate.gamestate import GameState
+from search.zobrist import zobrist_hash, PIECE_KEYS, FLIP_KEYS, SIDE_KEY, PERSPECTIVE_KEYS
+from search.transposition_table import EXACT, LOWER, UPPER
+from search.iterative_deepening import SearchTimeout, CHECK_INTERVAL
+
+# The action of a player who has no legal move while the opponent has one
+PASS = 'pass'
+
+# Half the width of the aspiration window of principal_variation_search, in heuristic_score units
+ASPIRATION_WINDOW = 2500
+
 class Reversi(Game):
     """Play Reversi on an 8 x 8 board, with Max (first player) playing 'X'.
     A state has the player to move, a cached utility, a list of moves in
@@ -27,6 +47,25 @@ class Reversi(Game):
     a dict of {(x, y): Player} entries, where Player is 'X' or 'O'. Code
     adapted from http://inventwithpython.com/chapter15.html """
 
+    # Positional weight of every square, used by calcDiscs
+    WEIGHT_MATRIX = [
+        [20, -3, 11,  8,  8, 11, -3, 20],
+        [-3, -7, -4,  1,  1, -4, -7, -3],
+        [11, -4,  2,  2,  2,  2, -4, 11],
+        [ 8,  1,  2, -3, -3,  2,  1,  8],
+        [ 8,  1,  2, -3, -3,  2,  1,  8],
+        [11, -4,  2,  2,  2,  2, -4, 11],
+        [-3, -7, -4,  1,  1, -4, -7, -3],
+        [20, -3, 11,  8,  8, 11, -3, 20]
+    ]
+
+    # Weights of the terms of heuristic_score: tiles, corners, corner proximity, mobility and discs
+    HEURISTIC_WEIGHTS = (10, 801.724, 382.026, 78.922, 10)
+
+    # Whether the searches score their leaves with an IncrementalEvaluator. The scores are the same, but the
+    # leaves are only 1.1-1.8x faster and the move generation dominates the search time, so it is off
+    INCREMENTAL_EVAL = False
+
     def __init__(self):
         # Creates a brand new, blank board data structure.
         board = {}
@@ -37,9 +76,10 @@ class Reversi(Game):
         board[(4,3)] = 'O'
         board[(4,4)] = 'X'
         print(board)
-        moves = self.getValidMoves(board, 'X')
-        print(moves)
-        self.initial = GameState(to_move='X', utility=0, board=board, moves=moves)
+        moves_x, moves_o = self.getBothValidMoves(board)
+        print(moves_x)
+        self.initial = GameState(to_move='X', utility=0, board=board, moves=moves_x,
+                                 key=self.zobrist_key(board, 'X'), mobility=(len(moves_x), len(moves_o)))
 
     def actions(self, state):
         """Legal moves are any square not yet taken."""
@@ -48,27 +88,86 @@ class Reversi(Game):
     def result(self, state, move):
         if move not in state.moves:
             return state  # Illegal move has no effect
+        other = 'O' if state.to_move == 'X' else 'X'
+        key = state.key
+        if move == PASS:
+            # The board does not change, so neither do the moves of the two players
+            moves = self.getValidMoves(state.board, other)
+            if key is not None:
+                key ^= SIDE_KEY
+            return GameState(to_move=other, utility=0, board=state.board, moves=moves, key=key,
+                             mobility=state.mobility)
         board = self.getBoardCopy(state.board)
         tilesToFlip = self.isValidMove(board, state.to_move, move[0], move[1])
         board[(move[0],move[1])] = state.to_move
         for x, y in tilesToFlip:
             board[(x,y)] = state.to_move
 
-        if state.to_move == 'X':
-            moves = self.getValidMoves(board, 'O')
-        else:
-            moves = self.getValidMoves(board, 'X')
-        return GameState(to_move=('O' if state.to_move == 'X' else 'X'),
-                         utility=self.compute_utility(board, move, state.to_move),
-                         board=board, moves=moves)
+        moves_x, moves_o = self.getBothValidMoves(board)
+        mobility = (len(moves_x), len(moves_o))
+        if key is not None:
+            # Incremental Zobrist update: the new disc, the flipped discs and the side to move
+            key ^= PIECE_KEYS[state.to_move][move[0] * 8 + move[1]] ^ SIDE_KEY
+            for x, y in tilesToFlip:
+                key ^= FLIP_KEYS[x * 8 + y]
+        return GameState(to_move=other,
+                         utility=self.compute_utility(board, move, state.to_move, mobility),
+                         board=board, moves=self.nextMoves(moves_x, moves_o, other), key=key, mobility=mobility)
+
+    def make_move(self, state, move):
+        """Make a move in place on a MutableGameState and return the undo token."""
+        if move not in state.moves:
+            return None  # Illegal move has no effect
+        board = state.board
+        tile = state.to_move
+        other = 'O' if tile == 'X' else 'X'
+        if move == PASS:
+            undo = (move, [], tile, state.utility, state.moves, state.key, state.mobility)
+            if state.key is not None:
+                state.key ^= SIDE_KEY
+            state.moves = self.getValidMoves(board, other)
+            state.utility = 0
+            state.to_move = other
+            return undo
+        tilesToFlip = self.isValidMove(board, tile, move[0], move[1])
+        board[(move[0], move[1])] = tile
+        for x, y in tilesToFlip:
+            board[(x, y)] = tile
+        undo = (move, tilesToFlip, tile, state.utility, state.moves, state.key, state.mobility)
+        if state.key is not None:
+            key = state.key ^ PIECE_KEYS[tile][move[0] * 8 + move[1]] ^ SIDE_KEY
+            for x, y in tilesToFlip:
+                key ^= FLIP_KEYS[x * 8 + y]
+            state.key = key
+        moves_x, moves_o = self.getBothValidMoves(board)
+        state.mobility = (len(moves_x), len(moves_o))
+        state.moves = self.nextMoves(moves_x, moves_o, other)
+        state.utility = self.compute_utility(board, move, tile, state.mobility)
+        state.to_move = other
+        return undo
+
+    def unmake_move(self, state, undo):
+        """Take back the move of the undo token returned by make_move."""
+        if undo is None:
+            return
+        move, tilesToFlip, tile, state.utility, state.moves, state.key, state.mobility = undo
+        state.to_move = tile
+        if move == PASS:
+            return
+        other = 'O' if tile == 'X' else 'X'
+        board = state.board
+        del board[(move[0], move[1])]
+        for x, y in tilesToFlip:
+            board[(x, y)] = other
 
     def utility(self, state, player):
         """Return the value to player; 1 for win, -1 for loss, 0 otherwise."""
         return state.utility if player == 'X' else -state.utility
 
     def terminal_test(self, state):
-        """A state is terminal if it is won or there are no empty squares."""
-        return self.getValidMoves(state.board, state.to_move) == []
+        """A state is terminal if neither player can move: state.moves is empty (it holds PASS if only the
+        opponent can move)."""
+        return not state.moves
 
     def display(self, state):
         board = state.board
@@ -93,9 +192,14 @@ class Reversi(Game):
             print(VLINE)
             print(HLINE)
 
-    def compute_utility(self, board, move, player):
-        """If 'X' wins with this move, return 1; if 'O' wins return -1; else return 0."""
-        if self.getValidMoves(board, player) == []:
+    def compute_utility(self, board, move, player, mobility=None):
+        """If 'X' wins with this move, return 1; if 'O' wins return -1; else return 0.
+        The game is over after the move if neither player can move; `mobility` is the
+        (moves_x, moves_o) count of the board, if already known."""
+        if mobility is None:
+            moves_x, moves_o = self.getBothValidMoves(board)
+            mobility = (len(moves_x), len(moves_o))
+        if mobility == (0, 0):
             scores = self.getScoreOfBoard(board)
             if scores['X'] > scores['O']:
                 return 1
@@ -106,6 +210,10 @@ class Reversi(Game):
         else:
             return 0
 
+    def zobrist_key(self, board, to_move):
+        # Returns the Zobrist hash of the given board with the given player to move.
+        return zobrist_hash(board, to_move)
+
     def getValidMoves(self, board, tile):
         # Returns a list of [x,y] lists of valid moves for the given player on the given board.
         validMoves = []
@@ -116,6 +224,29 @@ class Reversi(Game):
                     validMoves.append((x, y))
         return validMoves
 
+    def getBothValidMoves(self, board):
+        # Returns the lists of valid moves of 'X' and of 'O', in a single scan of the board.
+        movesX = []
+        movesO = []
+
+        for x in range(8):
+            for y in range(8):
+                if (x, y) in board:
+                    continue
+                if self.isValidMove(board, 'X', x, y) != False:
+                    movesX.append((x, y))
+                if self.isValidMove(board, 'O', x, y) != False:
+                    movesO.append((x, y))
+        return movesX, movesO
+
+    def nextMoves(self, movesX, movesO, tile):
+        # Returns the actions of the given player: its valid moves, [PASS] if only the opponent can move,
+        # or [] if the game is over.
+        moves, otherMoves = (movesX, movesO) if tile == 'X' else (movesO, movesX)
+        if moves:
+            return moves
+        return [PASS] if otherMoves else []
+
     def isValidMove(self, board, tile, xstart, ystart):
         # Returns False if the player's move on space xstart, ystart is invalid.
         # If it is a valid move, returns a list of spaces that would become the player's if they made a move here.
@@ -275,13 +406,16 @@ class Reversi(Game):
         Returns:
         - The mobility score as a percentage.
 
-        The mobility score is calculated by counting the number of valid moves for each player ('X' and 'O'), with the `getValidMoves()` method.
+        The mobility score is calculated by counting the number of valid moves for each player ('X' and 'O'), with the `getBothValidMoves()` method.
+        The counts are cached in `state.mobility` when the state is created, so they are usually just read.
         The total number of moves is then used to calculate the percentage of moves available to the player with more moves.
         If both players have the same number of moves, the mobility score is 0.
 
         """
-        moves_x = len(self.getValidMoves(state.board, 'X'))
-        moves_o = len(self.getValidMoves(state.board, 'O'))
+        if state.mobility is not None:
+            moves_x, moves_o = state.mobility
+        else:
+            moves_x, moves_o = (len(moves) for moves in self.getBothValidMoves(state.board))
 
         total_moves = moves_x + moves_o
 
@@ -304,16 +438,7 @@ class Reversi(Game):
         Returns:
             int: The difference between the total weight of 'X' discs and 'O' discs on the board.
         """
-        WEIGHT_MATRIX = [
-            [20, -3, 11,  8,  8, 11, -3, 20],
-            [-3, -7, -4,  1,  1, -4, -7, -3],
-            [11, -4,  2,  2,  2,  2, -4, 11],
-            [ 8,  1,  2, -3, -3,  2,  1,  8],
-            [ 8,  1,  2, -3, -3,  2,  1,  8],
-            [11, -4,  2,  2,  2,  2, -4, 11],
-            [-3, -7, -4,  1,  1, -4, -7, -3],
-            [20, -3, 11,  8,  8, 11, -3, 20]
-        ]
+        WEIGHT_MATRIX = self.WEIGHT_MATRIX
         total_weight_x = 0
         total_weight_o = 0
 
@@ -349,64 +474,422 @@ class Reversi(Game):
         mobility_term = self.calcMobility(state)
         discs_term = self.calcDiscs(state.board)
 
+        return self.combine_terms(state, tiles_term, corners_term, proximity_corners_term, mobility_term,
+                                  discs_term)
+
+    def combine_terms(self, state, tiles_term, corners_term, proximity_corners_term, mobility_term, discs_term):
+        """
+        Combines the terms of the heuristic of a state into its score (see `heuristic_score`).
+
+        Returns:
+            float: The score, positive for the `X player` and negative for the `O player`.
+        """
         # Linear combination of terms with weights
-        score = (10 * tiles_term +
-                 801.724 * corners_term +
-                 382.026 * proximity_corners_term +
-                 78.922 * mobility_term +
-                 10 * discs_term)
+        tiles_weight, corners_weight, proximity_weight, mobility_weight, discs_weight = self.HEURISTIC_WEIGHTS
+        score = (tiles_weight * tiles_term +
+                 corners_weight * corners_term +
+                 proximity_weight * proximity_corners_term +
+                 mobility_weight * mobility_term +
+                 discs_weight * discs_term)
 
         # Adjust the score based on the player's turn
         if state.to_move == 'X':
             return score
         else:
             return -score
-        
-    def alpha_beta_cutoff_search(self, state, depth=3):
+
+    def with_weights(self, weights):
+        """
+        Returns a copy of the game whose heuristic (`heuristic_score`, the evaluator of the searches and
+        `heuristic_score_batch`) uses `weights` instead of HEURISTIC_WEIGHTS, e.g. weights tuned by
+        training/tune_weights.py. The copy plays on the same states as the game.
+        """
+        game = copy.copy(self)
+        game.HEURISTIC_WEIGHTS = tuple(float(w) for w in weights)
+        return game
+
+    def heuristic_score_batch(self, boards, x_to_move):
+        """
+        Returns the `heuristic_score` of a batch of positions, computed with NumPy (see game/batch_eval.py).
+
+        Args:
+            boards (np.ndarray): An (N, 8, 8) int8 array, 1 for 'X', -1 for 'O', 0 for empty.
+            x_to_move (np.ndarray): N booleans, True where 'X' is to move.
+        """
+        # Imported here, like the evaluator below
+        from game.batch_eval import heuristic_score_batch
+        return heuristic_score_batch(boards, x_to_move, self.HEURISTIC_WEIGHTS)
+
+    def incremental_evaluator(self, state):
+        """
+        Returns an IncrementalEvaluator of the state (see game/incremental_eval.py), which a search moves along
+        with its state to get the `heuristic_score` of its leaves without rescanning the board.
+        """
+        # Imported here: the evaluator module builds on bitboard_reversi, which imports this module
+        from game.incremental_eval import IncrementalEvaluator
+        return IncrementalEvaluator(self, state)
+
+    def square_weight(self, move):
+        # Returns the static positional weight of a move, used for move ordering.
+        if move == PASS:
+            return 0
+        return self.WEIGHT_MATRIX[move[0]][move[1]]
+
+    def alpha_beta_cutoff_search(self, state, depth=3, tt=None, stats=None, deadline=None, ordering=None):
         """
         Performs an alpha-beta cutoff search to find the best action for the given state.
 
         Args:
             state: The current state of the game.
             depth (optional): The maximum depth to search in the game tree. Defaults to 3.
+            tt (TranspositionTable, optional): A transposition table to read and store searched positions.
+                It can be kept between calls, so that positions searched on the previous move are reused.
+            stats (dict, optional): If given, the counters of the search are added to its keys: 'searches',
+                'nodes', 'leaves' (evaluated positions), 'cutoffs', 'tt_probes' and 'tt_hits'.
+            deadline (float, optional): A `time.perf_counter()` value. Once it has passed, the search is
+                aborted with SearchTimeout.
+            ordering (MoveOrderer, optional): Orders the moves of every node. The best move stored in `tt`
+                is used as the PV move.
 
         Returns:
             The best action to take based on the alpha-beta cutoff search.
 
         """
         player = self.to_move(state)
+        nodes = leaves = cutoffs = 0
+        check_mask = CHECK_INTERVAL - 1
+        top = depth + 1  # ply of a node = top - its remaining depth
+
+        # The tree is walked in place on a single mutable state, with make_move / unmake_move
+        state = self.mutable_state(state)
+        # With INCREMENTAL_EVAL, the leaves are scored by an evaluator that follows the moves
+        evaluator = self.incremental_evaluator(state) if self.INCREMENTAL_EVAL else None
+        if tt is not None:
+            tt.new_search()
+            if state.key is None:
+                state.key = self.zobrist_key(state.board, state.to_move)
+            perspective = PERSPECTIVE_KEYS[player]
+            tt_probes, tt_hits = tt.hits + tt.misses, tt.hits
+
+        def report(root):
+            # Adds the counters to `stats`; `root` is 1 once the root node is done
+            stats['searches'] = stats.get('searches', 0) + root
+            stats['nodes'] = stats.get('nodes', 0) + nodes + root
+            stats['leaves'] = stats.get('leaves', 0) + leaves
+            stats['cutoffs'] = stats.get('cutoffs', 0) + cutoffs
+            if tt is not None:
+                stats['tt_probes'] = stats.get('tt_probes', 0) + tt.hits + tt.misses - tt_probes
+                stats['tt_hits'] = stats.get('tt_hits', 0) + tt.hits - tt_hits
 
         def max_value(state, alpha, beta, depth):
+            nonlocal nodes, leaves, cutoffs
+            nodes += 1
+            if deadline is not None and not nodes & check_mask and time.perf_counter() > deadline:
+                if stats is not None:
+                    report(0)
+                raise SearchTimeout()
             if self.terminal_test(state) or depth == 0:
-                return self.heuristic_score(state)
+                leaves += 1
+                return evaluator.score(state) if evaluator is not None else self.heuristic_score(state)
+            pv_move = None
+            if tt is not None:
+                key = state.key ^ perspective
+                entry = tt.probe(key)
+                if entry is not None:
+                    if entry.depth >= depth:
+                        if entry.flag == EXACT:
+                            return entry.score
+                        if entry.flag == LOWER and entry.score >= beta:
+                            return entry.score
+                        if entry.flag == UPPER and entry.score <= alpha:
+                            return entry.score
+                    pv_move = entry.move
+                alpha_orig = alpha
+            actions = self.actions(state)
+            if ordering is not None:
+                actions = ordering.order(actions, top - depth, state.to_move, pv_move)
             v = -np.inf
-            for a in self.actions(state):
-                v = max(v, min_value(self.result(state, a), alpha, beta, depth - 1))
+            best_move = None
+            for i, a in enumerate(actions):
+                undo = self.make_move(state, a)
+                if evaluator is not None:
+                    evaluator.play(a)
+                child_value = min_value(state, alpha, beta, depth - 1)
+                self.unmake_move(state, undo)
+                if evaluator is not None:
+                    evaluator.undo()
+                if child_value > v:
+                    v = child_value
+                    best_move = a
                 if v >= beta:
-                    return v
+                    cutoffs += 1
+                    if ordering is not None:
+                        ordering.record_cutoff(a, top - depth, state.to_move, depth, i)
+                    break
                 alpha = max(alpha, v)
+            if tt is not None:
+                flag = LOWER if v >= beta else UPPER if v <= alpha_orig else EXACT
+                tt.store(key, depth, v, flag, best_move)
             return v
 
         def min_value(state, alpha, beta, depth):
+            nonlocal nodes, leaves, cutoffs
+            nodes += 1
+            if deadline is not None and not nodes & check_mask and time.perf_counter() > deadline:
+                if stats is not None:
+                    report(0)
+                raise SearchTimeout()
             if self.terminal_test(state) or depth == 0:
-                return self.heuristic_score(state)
+                leaves += 1
+                return evaluator.score(state) if evaluator is not None else self.heuristic_score(state)
+            pv_move = None
+            if tt is not None:
+                key = state.key ^ perspective
+                entry = tt.probe(key)
+                if entry is not None:
+                    if entry.depth >= depth:
+                        if entry.flag == EXACT:
+                            return entry.score
+                        if entry.flag == LOWER and entry.score >= beta:
+                            return entry.score
+                        if entry.flag == UPPER and entry.score <= alpha:
+                            return entry.score
+                    pv_move = entry.move
+                beta_orig = beta
+            actions = self.actions(state)
+            if ordering is not None:
+                actions = ordering.order(actions, top - depth, state.to_move, pv_move)
             v = np.inf
-            for a in self.actions(state):
-                v = min(v, max_value(self.result(state, a), alpha, beta, depth - 1))
+            best_move = None
+            for i, a in enumerate(actions):
+                undo = self.make_move(state, a)
+                if evaluator is not None:
+                    evaluator.play(a)
+                child_value = max_value(state, alpha, beta, depth - 1)
+                self.unmake_move(state, undo)
+                if evaluator is not None:
+                    evaluator.undo()
+                if child_value < v:
+                    v = child_value
+                    best_move = a
                 if v <= alpha:
-                    return v
+                    cutoffs += 1
+                    if ordering is not None:
+                        ordering.record_cutoff(a, top - depth, state.to_move, depth, i)
+                    break
                 beta = min(beta, v)
+            if tt is not None:
+                flag = UPPER if v <= alpha else LOWER if v >= beta_orig else EXACT
+                tt.store(key, depth, v, flag, best_move)
             return v
 
+        actions = list(self.actions(state))
+        if ordering is not None:
+            pv_move = tt.best_move(state.key ^ perspective) if tt is not None else None
+            actions = ordering.order(actions, 0, player, pv_move)
         alpha = -np.inf
         beta = np.inf
         best_score = -np.inf
         best_action = None
-        for a in self.actions(state):
-            v = min_value(self.result(state, a), alpha, beta, depth)
+        for a in actions:
+            undo = self.make_move(state, a)
+            if evaluator is not None:
+                evaluator.play(a)
+            v = min_value(state, alpha, beta, depth)
+            self.unmake_move(state, undo)
+            if evaluator is not None:
+                evaluator.undo()
             alpha = max(alpha, v)
             if v > best_score:
                 best_score = v
                 best_action = a
 
-        return best_action
\ No newline at end of file
+        if tt is not None and best_action is not None:
+            # The root is a max node whose children were searched to `depth`
+            tt.store(state.key ^ perspective, depth + 1, best_score, EXACT, best_action)
+        if stats is not None:
+            report(1)
+        return best_action
+
+    def principal_variation_search(self, state, depth=3, tt=None, stats=None, deadline=None, ordering=None,
+                                   guess=None, aspiration=ASPIRATION_WINDOW):
+        """
+        Performs a principal variation search (PVS, also called NegaScout) to find the best action for the given
+        state. It finds the same values as `alpha_beta_cutoff_search` at the same depth, with fewer nodes when the
+        moves are well ordered.
+
+        The first child of every node is searched with the full (alpha, beta) window. The other children are only
+        tested with a null window, which answers whether the child is better than the best one so far; only a
+        child that is (fails high) is searched again with the full window to find its value.
+
+        With a `guess` of the score, e.g. the score of the previous iteration of iterative deepening, the root is
+        searched with an aspiration window of `aspiration` around it, and searched again with the failing end of
+        the window open if the score falls outside.
+
+        Args:
+            state: The current state of the game.
+            depth (optional): The maximum depth to search in the game tree. Defaults to 3.
+            tt (TranspositionTable, optional): A transposition table, as for `alpha_beta_cutoff_search`. Its
+                entries hold the same values, so a table can be shared by the two searches.
+            stats (dict, optional): If given, the counters of the search are added to its keys: those of
+                `alpha_beta_cutoff_search`, 'null_windows' (children tested with a null window), 'researches'
+                (those searched again) and 'aspiration_researches'; 'score' is set to the score of the best action.
+            deadline (float, optional): A `time.perf_counter()` value. Once it has passed, the search is
+                aborted with SearchTimeout.
+            ordering (MoveOrderer, optional): Orders the moves of every node, as for `alpha_beta_cutoff_search`.
+            guess (float, optional): The expected score of the state, the centre of the aspiration window.
+            aspiration (float, optional): The width of each half of the aspiration window.
+
+        Returns:
+            The best action to take based on the principal variation search.
+        """
+        player = self.to_move(state)
+        nodes = leaves = cutoffs = 0
+        null_windows = 0
+        researches = 0
+        check_mask = CHECK_INTERVAL - 1
+        top = depth + 1  # ply of a node = top - its remaining depth
+
+        state = self.mutable_state(state)
+        evaluator = self.incremental_evaluator(state) if self.INCREMENTAL_EVAL else None
+        if tt is not None:
+            tt.new_search()
+            if state.key is None:
+                state.key = self.zobrist_key(state.board, state.to_move)
+            perspective = PERSPECTIVE_KEYS[player]
+            tt_probes, tt_hits = tt.hits + tt.misses, tt.hits
+
+        def report(root):
+            # Adds the counters to `stats`; `root` is 1 once the root node is done
+            stats['searches'] = stats.get('searches', 0) + root
+            stats['nodes'] = stats.get('nodes', 0) + nodes + root
+            stats['leaves'] = stats.get('leaves', 0) + leaves
+            stats['cutoffs'] = stats.get('cutoffs', 0) + cutoffs
+            if tt is not None:
+                stats['tt_probes'] = stats.get('tt_probes', 0) + tt.hits + tt.misses - tt_probes
+                stats['tt_hits'] = stats.get('tt_hits', 0) + tt.hits - tt_hits
+            stats['null_windows'] = stats.get('null_windows', 0) + null_windows
+            stats['researches'] = stats.get('researches', 0) + researches
+
+        def timeout():
+            if stats is not None:
+                report(0)
+            raise SearchTimeout()
+
+        def search_child(a, alpha, beta, depth, first):
+            # Makes the move, searches the child (null window first unless `first`) and returns its negamax value
+            nonlocal null_windows, researches
+            undo = self.make_move(state, a)
+            if evaluator is not None:
+                evaluator.play(a)
+            try:
+                if first or depth == 0:
+                    # a leaf is scored exactly whatever the window, a null window would not save anything
+                    v = -negamax(-beta, -alpha, depth)
+                else:
+                    null_windows += 1
+                    v = -negamax(-math.nextafter(alpha, math.inf), -alpha, depth)
+                    if alpha < v < beta:
+                        # v is a lower bound of the value of the child (fail-soft)
+                        researches += 1
+                        v = -negamax(-beta, -v, depth)
+            finally:
+                self.unmake_move(state, undo)
+                if evaluator is not None:
+                    evaluator.undo()
+            return v
+
+        def negamax(alpha, beta, depth):
+            # The value of the state for its player to move: that of alpha_beta_cutoff_search, negated at the
+            # nodes where the opponent of `player` is to move (the min nodes)
+            nonlocal nodes, leaves, cutoffs
+            nodes += 1
+            if deadline is not None and not nodes & check_mask and time.perf_counter() > deadline:
+                timeout()
+            sign = 1 if state.to_move == player else -1
+            if self.terminal_test(state) or depth == 0:
+                leaves += 1
+                score = evaluator.score(state) if evaluator is not None else self.heuristic_score(state)
+                return sign * score
+            pv_move = None
+            if tt is not None:
+                # The table holds the values of alpha_beta_cutoff_search; at min nodes the bounds are swapped
+                key = state.key ^ perspective
+                entry = tt.probe(key)
+                if entry is not None:
+                    if entry.depth >= depth:
+                        score = sign * entry.score
+                        flag = entry.flag if sign > 0 else {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}[entry.flag]
+                        if flag == EXACT:
+                            return score
+                        if flag == LOWER and score >= beta:
+                            return score
+                        if flag == UPPER and score <= alpha:
+                            return score
+                    pv_move = entry.move
+                alpha_orig = alpha
+            actions = self.actions(state)
+            if ordering is not None:
+                actions = ordering.order(actions, top - depth, state.to_move, pv_move)
+            best = -np.inf
+            best_move = None
+            for i, a in enumerate(actions):
+                v = search_child(a, alpha, beta, depth - 1, i == 0)
+                if v > best:
+                    best = v
+                    best_move = a
+                if best > alpha:
+                    alpha = best
+                if alpha >= beta:
+                    cutoffs += 1
+                    if ordering is not None:
+                        ordering.record_cutoff(a, top - depth, state.to_move, depth, i)
+                    break
+            if tt is not None:
+                flag = LOWER if best >= beta else UPPER if best <= alpha_orig else EXACT
+                if sign < 0:
+                    flag = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}[flag]
+                tt.store(key, depth, sign * best, flag, best_move)
+            return best
+
+        def search_root(actions, alpha, beta):
+            # The best action and its score within the window (alpha, beta)
+            best_score = -np.inf
+            best_action = None
+            for i, a in enumerate(actions):
+                v = search_child(a, alpha, beta, depth, i == 0)
+                if v > best_score:
+                    best_score = v
+                    best_action = a
+                if v >= beta:
+                    break
+                alpha = max(alpha, v)
+            return best_action, best_score
+
+        actions = list(self.actions(state))
+        if ordering is not None:
+            pv_move = tt.best_move(state.key ^ perspective) if tt is not None else None
+            actions = ordering.order(actions, 0, player, pv_move)
+
+        aspiration_researches = 0
+        if guess is not None and np.isfinite(guess):
+            alpha, beta = guess - aspiration, guess + aspiration
+            best_action, best_score = search_root(actions, alpha, beta)
+            if best_score <= alpha:
+                # The score is only an upper bound: search again without the lower end of the window
+                aspiration_researches += 1
+                best_action, best_score = search_root(actions, -np.inf, beta)
+            elif best_score >= beta:
+                # The score is only a lower bound: search again without the upper end of the window
+                aspiration_researches += 1
+                best_action, best_score = search_root(actions, alpha, np.inf)
+        else:
+            best_action, best_score = search_root(actions, -np.inf, np.inf)
+
+        if tt is not None and best_action is not None:
+            tt.store(state.key ^ perspective, depth + 1, best_score, EXACT, best_action)
+        if stats is not None:
+            report(1)
+            stats['aspiration_researches'] = stats.get('aspiration_researches', 0) + aspiration_researches
+            stats['score'] = best_score
+        return best_action
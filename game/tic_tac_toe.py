@@ -14,6 +14,7 @@ class TicTacToe(Game):
         moves = [(x, y) for x in range(1, h + 1)
                  for y in range(1, v + 1)]
         self.initial = GameState(to_move='X', utility=0, board={}, moves=moves)
+        self.line_counts = {move: self.count_lines(move) for move in moves}
     
     def actions(self, state):
         """Legal moves are any square not yet taken."""
@@ -31,6 +32,29 @@ class TicTacToe(Game):
                          utility=self.compute_utility(board, move, state.to_move),
                          board=board, moves=moves)
     
+    def make_move(self, state, move):
+        """Make a move in place on a MutableGameState and return the undo token.
+        unmake_move puts the move back at the same index of the moves list, so
+        looping over actions(state) while making and unmaking moves is safe."""
+        if move not in state.moves:
+            return None
+        board = state.board
+        board[move] = state.to_move
+        index = state.moves.index(move)
+        del state.moves[index]
+        undo = (move, index, state.to_move, state.utility)
+        state.utility = self.compute_utility(board, move, state.to_move)
+        state.to_move = 'O' if state.to_move == 'X' else 'X'
+        return undo
+
+    def unmake_move(self, state, undo):
+        """Take back the move of the undo token returned by make_move."""
+        if undo is None:
+            return
+        move, index, state.to_move, state.utility = undo
+        del state.board[move]
+        state.moves.insert(index, move)
+
     def utility(self, state, player):
         """Return the value to player; 1 for win, -1 for loss, 0 otherwise."""
         return state.utility if player == 'X' else -state.utility
@@ -41,13 +65,31 @@ class TicTacToe(Game):
 
     def display(self, state):
         board = state.board
-        print("  1 2 3")
+        # column numbers of any width, right aligned over their column
+        width = len(str(self.v))
+        label = len(str(self.h))
+        print(' ' * label, ' '.join(str(y).rjust(width) for y in range(1, self.v + 1)))
         for x in range(1, self.h + 1):
-            print(x, end=' ')
+            print(str(x).rjust(label), end=' ')
             for y in range(1, self.v + 1):
-                print(board.get((x, y), '.'), end=' ')
+                print(board.get((x, y), '.').rjust(width), end=' ')
             print()
 
+    def count_lines(self, move):
+        """Return the number of k-in-a-row lines of the board that go through move."""
+        count = 0
+        for delta_x, delta_y in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            for start in range(self.k):
+                x0, y0 = move[0] - start * delta_x, move[1] - start * delta_y
+                x1, y1 = x0 + (self.k - 1) * delta_x, y0 + (self.k - 1) * delta_y
+                if all(1 <= c <= self.h for c in (x0, x1)) and all(1 <= c <= self.v for c in (y0, y1)):
+                    count += 1
+        return count
+
+    def square_weight(self, move):
+        """Static weight of a move for move ordering: the number of lines it can still help to complete."""
+        return self.line_counts[move]
+
     def compute_utility(self, board, move, player):
         """If 'X' wins with this move, return 1; if 'O' wins return -1; else return 0."""
         if (self.k_in_row(board, move, player, (0, 1)) or
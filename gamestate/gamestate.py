@@ -1,4 +1,96 @@
 from collections import namedtuple
 
 # Define a named tuple
-GameState = namedtuple('GameState', 'to_move, utility, board, moves')
+# `key` is an optional hash of the position (see search/zobrist.py), None for games that do not hash their states.
+# `mobility` optionally caches the number of moves of each player, e.g. `(moves_x, moves_o)` in Reversi.
+GameState = namedtuple('GameState', 'to_move, utility, board, moves, key, mobility', defaults=(None, None))
+
+
+def copy_board(board):
+    """Copy a board if it is mutable (a dict); immutable boards (e.g. bitboard tuples) are shared."""
+    return board.copy() if isinstance(board, dict) else board
+
+
+class MutableGameState:
+    """A game state with the same fields as GameState that Game.make_move and
+    Game.unmake_move change in place, so that a search can walk the game tree
+    on a single state instead of creating a new state for every node."""
+
+    __slots__ = ('to_move', 'utility', 'board', 'moves', 'key', 'mobility')
+
+    def __init__(self, to_move, utility, board, moves, key=None, mobility=None):
+        self.to_move = to_move
+        self.utility = utility
+        self.board = board
+        self.moves = moves
+        self.key = key
+        self.mobility = mobility
+
+    @classmethod
+    def from_state(cls, state):
+        """Return a mutable copy of a state."""
+        return cls(state.to_move, state.utility, copy_board(state.board), list(state.moves), state.key,
+                   getattr(state, 'mobility', None))
+
+    def freeze(self):
+        """Return an immutable GameState copy of this state."""
+        return GameState(to_move=self.to_move, utility=self.utility, board=copy_board(self.board),
+                         moves=list(self.moves), key=self.key, mobility=self.mobility)
+
+    def __repr__(self):
+        return 'MutableGameState(to_move={!r}, utility={!r}, board={!r}, moves={!r}, key={!r})'.format(
+            self.to_move, self.utility, self.board, self.moves, self.key)
+
+
+class ReversiState:
+    """A compact Reversi state. Besides the GameState fields it caches, when the
+    state is created, everything the game and the heuristic ask about it, so that
+    terminal_test, utility and actions are attribute lookups:
+
+    - must_pass: the player to move has no move but the opponent has.
+    - terminal: the game is over.
+    - opponent_mobility: the number of moves the opponent would have.
+    - x_discs, o_discs: the disc counts of the two players.
+
+    The board is a `(x_bits, o_bits)` bitboard and the moves are a tuple. The state is mutable only so that
+    make_move / unmake_move can walk the tree in place on a copy of it."""
+
+    __slots__ = ('to_move', 'utility', 'board', 'moves', 'key',
+                 'must_pass', 'terminal', 'opponent_mobility', 'x_discs', 'o_discs')
+
+    def __init__(self, to_move, utility, board, moves, key=None, must_pass=False, terminal=False,
+                 opponent_mobility=0, x_discs=0, o_discs=0):
+        self.to_move = to_move
+        self.utility = utility
+        self.board = board
+        self.moves = moves
+        self.key = key
+        self.must_pass = must_pass
+        self.terminal = terminal
+        self.opponent_mobility = opponent_mobility
+        self.x_discs = x_discs
+        self.o_discs = o_discs
+
+    def fields(self):
+        """Return all the field values, in the order of __slots__."""
+        return (self.to_move, self.utility, self.board, self.moves, self.key, self.must_pass, self.terminal,
+                self.opponent_mobility, self.x_discs, self.o_discs)
+
+    def set_fields(self, fields):
+        """Set all the field values from a tuple returned by fields()."""
+        (self.to_move, self.utility, self.board, self.moves, self.key, self.must_pass, self.terminal,
+         self.opponent_mobility, self.x_discs, self.o_discs) = fields
+
+    def copy(self):
+        """Return a copy of this state. The board and the moves are immutable tuples and are shared."""
+        return ReversiState(*self.fields())
+
+    def __getstate__(self):
+        return self.fields()
+
+    def __setstate__(self, fields):
+        self.set_fields(fields)
+
+    def __repr__(self):
+        return 'ReversiState(to_move={!r}, utility={!r}, board={!r}, moves={!r}, key={!r})'.format(
+            self.to_move, self.utility, self.board, self.moves, self.key)
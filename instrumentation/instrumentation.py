@@ -0,0 +1,265 @@
+"""
+## instrumentation.py
+
+This module collects what the players do inside their searches: the counters of the searches, the time of every
+move and, when profiling, how that time splits between move generation, evaluation and the search itself.
+
+The searches already count their work in the `stats` dict they accept ('nodes', 'leaves', 'cutoffs', 'tt_probes',
+'tt_hits', MCTS 'iterations', 'rollouts', 'rollout_moves', ...) with plain local counters, reported once per
+search, so a search without `stats` pays only a few integer increments. An Instrumentation gives each move of a
+player a fresh `stats` dict and adds it to its totals. With profiling on, the move generation and evaluation methods of the game
+(PHASES) are timed too, by wrappers set on the game object for the duration of the move; a call inside another
+timed call is counted once, in the outer phase, and the rest of the move is the 'search' phase. The wrappers cost
+a few clock reads per call, so a profiled search is slower than a plain one.
+
+The no-op mode, NullInstrumentation, leaves the players as they are: `instrument` returns the player itself.
+
+Classes:
+- Instrumentation: The counters, phase times and per-move trace records of one or more players.
+- NullInstrumentation: An Instrumentation that records nothing.
+
+Functions:
+- instrument(player, instrumentation, name=None): A player that reports its moves to an Instrumentation.
+- merge_summaries(summaries): The summary of several summaries, e.g. of all the games of a tournament.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import contextlib
+import inspect
+import json
+import time
+
+# The game methods timed by each phase when profiling
+PHASES = {
+    'move_generation': ('actions', 'result', 'make_move', 'unmake_move'),
+    'evaluation': ('heuristic_score', 'heuristic_score_batch', 'calcMobility', 'combine_terms', 'evaluate',
+                   'utility'),
+}
+
+# Numbers the searches put in `stats` that are values, not counters: kept in the trace records, not summed
+VALUES = ('score',)
+
+
+def _add(totals, counters, values=False):
+    # Adds the numeric counters to the totals; other values (e.g. root visit lists) are left out, and so are
+    # the VALUES unless `values`
+    for key, value in counters.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and (values or key not in VALUES):
+            totals[key] = totals.get(key, 0) + value
+
+
+def _derived(summary):
+    # The rates computed from the totals of a summary
+    counters = summary['counters']
+    phases = summary['phases']
+    moves = summary['moves']
+    nodes = counters.get('nodes', 0)
+    interior = nodes - counters.get('leaves', 0)
+    wall = phases.get('move', {}).get('wall', 0.0)
+    rates = {
+        'nodes_per_move': nodes / moves if moves else 0.0,
+        'nodes_per_second': nodes / wall if wall else 0.0,
+        # every node but the roots was reached from an interior node
+        'branching_factor': (nodes - counters.get('searches', 0)) / interior if interior > 0 else 0.0,
+        'cutoff_rate': counters.get('cutoffs', 0) / interior if interior > 0 else 0.0,
+        'tt_hit_rate': counters['tt_hits'] / counters['tt_probes'] if counters.get('tt_probes') else 0.0,
+        'iterations_per_move': counters.get('iterations', 0) / moves if moves else 0.0,
+        'mean_rollout_length': (counters['rollout_moves'] / counters['rollouts']
+                                if counters.get('rollouts') and 'rollout_moves' in counters else 0.0),
+        'seconds_per_move': wall / moves if moves else 0.0,
+    }
+    if 'move_generation' in phases or 'evaluation' in phases:
+        summary['phases']['search'] = {
+            clock: phases['move'][clock] - sum(phases.get(name, {}).get(clock, 0.0) for name in PHASES)
+            for clock in ('wall', 'cpu')
+        }
+    summary['rates'] = rates
+    return summary
+
+
+class Instrumentation:
+    """
+    Collects the counters and times of the moves of the players given to `instrument`.
+
+    Attributes:
+        - trace (bool): Whether a record is kept for every move.
+        - profile (bool): Whether the move generation and evaluation methods of the game are timed.
+        - moves (int): The number of moves recorded.
+        - counters (dict): The totals of the search counters over the moves.
+        - phases (dict): The 'wall' and 'cpu' seconds of every phase: 'move' (whole moves) and, when profiling,
+          the phases of PHASES.
+        - records (list): The trace records, one dict per move (see `move`).
+    """
+
+    enabled = True
+
+    def __init__(self, trace=False, profile=False):
+        self.trace = trace
+        self.profile = profile
+        self.moves = 0
+        self.counters = {}
+        self.phases = {}
+        self.records = []
+
+    def add_time(self, phase, wall, cpu):
+        """Adds wall clock and CPU seconds to a phase."""
+        times = self.phases.setdefault(phase, {'wall': 0.0, 'cpu': 0.0})
+        times['wall'] += wall
+        times['cpu'] += cpu
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """A context manager that adds the time of its block to the phase `name`."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    @contextlib.contextmanager
+    def profiling(self, game):
+        """A context manager that times the PHASES methods of `game` while its block runs."""
+        active = [False]
+        shadowed = {}
+
+        def timed(method, phase):
+            def wrapper(*args, **kwargs):
+                if active[0]:
+                    return method(*args, **kwargs)
+                active[0] = True
+                wall, cpu = time.perf_counter(), time.process_time()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.add_time(phase, time.perf_counter() - wall, time.process_time() - cpu)
+                    active[0] = False
+            return wrapper
+
+        for phase, names in PHASES.items():
+            for name in names:
+                method = getattr(game, name, None)
+                if method is None:
+                    continue
+                shadowed[name] = game.__dict__.get(name)
+                setattr(game, name, timed(method, phase))
+        try:
+            yield
+        finally:
+            for name, previous in shadowed.items():
+                if previous is None:
+                    delattr(game, name)
+                else:
+                    setattr(game, name, previous)
+
+    @contextlib.contextmanager
+    def move(self, game, state, player=None):
+        """
+        A context manager for one move of a player. It yields the `stats` dict to give to the search, and at the
+        end adds its counters and the time of the move to the totals. With `trace`, a record is kept with the
+        'player', the 'ply' (the number of moves recorded before), the 'to_move' player, the 'wall' and 'cpu'
+        seconds, the 'counters' of the move and, when profiling, its 'phases'.
+        """
+        stats = {}
+        phases = {name: dict(times) for name, times in self.phases.items()} if self.trace else None
+        profiling = self.profiling(game) if self.profile else contextlib.nullcontext()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            with profiling:
+                yield stats
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self.add_time('move', wall, cpu)
+            _add(self.counters, stats)
+            if self.trace:
+                record = {'player': player, 'ply': self.moves, 'to_move': game.to_move(state), 'wall': wall,
+                          'cpu': cpu, 'counters': {}}
+                _add(record['counters'], stats, values=True)
+                if self.profile:
+                    record['phases'] = {
+                        name: {clock: times[clock] - phases.get(name, {}).get(clock, 0.0) for clock in times}
+                        for name, times in self.phases.items() if name != 'move'}
+                self.records.append(record)
+            self.moves += 1
+
+    def summary(self):
+        """
+        Returns the totals as a dict of plain values: the 'moves', the 'counters', the 'phases' (with a 'search'
+        phase, the move time outside the profiled methods, when profiling) and the 'rates' derived from them.
+        """
+        return _derived({
+            'moves': self.moves,
+            'counters': dict(self.counters),
+            'phases': {name: dict(times) for name, times in self.phases.items()},
+        })
+
+    def write_jsonl(self, file):
+        """Writes the trace records to `file` (a path or a text file), one JSON object per line."""
+        if isinstance(file, str):
+            with open(file, 'a') as f:
+                return self.write_jsonl(f)
+        for record in self.records:
+            file.write(json.dumps(record) + '\n')
+
+
+class NullInstrumentation(Instrumentation):
+    """An Instrumentation that records nothing; `instrument` returns the players unchanged."""
+
+    enabled = False
+
+    def add_time(self, phase, wall, cpu):
+        pass
+
+    def phase(self, name):
+        return contextlib.nullcontext()
+
+    def profiling(self, game):
+        return contextlib.nullcontext()
+
+    def move(self, game, state, player=None):
+        return contextlib.nullcontext()
+
+
+def _accepts_stats(player):
+    # Whether the player (a function, a partial or a callable object) takes a `stats` keyword argument
+    try:
+        parameters = inspect.signature(player).parameters
+    except (TypeError, ValueError):
+        return False
+    return 'stats' in parameters or any(p.kind == p.VAR_KEYWORD for p in parameters.values())
+
+
+def instrument(player, instrumentation, name=None):
+    """
+    Returns a player that plays the moves of `player` and reports them to `instrumentation`. Players that take
+    a `stats` argument get the `stats` dict of every move; the others are only timed.
+
+    With a NullInstrumentation, the player itself is returned.
+    """
+    if not instrumentation.enabled:
+        return player
+    takes_stats = _accepts_stats(player)
+
+    def instrumented(game, state):
+        with instrumentation.move(game, state, name) as stats:
+            if takes_stats:
+                return player(game, state, stats=stats)
+            return player(game, state)
+    # the pondering players are told of the moves through their `observe` method
+    observe = getattr(player, 'observe', None)
+    if observe is not None:
+        instrumented.observe = observe
+    return instrumented
+
+
+def merge_summaries(summaries):
+    """Returns the summary of the moves of several summaries (see `Instrumentation.summary`)."""
+    merged = {'moves': 0, 'counters': {}, 'phases': {}}
+    for summary in summaries:
+        merged['moves'] += summary['moves']
+        _add(merged['counters'], summary['counters'])
+        for name, times in summary['phases'].items():
+            if name != 'search':
+                _add(merged['phases'].setdefault(name, {}), times)
+    return _derived(merged)
@@ -8,8 +8,13 @@ then printed out.
 The module imports the necessary classes and functions from the gamestate, game, and players modules.
 
 Functions:
+- play_series(game_name, player_x, player_o, games=100, minutes=False, records=None): Plays the games of a
+  matchup in parallel with the tournament runner and prints out the results.
 - main(): The main function of the module. It handles the game choice, plays the games, and prints out the results.
 
+If RECORDS_FILE is set to a path, e.g. 'games.rec', every game played is appended to that game record file (see
+records/game_records.py), e.g. to replay it later with `python -m records.game_records games.rec --replay 0`.
+
 This module is part of a first semester project in Artificial Intelligence at University of Peloponnese, 
 Department of Informatics and Telecommunications.
 
@@ -19,10 +24,44 @@ Authors:
 """
 from gamestate.gamestate import GameState
 from game.game import Game
-from game.tic_tac_toe import TicTacToe
 from game.reversi import Reversi
-from players.players import manual_player, minmax_player, random_player, alpha_beta_player, mcts_player, alpha_beta_cutoff_player
-import time
+from players.players import manual_player, minmax_player
+from benchmark.perft import make_game
+from records.game_records import GameRecordWriter
+from tournament.tournament import run_tournament
+
+# The game record file the games played are appended to, None to keep no record
+RECORDS_FILE = None
+
+def play_series(game_name, player_x, player_o, games=100, minutes=False, records=None):
+    """
+    Plays `games` games between two players of the tournament registry on all the CPUs, with `player_x` always
+    playing 'X', prints every result as it arrives, and then the rates of X wins, O wins and ties. The games
+    are appended to the game record file `records`, if given. The final board of every game is
+    displayed with its result, as `Game.play_game` does.
+    """
+    game = make_game(game_name)
+
+    def show(record):
+        game.display(record['state'])
+        if record['utility'] == 1:
+            print("'X' won!")
+        elif record['utility'] == -1:
+            print("'O' won!")
+        else:
+            print('Tie!')
+
+    matchup = {'game': game_name, 'a': player_x, 'b': player_o, 'games': games}
+    report = run_tournament([matchup], on_result=show, alternate=False, records=records,
+                            final_states=True)
+    summary = report['matchups'][0]
+    print("X wins: ", summary['win_rate'] * 100, "%")
+    print("O wins: ", summary['loss_rate'] * 100, "%")
+    print("Ties: ", summary['tie_rate'] * 100, "%")
+    if minutes:
+        print(f"Time elapsed:  {report['seconds'] / 60:.2f} minutes\n")
+    else:
+        print(f"Time elapsed:  {report['seconds']:.2f} seconds\n")
 
 def main():
     x_wins = 0
@@ -42,154 +81,39 @@ def main():
             o_wins = 0
             ties = 0
             if game_choice == '1':
-                game = TicTacToe()
                 print("Ερώτημα 2.1 MiniMax vs Random player \n")
-                x_wins = 0
-                o_wins = 0
-                ties = 0
-                start_time = time.time()
                 # minmax player VS random player
-                for i in range(100):
-                    
-                    utility = game.play_game(minmax_player, random_player)
-
-                    if utility == 1:
-                        print("'X' won!")
-                        x_wins += 1
-                    elif utility == -1:
-                        print("'O' won!")
-                        o_wins += 1
-                    else:
-                        print('Tie!')
-                        ties += 1
-                end_time = time.time()
-                total_time = (end_time - start_time)
-                
-                print("X wins: ", x_wins/100 * 100, "%")
-                print("O wins: ", o_wins / 100 * 100, "%")
-                print("Ties: ", ties / 100 * 100, "%")
-                print(f"Time elapsed:  {total_time:.2f} seconds\n")
+                play_series('tictactoe', 'minmax', 'random', records=RECORDS_FILE)
 
                 next_quest = input("\nΠατήστε οτιδήποτε για να συνεχίσετε στην επόμενη ερώτηση >> ")
 
 
                 print("=============================================================================================")
                 print("\nΕρώτημα 2.2 α-β player VS Random player")
-                x_wins = 0
-                o_wins = 0
-                ties = 0
 
                 # alpha beta player VS random player
-                start_time = time.time()
-                for i in range(100):
-                    
-                    utility = game.play_game(alpha_beta_player, random_player)
-                    
-                    if utility == 1:
-                        print("'X' won!")
-                        x_wins += 1
-                    elif utility == -1:
-                        print("'O' won!")
-                        o_wins += 1
-                    else:
-                        print('Tie!')
-                        ties += 1
-                end_time = time.time()
-                total_time = (end_time - start_time)
-                    
-                print("X wins: ", x_wins/100 * 100, "%")
-                print("O wins: ", o_wins / 100 * 100, "%")
-                print("Ties: ", ties / 100 * 100, "%")
-                print(f"Time elapsed:  {total_time:.2f} seconds\n")
+                play_series('tictactoe', 'alpha_beta', 'random', records=RECORDS_FILE)
 
 
                 next_quest = input("\nΠατήστε οτιδήποτε για να συνεχίσετε στην επόμενη ερώτηση >> ")
 
                 print("=============================================================================================")
                 print("\nΕρώτημα 2.3 Monte Carlo player VS Random player")
-                x_wins = 0
-                o_wins = 0
-                ties = 0
-                
-                # Monte Carlo tree search  player VS random player
-                start_time = time.time()
-                for i in range(100):
-                    
-                    utility = game.play_game(mcts_player, random_player)
 
-                    if utility == 1:
-                        print("'X' won!")
-                        x_wins += 1
-                    elif utility == -1:
-                        print("'O' won!")
-                        o_wins += 1
-                    else:
-                        print('Tie!')
-                        ties += 1
-                end_time = time.time()
-                total_time = (end_time - start_time)
-                
-                print("X wins: ", x_wins/100 * 100, "%")
-                print("O wins: ", o_wins / 100 * 100, "%")
-                print("Ties: ", ties / 100 * 100, "%")
-                
-                print(f"Time elapsed:  {total_time:.2f} seconds\n")
+                # Monte Carlo tree search  player VS random player
+                play_series('tictactoe', 'mcts', 'random', records=RECORDS_FILE)
 
                 # break
         
             elif game_choice == '2':
 
-                game = Reversi()
                 print("Ερώτημα 3.2 Τυχαίος παίκτης εναντίον Τυχαίου παίκτη\n")
-                start_time = time.time()
-                for i in range(100):
-
-                    utility = game.play_game(random_player, random_player)
-
-                    if utility == 1:
-                        print("'X' won!")
-                        x_wins += 1
-                    elif utility == -1:
-                        print("'O' won!")
-                        o_wins += 1
-                    else:
-                        print('Tie!')
-                        ties += 1
-
-                end_time = time.time()
-                total_time = (end_time - start_time)
-                print("X wins: ", x_wins / 100 * 100, "%")
-                print("O wins: ", o_wins / 100 * 100, "%")
-                print("Ties: ", ties / 100 * 100, "%")
-                print(f"Time elapsed:  {total_time:.2f} seconds\n")
+                play_series('reversi', 'random', 'random', records=RECORDS_FILE)
                 next_quest = input("\nΠατήστε οτιδήποτε για να συνεχίσετε στην επόμενη ερώτηση >> ")
 
                 print("=============================================================================================")
-                print("\nΕρώτημα 3.4 Πριόνισμα α-β με περιορισμό βάθους VS Random player\nΠαίρνει αρκετά λεπτά για να ολοκληρωθεί, περίπου 20 λεπτά\n")
-                x_wins = 0
-                o_wins = 0
-                ties = 0
-                start_time = time.time()
-                for i in range(100):
-
-                    utility = game.play_game(alpha_beta_cutoff_player, random_player)
-
-                    if utility == 1:
-                        print("'X' won!")
-                        x_wins += 1
-                    elif utility == -1:
-                        print("'O' won!")
-                        o_wins += 1
-                    else:
-                        print('Tie!')
-                        ties += 1
-
-                end_time = time.time()
-                total_time = (end_time - start_time) / 60
-                print("X wins: ", x_wins/100 * 100, "%")
-                print("O wins: ", o_wins / 100 * 100, "%")
-                print("Ties: ", ties / 100 * 100, "%")
-                print(f"Time elapsed:  {total_time:.2f} minutes\n")
+                print("\nΕρώτημα 3.4 Πριόνισμα α-β με περιορισμό βάθους VS Random player\nΠαίρνει αρκετά λεπτά για να ολοκληρωθεί, περίπου 20 λεπτά σε έναν πυρήνα\n")
+                play_series('reversi', 'alpha_beta_cutoff', 'random', minutes=True, records=RECORDS_FILE)
                 
 
                 # break
@@ -199,7 +123,11 @@ def main():
                 x_wins = 0
                 o_wins = 0
                 ties = 0
-                utility = game.play_game(manual_player, minmax_player)
+                if RECORDS_FILE is not None:
+                    with GameRecordWriter(RECORDS_FILE) as recorder:
+                        utility = game.play_game(manual_player, minmax_player, recorder=recorder)
+                else:
+                    utility = game.play_game(manual_player, minmax_player)
                 if utility == 1:
                         print("'X' won!")
                         x_wins += 1
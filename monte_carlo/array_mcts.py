@@ -0,0 +1,230 @@
+"""
+## array_mcts.py
+
+This module contains an array-backed implementation of Monte Carlo Tree Search. Instead of one MCTNode object
+per node, the tree is a set of parallel NumPy arrays indexed by node number (parent, visits, value, first child,
+number of children), and the children of a node occupy a contiguous block of node numbers. Selection, expansion
+and backpropagation are loops instead of recursion, and the UCB values of all the children of a node are
+computed with a single vectorized operation.
+
+The algorithm is the same as `monte_carlo_tree_search`: same UCB formula, same tie breaking (the first child
+with the highest value) and same rollouts, so with the same random seed both build the same tree.
+
+The tree has a fixed capacity. When an expansion does not fit, the tree is compacted: the child blocks of the
+least visited nodes are released (those nodes become leaves again, keeping their statistics) and their slots
+are recycled.
+
+Classes:
+- ArrayTree: The tree store and the MCTS steps on it.
+
+Functions:
+- array_monte_carlo_tree_search(state, game, iterations=1000, capacity=1 << 20): Finds the best move.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import numpy as np
+
+from monte_carlo.monte_carlo_tree_search import simulate
+
+
+class ArrayTree:
+    """
+    A Monte Carlo search tree stored in parallel arrays. Node 0 is the root.
+
+    Attributes:
+        - capacity (int): The maximum number of nodes.
+        - size (int): The number of nodes in use.
+        - parent (np.ndarray): The parent of every node, -1 for the root.
+        - visits (np.ndarray): The N value of every node.
+        - value (np.ndarray): The U value of every node.
+        - first_child (np.ndarray): The first node of the children block, -1 if the node is not expanded.
+        - num_children (np.ndarray): The size of the children block.
+        - actions (list): The action leading to every node from its parent.
+        - states (list): The state of every node.
+        - recycled (int): The number of node slots released by compactions.
+    """
+
+    def __init__(self, state, capacity=1 << 20, C=1.4):
+        if capacity < 2:
+            raise ValueError('capacity must be at least 2')
+        self.capacity = capacity
+        self.C = C
+        self._allocate()
+        self.states[0] = state
+        self.size = 1
+        self.recycled = 0
+
+    def _allocate(self):
+        # (Re)creates empty node arrays of the tree's capacity
+        capacity = self.capacity
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.visits = np.zeros(capacity, dtype=np.float64)
+        self.value = np.zeros(capacity, dtype=np.float64)
+        self.first_child = np.full(capacity, -1, dtype=np.int32)
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+        self.actions = [None] * capacity
+        self.states = [None] * capacity
+
+    def select(self):
+        """
+        Walks down from the root, taking the child with the highest UCB value, until an unexpanded node.
+
+        `UCB = U / N + C * sqrt(log(parent.N) / N)`, and infinite for unvisited children.
+        """
+        node = 0
+        first_child = self.first_child
+        while first_child[node] >= 0:
+            start = first_child[node]
+            end = start + self.num_children[node]
+            n = self.visits[start:end]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ucb = self.value[start:end] / n + self.C * np.sqrt(np.log(self.visits[node]) / n)
+            ucb[n == 0] = np.inf
+            node = start + int(np.argmax(ucb))
+        return node
+
+    def expand(self, node, game):
+        """
+        Creates the children of a leaf for all the actions of its state, and returns the first child
+        (the one selection would pick next, as all of them are unvisited). Returns the node itself if its state
+        is terminal. If the tree is full, it is compacted first; if it is still full, the node is not expanded.
+        """
+        state = self.states[node]
+        if game.terminal_test(state):
+            return node
+        actions = game.actions(state)
+        count = len(actions)
+        if self.size + count > self.capacity:
+            node = self.compact(node, count)
+            if self.size + count > self.capacity:
+                return node
+        start = self.size
+        self.parent[start:start + count] = node
+        self.visits[start:start + count] = 0
+        self.value[start:start + count] = 0
+        self.first_child[start:start + count] = -1
+        self.num_children[start:start + count] = 0
+        for i, action in enumerate(actions):
+            self.actions[start + i] = action
+            self.states[start + i] = game.result(state, action)
+        self.first_child[node] = start
+        self.num_children[node] = count
+        self.size += count
+        return start
+
+    def backpropagate(self, node, utility):
+        """Adds a rollout result to the node and its ancestors, flipping its sign at every level."""
+        parent = self.parent
+        while node >= 0:
+            if utility > 0:
+                self.value[node] += utility
+            self.visits[node] += 1
+            utility = -utility
+            node = parent[node]
+
+    def compact(self, protect, needed):
+        """
+        Releases the children blocks of the least visited nodes, so that at least `needed` slots are free,
+        and renumbers the remaining nodes.
+
+        Blocks are kept in order of decreasing visits of their parent node. A node has more visits than any of
+        its children, so a kept block always belongs to a node that is itself kept. The path to `protect` is
+        always kept.
+
+        Returns:
+            The new number of the node `protect`.
+        """
+        path = set()
+        node = protect
+        while node >= 0:
+            path.add(node)
+            node = self.parent[node]
+
+        expanded = np.flatnonzero(self.first_child[:self.size] >= 0)
+        budget = min(self.capacity // 2, self.capacity - needed) - 1
+        for node in path:
+            if self.first_child[node] >= 0:
+                budget -= self.num_children[node]
+        keep = set(node for node in path if self.first_child[node] >= 0)
+        for node in expanded[np.argsort(-self.visits[expanded], kind='stable')]:
+            node = int(node)
+            if node in keep:
+                continue
+            if self.num_children[node] > budget:
+                break
+            keep.add(node)
+            budget -= self.num_children[node]
+
+        # Copy the kept blocks breadth first into fresh arrays
+        old_size = self.size
+        old_visits, old_value, old_first, old_count = self.visits, self.value, self.first_child, self.num_children
+        old_actions, old_states = self.actions, self.states
+        self._allocate()
+        self.visits[0] = old_visits[0]
+        self.value[0] = old_value[0]
+        self.states[0] = old_states[0]
+        mapping = {0: 0}
+        queue = [0]
+        size = 1
+        for old_node in queue:
+            new_node = mapping[old_node]
+            if old_node not in keep:
+                continue
+            start = old_first[old_node]
+            count = old_count[old_node]
+            self.first_child[new_node] = size
+            self.num_children[new_node] = count
+            self.parent[size:size + count] = new_node
+            self.visits[size:size + count] = old_visits[start:start + count]
+            self.value[size:size + count] = old_value[start:start + count]
+            for i in range(count):
+                self.actions[size + i] = old_actions[start + i]
+                self.states[size + i] = old_states[start + i]
+                mapping[start + i] = size + i
+                queue.append(start + i)
+            size += count
+        self.recycled += old_size - size
+        self.size = size
+        return mapping[protect]
+
+    def best_action(self):
+        """Returns the action of the most visited child of the root (the first one on a tie)."""
+        start = self.first_child[0]
+        end = start + self.num_children[0]
+        return self.actions[start + int(np.argmax(self.visits[start:end]))]
+
+    def root_visits(self):
+        """Returns the {action: visits} of the children of the root."""
+        start = self.first_child[0]
+        if start < 0:
+            return {}
+        return {self.actions[i]: int(self.visits[i]) for i in range(start, start + self.num_children[0])}
+
+
+def array_monte_carlo_tree_search(state, game, iterations=1000, capacity=1 << 20, C=1.4, tree=None):
+    """
+    Performs Monte Carlo Tree Search on an ArrayTree to find the best move in a game.
+
+    Args:
+        - state: The current state of the game.
+        - game: The game object that provides the necessary methods for game simulation.
+        - iterations: The number of iterations to perform during the search (default=1000).
+        - capacity: The maximum number of nodes of the tree (default=1 << 20).
+        - C: The exploration constant of UCB (default=1.4).
+        - tree (ArrayTree, optional): A tree to search in, instead of a new one.
+
+    Returns:
+        The best move found by the Monte Carlo Tree Search algorithm.
+    """
+    if tree is None:
+        tree = ArrayTree(state, capacity, C)
+
+    for _ in range(iterations):
+        leaf = tree.select()
+        child = tree.expand(leaf, game)
+        result = simulate(game, tree.states[child])
+        tree.backpropagate(child, result)
+
+    return tree.best_action()
@@ -0,0 +1,184 @@
+"""
+## batch_rollout.py
+
+This module contains a vectorized rollout engine for Reversi. Instead of playing one random game at a time through
+`Reversi.result`, it plays thousands of independent random games in lockstep: every board is a pair of 64-bit
+bitboards (the side to move and its opponent) stored in NumPy `uint64` arrays, and every step computes the legal
+move masks, picks a random legal move, and flips the discs of all the boards with a few array operations.
+
+The engine follows the rules of the Reversi class: a player with no legal move passes, and the game ends when
+neither player can move, with the utility decided by the disc count. The results use the convention of
+`simulate`: the negated utility of the final state for the player to move at the start, i.e. the result for the
+player who moved into the starting state.
+
+Functions:
+- batch_simulate(states, rng=None): Plays one random game from each state and returns the results.
+- batch_rollouts(state, count, rng=None): Plays `count` random games from the same state.
+- reversi_rollout(game, state, count): A `rollout` function for `build_tree` that uses batch_rollouts.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import numpy as np
+
+from game.bitboard_reversi import board_to_bitboard, DIRECTIONS
+
+_ONE = np.uint64(1)
+_NOT_Y0 = np.uint64(0xFEFEFEFEFEFEFEFE)
+_NOT_Y7 = np.uint64(0x7F7F7F7F7F7F7F7F)
+_SQUARE_SHIFTS = np.arange(64, dtype=np.uint64)
+
+_default_rng = np.random.default_rng()
+
+
+def _shift(bits, dx, dy):
+    # Vectorized version of bitboard_reversi.shift; bits shifted past bit 63 are dropped by the uint64 type.
+    step = dx * 8 + dy
+    if step > 0:
+        bits = bits << np.uint64(step)
+    else:
+        bits = bits >> np.uint64(-step)
+    if dy == 1:
+        return bits & _NOT_Y0
+    if dy == -1:
+        return bits & _NOT_Y7
+    return bits
+
+
+def move_masks(own, opp):
+    """Returns the legal move bitboards of the side owning `own`, for every board."""
+    empty = ~(own | opp)
+    moves = np.zeros_like(own)
+    for dx, dy in DIRECTIONS:
+        run = _shift(own, dx, dy) & opp
+        for _ in range(5):
+            run |= _shift(run, dx, dy) & opp
+        moves |= _shift(run, dx, dy) & empty
+    return moves
+
+
+def flip_masks(own, opp, bits):
+    """Returns the bitboards of the discs flipped by placing the discs `bits` (one per board)."""
+    flips = np.zeros_like(own)
+    for dx, dy in DIRECTIONS:
+        run = _shift(bits, dx, dy) & opp
+        for _ in range(5):
+            run |= _shift(run, dx, dy) & opp
+        closed = (_shift(run, dx, dy) & own) != 0
+        flips |= np.where(closed, run, np.uint64(0))
+    return flips
+
+
+def popcount(bits):
+    """Returns the number of set bits of every bitboard."""
+    return ((bits[:, None] >> _SQUARE_SHIFTS) & _ONE).sum(axis=1).astype(np.int64)
+
+
+def random_moves(moves, rng):
+    """Picks one set bit of every (non-zero) move mask uniformly at random, and returns it as a bitboard."""
+    legal = ((moves[:, None] >> _SQUARE_SHIFTS) & _ONE).astype(bool)
+    scores = rng.random(legal.shape)
+    scores[~legal] = -1.0
+    return _ONE << np.argmax(scores, axis=1).astype(np.uint64)
+
+
+def play_out(own, opp, x_to_move, choose):
+    """
+    Plays the boards until every game is over.
+
+    Args:
+        own, opp (np.ndarray): The uint64 bitboards of the player to move and of its opponent.
+        x_to_move (np.ndarray): Whether 'X' is the player to move, for every board.
+        choose (callable): Returns the bitboard of the move to play, given the move masks of the boards.
+
+    Returns:
+        np.ndarray: The final utility for 'X' of every game (1, 0 or -1).
+    """
+    own = own.copy()
+    opp = opp.copy()
+    x_to_move = x_to_move.copy()
+    utility = np.zeros(own.size, dtype=np.int8)
+    active = np.arange(own.size)
+
+    while active.size:
+        moves = move_masks(own, opp)
+        stuck = moves == 0
+        if stuck.any():
+            # a stuck player passes if the opponent can move, otherwise the game is over
+            over = np.zeros_like(stuck)
+            over[stuck] = move_masks(opp[stuck], own[stuck]) == 0
+            if over.any():
+                own_count = popcount(own[over])
+                opp_count = popcount(opp[over])
+                own_utility = np.sign(own_count - opp_count)
+                utility[active[over]] = np.where(x_to_move[over], own_utility, -own_utility)
+                live = ~over
+                active, own, opp, x_to_move, moves, stuck = (active[live], own[live], opp[live], x_to_move[live],
+                                                             moves[live], stuck[live])
+            playing = ~stuck
+            bits = np.zeros_like(own)
+            bits[playing] = choose(moves[playing])
+            flips = flip_masks(own, opp, bits)
+        else:
+            bits = choose(moves)
+            flips = flip_masks(own, opp, bits)
+        own |= bits | flips
+        opp &= ~flips
+        # the opponent is now to move (a pass only hands over the turn)
+        own, opp = opp, own
+        x_to_move = ~x_to_move
+    return utility
+
+
+def _bitboards(states):
+    # The (own, opp, x_to_move) arrays of a list of Reversi, BitboardReversi or CompactReversi states
+    own = np.empty(len(states), dtype=np.uint64)
+    opp = np.empty(len(states), dtype=np.uint64)
+    x_to_move = np.empty(len(states), dtype=bool)
+    for i, state in enumerate(states):
+        board = state.board
+        x_bits, o_bits = board_to_bitboard(board) if isinstance(board, dict) else board
+        x_to_move[i] = state.to_move == 'X'
+        own[i], opp[i] = (x_bits, o_bits) if x_to_move[i] else (o_bits, x_bits)
+    return own, opp, x_to_move
+
+
+def batch_simulate(states, rng=None):
+    """
+    Plays one random game from each of the given Reversi (or BitboardReversi) states.
+
+    Args:
+        states: The states to play from.
+        rng (np.random.Generator, optional): The random generator of the moves.
+
+    Returns:
+        np.ndarray: The result of every game, as `simulate` returns it: the negated utility of the final
+        state for the player to move in the starting state.
+    """
+    rng = rng if rng is not None else _default_rng
+    own, opp, x_to_move = _bitboards(states)
+    final = play_out(own, opp, x_to_move, lambda moves: random_moves(moves, rng))
+    return np.where(x_to_move, -final, final)
+
+
+def batch_rollouts(state, count, rng=None):
+    """
+    Plays `count` random games from the same Reversi (or BitboardReversi) state.
+
+    Returns:
+        np.ndarray: The `count` results, as `simulate` returns them.
+    """
+    rng = rng if rng is not None else _default_rng
+    own, opp, x_to_move = _bitboards([state])
+    own, opp, x_to_move = np.repeat(own, count), np.repeat(opp, count), np.repeat(x_to_move, count)
+    final = play_out(own, opp, x_to_move, lambda moves: random_moves(moves, rng))
+    return np.where(x_to_move, -final, final)
+
+
+def reversi_rollout(game, state, count):
+    """
+    A `rollout` function for `build_tree` / `monte_carlo_tree_search`: `count` random games from the state,
+    played together with batch_rollouts.
+    """
+    return batch_rollouts(state, count).tolist()
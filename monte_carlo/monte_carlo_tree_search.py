@@ -12,9 +12,13 @@ Functions:
 - ucb(n, C=1.4): Calculates the Upper Confidence Bound (UCB) for a node.
 - select(node): Selects the child node with the highest UCB value recursively until a leaf node is reached.
 - expand(node, game): Expands the given node by creating child nodes for all possible actions in the game.
-- simulate(game, state): Simulates a game from the given state until a terminal state is reached.
+- simulate(game, state, stats=None): Simulates a game from the given state until a terminal state is reached.
 - backpropagate(node, utility): Backpropagates the utility value from a leaf node up to the root node.
-- monte_carlo_tree_search(state, game, iterations=1000): Performs the MCTS algorithm to find the best move in a game.
+- same_position(a, b): Checks whether two states are the same position.
+- find_subtree(root, state, max_depth=2): Finds the node of a state in the top levels of a search tree.
+- release_tree(root, keep=None): Unlinks the nodes of a tree, except a subtree that is kept.
+- build_tree(state, game, iterations=1000, root=None, playouts=1, rollout=None, stats=None): Runs the MCTS iterations and returns the root of the search tree.
+- monte_carlo_tree_search(state, game, iterations=1000, playouts=1, rollout=None, stats=None): Performs the MCTS algorithm to find the best move in a game.
 
 Authors: 
 - Giannopoulos Georgios
@@ -122,7 +126,7 @@ def expand(node, game):
 
     return select(node)
 
-def simulate(game, state):
+def simulate(game, state, stats=None):
     """
     Simulates a game from the given state until a terminal state is reached.
     Returns the utility value of the terminal state for the player.
@@ -130,12 +134,14 @@ def simulate(game, state):
     Parameters:
     - game: The game object representing the rules of the game.
     - state: The current state of the game.
+    - stats: An optional dict whose 'rollouts' and 'rollout_moves' (the length of the random game) are increased.
 
     Returns:
     - The utility value of the terminal state for the player.
     """
 
     player = game.to_move(state)
+    plies = 0
 
     # loop until the game reaches a terminal state
     while not game.terminal_test(state):
@@ -143,6 +149,10 @@ def simulate(game, state):
         action = random.choice(list(game.actions(state)))
         # Get the new state after taking the action
         state = game.result(state, action)
+        plies += 1
+    if stats is not None:
+        stats['rollouts'] = stats.get('rollouts', 0) + 1
+        stats['rollout_moves'] = stats.get('rollout_moves', 0) + plies
     return -game.utility(state, player)
 
 def backpropagate(node, utility):
@@ -164,35 +174,123 @@ def backpropagate(node, utility):
         # backpropagate the utility to the parent node
         backpropagate(node.parent, -utility)
 
-def monte_carlo_tree_search(state, game, iterations=1000):
+def same_position(a, b):
     """
-    Performs Monte Carlo Tree Search algorithm to find the best move in a game.
+    Returns True if two states are the same position (same player to move and same board).
+    """
+    if a.key is not None and b.key is not None and a.key != b.key:
+        return False
+    return a.to_move == b.to_move and a.board == b.board
+
+def find_subtree(root, state, max_depth=2):
+    """
+    Finds the node of the given state in the top levels of a search tree.
+
+    Args:
+        - root (MCTNode): The root of the tree.
+        - state: The state to look for.
+        - max_depth: The deepest level searched; 2 covers our move followed by the opponent's reply.
+
+    Returns:
+        - The MCTNode of the state, or None if it is not in the tree.
+    """
+    level = [root]
+    for _ in range(max_depth + 1):
+        for node in level:
+            if same_position(node.state, state):
+                return node
+        level = [child for node in level for child in node.children]
+    return None
+
+def release_tree(root, keep=None):
+    """
+    Unlinks every node of a tree, except the subtree under `keep`, so that the nodes are freed right away
+    instead of waiting for the garbage collector to break the parent/children reference cycles.
+
+    Args:
+        - root (MCTNode): The root of the tree to release.
+        - keep (MCTNode, optional): A node whose subtree is kept. It becomes a root (its parent is cleared).
+    """
+    if keep is not None:
+        keep.parent = None
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is keep:
+            continue
+        stack.extend(node.children)
+        node.children = {}
+        node.parent = None
+
+def build_tree(state, game, iterations=1000, root=None, playouts=1, rollout=None, stats=None, stop=None):
+    """
+    Runs the Monte Carlo Tree Search iterations from the given state and returns the root of the search tree.
 
     Args:
         - state: The current state of the game.
         - game: The game object that provides the necessary methods for game simulation.
         - iterations: The number of iterations to perform during the search (default=1000).
+        - root (MCTNode, optional): An existing tree of the state to continue searching, e.g. the subtree kept
+          from the previous move.
+        - playouts: The number of random games played from every selected leaf (default=1).
+        - rollout (optional): A function `rollout(game, state, count)` returning the results of `count` random
+          games from the state, e.g. `batch_rollout.reversi_rollout`. Defaults to calling `simulate`.
+        - stats (dict, optional): Receives the counts of 'iterations' and 'rollouts', and the 'rollout_moves'
+          played by `simulate` (not counted for a custom `rollout`).
+        - stop (threading.Event, optional): Checked before every iteration; once it is set, the search returns
+          without running the remaining iterations, e.g. when a pondering search is stopped.
 
     Returns:
-        The best move found by the Monte Carlo Tree Search algorithm.
+        The root MCTNode; its children hold the visit counts of the moves.
     """
 
-    root = MCTNode(state=state)
+    if root is None:
+        root = MCTNode(state=state)
 
+    done = 0
     for _ in range(iterations):
+        if stop is not None and stop.is_set():
+            break
         # select a leaf node
         leaf = select(root)
         # expand the leaf node
         child = expand(leaf, game)
         # simulate the game from the child node
-        result = simulate(game, child.state)
+        if rollout is None and playouts == 1:
+            results = [simulate(game, child.state, stats)]
+        elif rollout is None:
+            results = [simulate(game, child.state, stats) for _ in range(playouts)]
+        else:
+            results = rollout(game, child.state, playouts)
+            if stats is not None:
+                stats['rollouts'] = stats.get('rollouts', 0) + len(results)
         # Backpropagate the result of the simulation up the tree to update the total utility and visit count of each node
-        backpropagate(child, result)
+        for result in results:
+            backpropagate(child, result)
+        done += 1
 
-    # return the child node with the highest number of visits
-    max_state = max(root.children, key=lambda p: p.N)
-    return root.children.get(max_state)
+    if stats is not None:
+        stats['iterations'] = stats.get('iterations', 0) + done
+    return root
+
+def monte_carlo_tree_search(state, game, iterations=1000, playouts=1, rollout=None, stats=None):
+    """
+    Performs Monte Carlo Tree Search algorithm to find the best move in a game.
 
+    Args:
+        - state: The current state of the game.
+        - game: The game object that provides the necessary methods for game simulation.
+        - iterations: The number of iterations to perform during the search (default=1000).
+        - playouts: The number of random games played from every selected leaf (default=1).
+        - rollout (optional): A function `rollout(game, state, count)` that plays the random games, see build_tree.
+        - stats (dict, optional): Receives the counters of build_tree.
 
+    Returns:
+        The best move found by the Monte Carlo Tree Search algorithm.
+    """
 
+    root = build_tree(state, game, iterations, playouts=playouts, rollout=rollout, stats=stats)
 
+    # return the child node with the highest number of visits
+    max_state = max(root.children, key=lambda p: p.N)
+    return root.children.get(max_state)
@@ -0,0 +1,188 @@
+"""
+## parallel_mcts.py
+
+This module contains two ways of running Monte Carlo Tree Search on several processes:
+
+- Root parallelism: independent search trees are grown in worker processes, each with its own random seed,
+  and the visit counts of their root moves are added up. The most visited move overall is played.
+- Leaf parallelism: a single tree is kept in the main process. Every step selects several leaves, applying a
+  virtual loss along the selected paths so that the next selections spread over different leaves, and runs a
+  batch of rollouts from each of them in the worker processes at once.
+
+Given a seed the results are reproducible: the seeds of the trees / rollouts are drawn in the main process, and
+the results are combined in a fixed order. They do not depend on the number of workers either, as long as the
+number of trees (root) or of leaves selected per step (leaf) is fixed; both default to the number of workers.
+
+Functions:
+- root_parallel_mcts(state, game, iterations, ...): Root parallel search, returns the best move.
+- leaf_parallel_mcts(state, game, iterations, ...): Leaf parallel search, returns the best move.
+- parallel_monte_carlo_tree_search(state, game, iterations, mode, ...): Runs either of the two.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import contextlib
+import multiprocessing
+import os
+import random
+import time
+
+from monte_carlo.monte_carlo_tree_search import MCTNode, build_tree, select, expand, simulate, backpropagate
+
+
+@contextlib.contextmanager
+def worker_pool(workers=None, pool=None):
+    """Yields `pool` if one is given, else a new pool of `workers` processes that is closed afterwards."""
+    if pool is not None:
+        yield pool
+        return
+    with multiprocessing.Pool(workers or os.cpu_count()) as new_pool:
+        yield new_pool
+
+
+def _grow_tree(args):
+    # Worker: grows one tree and returns the (action, visits) pairs of its root, in the order of the actions.
+    game, state, iterations, seed = args
+    random.seed(seed)
+    root = build_tree(state, game, iterations)
+    return [(action, child.N) for child, action in root.children.items()]
+
+
+def _rollout(args):
+    # Worker: plays one random game from the state and returns its result, as `simulate` does.
+    game, state, seed = args
+    random.seed(seed)
+    return simulate(game, state)
+
+
+def _most_visited(visits):
+    # The action with the most visits; on a tie, the first one in the order of the actions.
+    best_action = None
+    best_visits = -1
+    for action, n in visits.items():
+        if n > best_visits:
+            best_action = action
+            best_visits = n
+    return best_action
+
+
+def root_parallel_mcts(state, game, iterations=1000, trees=None, workers=None, seed=None, pool=None, stats=None):
+    """
+    Root parallel Monte Carlo Tree Search.
+
+    Args:
+        - state: The current state of the game.
+        - game: The game object. It is sent to the worker processes, so it must be picklable.
+        - iterations: The number of iterations of every tree (default=1000).
+        - trees: The number of independent trees (default: the number of workers).
+        - workers: The number of worker processes (default: the number of CPUs).
+        - seed: The seed the seeds of the trees are drawn from. None for an unseeded search.
+        - pool: An existing multiprocessing pool to use instead of creating one.
+        - stats (dict, optional): Receives the number of 'playouts', the elapsed 'seconds' and the merged
+          root 'visits' of every move.
+
+    Returns:
+        The move with the most visits over all the trees.
+    """
+    workers = workers or os.cpu_count()
+    trees = trees or workers
+    rng = random.Random(seed)
+    tasks = [(game, state, iterations, rng.getrandbits(32)) for _ in range(trees)]
+
+    start = time.perf_counter()
+    with worker_pool(workers, pool) as p:
+        results = p.map(_grow_tree, tasks)
+
+    visits = {}
+    for tree in results:
+        for action, n in tree:
+            visits[action] = visits.get(action, 0) + n
+
+    if stats is not None:
+        stats['playouts'] = trees * iterations
+        stats['seconds'] = time.perf_counter() - start
+        stats['visits'] = visits
+    return _most_visited(visits)
+
+
+def leaf_parallel_mcts(state, game, iterations=1000, batch=4, leaves=None, workers=None, virtual_loss=1, seed=None,
+                       pool=None, stats=None):
+    """
+    Leaf parallel Monte Carlo Tree Search.
+
+    Every step selects `leaves` leaves. After a leaf is selected, `virtual_loss` extra visits are added to
+    every node on its path, which lowers their UCB value until the real results arrive. `batch` rollouts are then
+    run from each selected leaf in the worker processes, the virtual loss is removed, and every rollout result is
+    backpropagated.
+
+    Args:
+        - state: The current state of the game.
+        - game: The game object. It is sent to the worker processes, so it must be picklable.
+        - iterations: The total number of rollouts (default=1000).
+        - batch: The number of rollouts per selected leaf (default=4).
+        - leaves: The number of leaves selected per step (default: the number of workers).
+        - workers: The number of worker processes (default: the number of CPUs).
+        - virtual_loss: The number of visits temporarily added along a selected path (default=1).
+        - seed: The seed the rollout seeds are drawn from. None for an unseeded search.
+        - pool: An existing multiprocessing pool to use instead of creating one.
+        - stats (dict, optional): Receives the number of 'playouts', the elapsed 'seconds' and the root 'visits'.
+
+    Returns:
+        The move with the most visits.
+    """
+    workers = workers or os.cpu_count()
+    leaves = leaves or workers
+    rng = random.Random(seed)
+    root = MCTNode(state=state)
+    playouts = 0
+
+    start = time.perf_counter()
+    with worker_pool(workers, pool) as p:
+        while playouts < iterations:
+            selected = []
+            for _ in range(min(leaves, -(-(iterations - playouts) // batch))):
+                child = expand(select(root), game)
+                node = child
+                while node is not None:
+                    node.N += virtual_loss
+                    node = node.parent
+                selected.append(child)
+
+            tasks = [(game, child.state, rng.getrandbits(32)) for child in selected for _ in range(batch)]
+            results = p.map(_rollout, tasks)
+
+            for i, child in enumerate(selected):
+                node = child
+                while node is not None:
+                    node.N -= virtual_loss
+                    node = node.parent
+                for result in results[i * batch:(i + 1) * batch]:
+                    backpropagate(child, result)
+            playouts += len(tasks)
+
+    visits = {action: child.N for child, action in root.children.items()}
+    if stats is not None:
+        stats['playouts'] = playouts
+        stats['seconds'] = time.perf_counter() - start
+        stats['visits'] = visits
+    return _most_visited(visits)
+
+
+def parallel_monte_carlo_tree_search(state, game, iterations=1000, mode='root', workers=None, seed=None, pool=None,
+                                     stats=None, **kwargs):
+    """
+    Runs root parallel (mode='root') or leaf parallel (mode='leaf') Monte Carlo Tree Search.
+
+    The other keyword arguments are passed to `root_parallel_mcts` or `leaf_parallel_mcts`.
+
+    Returns:
+        The best move found.
+    """
+    if mode == 'root':
+        return root_parallel_mcts(state, game, iterations, workers=workers, seed=seed, pool=pool, stats=stats,
+                                  **kwargs)
+    if mode == 'leaf':
+        return leaf_parallel_mcts(state, game, iterations, workers=workers, seed=seed, pool=pool, stats=stats,
+                                  **kwargs)
+    raise ValueError('unknown parallel MCTS mode: {}'.format(mode))
@@ -9,8 +9,13 @@ Functions:
 - random_player(game, state): A player that randomly selects their move.
 - alpha_beta_player(game, state): A player that uses the Alpha-Beta pruning algorithm to decide their move.
 - mcts_player(game, state): A player that uses the Monte Carlo Tree Search algorithm to decide their move.
+- MCTSPlayer: A Monte Carlo Tree Search player that keeps its search tree from one move to the next.
+- parallel_mcts_player(game, state): A player that runs Monte Carlo Tree Search on several processes.
+- alpha_beta_cutoff_player(game, state): A player that uses depth-limited Alpha-Beta search with an evaluation function.
+- timed_alpha_beta_player(game, state): A player that deepens the Alpha-Beta cutoff search until a time budget runs out.
 
 Each player function takes a game object and a state object as parameters and returns a move.
+MCTSPlayer instances are called the same way.
 
 Authors: 
 - Giannopoulos Georgios
@@ -23,7 +28,12 @@ from gamestate.gamestate import GameState
 from game.game import Game
 from game.tic_tac_toe import TicTacToe
 from game.reversi import Reversi
-from monte_carlo.monte_carlo_tree_search import monte_carlo_tree_search
+from monte_carlo.monte_carlo_tree_search import monte_carlo_tree_search, build_tree, find_subtree, release_tree
+from monte_carlo.parallel_mcts import parallel_monte_carlo_tree_search
+from search.iterative_deepening import iterative_deepening_search
+from search.solution_table import table_for
+from search.endgame import solver_for
+from search.opening_book import book_for
 
 def manual_player(game, state):
     """A manual player."""
@@ -31,6 +41,9 @@ def manual_player(game, state):
     actions = game.actions(state)
     while True:
         action = input("Enter your move (e.g., 2,3): ")
+        if action.strip() in actions:
+            # a move that is not a square, e.g. the Reversi pass
+            return action.strip()
         try:
             action = action.split(',')
             action = [int(v) for v in action]
@@ -42,29 +55,67 @@ def manual_player(game, state):
         except:
             print('invalid action!!')
 
-def minmax_player(game, state):
+def minmax_player(game, state, table=True, stats=None):
     """Given a state in a game, calculate the best move by searching
-    forward all the way to the terminal states. [Figure 5.3]"""
+    forward all the way to the terminal states. [Figure 5.3]
+    The tree is walked in place with make_move / unmake_move.
+
+    On TicTacToe the move is looked up in the solution table of the process
+    instead (see search/solution_table.py); pass a SolutionTable as `table` to
+    use another one, or table=False to always search.
+
+    If `stats` (a dict) is given, the 'searches', 'nodes' and 'leaves' of the
+    search are added to it."""
+
+    if table is True:
+        table = table_for(game)
+    if table:
+        return table.best_move(game, state)
 
     player = game.to_move(state)
+    state = game.mutable_state(state)
+    nodes = leaves = 0
 
     def max_value(state):
+        nonlocal nodes, leaves
+        nodes += 1
         if game.terminal_test(state):
+            leaves += 1
             return game.utility(state, player)
         v = -np.inf
         for a in game.actions(state):
-            v = max(v, min_value(game.result(state, a)))
+            undo = game.make_move(state, a)
+            v = max(v, min_value(state))
+            game.unmake_move(state, undo)
         return v
 
     def min_value(state):
+        nonlocal nodes, leaves
+        nodes += 1
         if game.terminal_test(state):
+            leaves += 1
             return game.utility(state, player)
         v = np.inf
         for a in game.actions(state):
-            v = min(v, max_value(game.result(state, a)))
+            undo = game.make_move(state, a)
+            v = min(v, max_value(state))
+            game.unmake_move(state, undo)
         return v
 
-    return max(game.actions(state), key=lambda a: min_value(game.result(state, a)))
+    best_score = -np.inf
+    best_action = None
+    for a in list(game.actions(state)):
+        undo = game.make_move(state, a)
+        v = min_value(state)
+        game.unmake_move(state, undo)
+        if best_action is None or v > best_score:
+            best_score = v
+            best_action = a
+    if stats is not None:
+        stats['searches'] = stats.get('searches', 0) + 1
+        stats['nodes'] = stats.get('nodes', 0) + nodes + 1
+        stats['leaves'] = stats.get('leaves', 0) + leaves
+    return best_action
 
 def random_player(game, state):
     """
@@ -87,7 +138,7 @@ def random_player(game, state):
     # print(f"Debug: random_move = {game.actions(state)[random_move]}\nprobability: {[1/num_legal_moves for _ in range(num_legal_moves)]}")
     return game.actions(state)[random_move]
 
-def alpha_beta_player(game, state):
+def alpha_beta_player(game, state, ordering=None, stats=None, table=True):
     """
     Given a state in a game, calculate the best move by searching
     forward all the way to the terminal states using alpha-beta pruning.
@@ -95,63 +146,226 @@ def alpha_beta_player(game, state):
     Args:
         game: The game object representing the game being played.
         state: The current state of the game.
+        ordering (MoveOrderer, optional): Orders the moves of every node, so that more of the tree is pruned.
+            The best move found for a position is its PV move when another move order reaches it again.
+        stats (dict, optional): If given, the 'searches', 'nodes', 'leaves' and 'cutoffs' of the search are
+            added to it.
+        table (SolutionTable, optional): The solution table to answer from. By default (True) the table of
+            the process is used on TicTacToe; table=False always searches.
     
     Returns:
         The best move for the given state.
     """
 
+    if table is True:
+        table = table_for(game)
+    if table:
+        return table.best_move(game, state)
+
     player = game.to_move(state)
+    state = game.mutable_state(state)
+    nodes = leaves = cutoffs = 0
+    # The best move found for every position searched, first in the order when a transposition reaches it again
+    best_moves = {}
+
+    def position(state):
+        if state.key is not None:
+            return state.key
+        board = state.board
+        return state.to_move, frozenset(board.items()) if isinstance(board, dict) else board
 
-    def max_value(state, alpha, beta):
+    # The value functions return the value of the node and the height of its searched subtree, which is its
+    # remaining depth: the history bonus of a cutoff grows with it
+    def max_value(state, alpha, beta, ply):
+        nonlocal nodes, leaves, cutoffs
+        nodes += 1
         if game.terminal_test(state):
-            return game.utility(state, player)
+            leaves += 1
+            return game.utility(state, player), 0
+        actions = game.actions(state)
+        if ordering is not None:
+            key = position(state)
+            actions = ordering.order(actions, ply, game.to_move(state), best_moves.get(key))
         v = -np.inf
-        for a in game.actions(state):
-            v = max(v, min_value(game.result(state, a), alpha, beta))
+        height = 0
+        best = None
+        for i, a in enumerate(actions):
+            undo = game.make_move(state, a)
+            child, child_height = min_value(state, alpha, beta, ply + 1)
+            game.unmake_move(state, undo)
+            height = max(height, child_height + 1)
+            if child > v:
+                v, best = child, a
             if v >= beta:
-                return v
+                cutoffs += 1
+                if ordering is not None:
+                    ordering.record_cutoff(a, ply, game.to_move(state), height, i)
+                    best_moves[key] = a
+                return v, height
             alpha = max(alpha, v)
-        return v
+        if ordering is not None:
+            best_moves[key] = best
+        return v, height
 
-    def min_value(state, alpha, beta):
+    def min_value(state, alpha, beta, ply):
+        nonlocal nodes, leaves, cutoffs
+        nodes += 1
         if game.terminal_test(state):
-            return game.utility(state, player)
+            leaves += 1
+            return game.utility(state, player), 0
+        actions = game.actions(state)
+        if ordering is not None:
+            key = position(state)
+            actions = ordering.order(actions, ply, game.to_move(state), best_moves.get(key))
         v = np.inf
-        for a in game.actions(state):
-            v = min(v, max_value(game.result(state, a), alpha, beta))
+        height = 0
+        best = None
+        for i, a in enumerate(actions):
+            undo = game.make_move(state, a)
+            child, child_height = max_value(state, alpha, beta, ply + 1)
+            game.unmake_move(state, undo)
+            height = max(height, child_height + 1)
+            if child < v:
+                v, best = child, a
             if v <= alpha:
-                return v
+                cutoffs += 1
+                if ordering is not None:
+                    ordering.record_cutoff(a, ply, game.to_move(state), height, i)
+                    best_moves[key] = a
+                return v, height
             beta = min(beta, v)
-        return v
+        if ordering is not None:
+            best_moves[key] = best
+        return v, height
 
+    actions = list(game.actions(state))
+    if ordering is not None:
+        ordering.new_search()
+        actions = ordering.order(actions, 0, player)
     alpha = -np.inf
     beta = np.inf
     best_score = -np.inf
     best_action = None
-    for a in game.actions(state):
-        v = min_value(game.result(state, a), alpha, beta)
+    for a in actions:
+        undo = game.make_move(state, a)
+        v, _ = min_value(state, alpha, beta, 1)
+        game.unmake_move(state, undo)
         alpha = max(alpha, v)
         if v > best_score:
             best_score = v
             best_action = a
-    
+
+    if stats is not None:
+        stats['searches'] = stats.get('searches', 0) + 1
+        stats['nodes'] = stats.get('nodes', 0) + nodes + 1
+        stats['leaves'] = stats.get('leaves', 0) + leaves
+        stats['cutoffs'] = stats.get('cutoffs', 0) + cutoffs
     return best_action  
 
-def mcts_player(game, state):
+def mcts_player(game, state, table=True, book=True, stats=None):
     """
     A player that uses Monte Carlo Tree Search (MCTS) algorithm to make decisions.
 
     Parameters:
     - game: The game object representing the game being played.
     - state: The current state of the game.
+    - table: On TicTacToe the solution table of the process is used as an oracle instead of searching
+      (default=True). A SolutionTable can be given instead, or False to always search.
+    - book: On Reversi, the move of the opening book loaded in the process (see search/opening_book.py) is
+      played if the position is in it (default=True). An OpeningBook can be given instead, or False to always
+      search.
+    - stats: An optional dict that receives the MCTS 'iterations', 'rollouts' and 'rollout_moves'.
 
     Returns:
     - The best move determined by the MCTS algorithm.
 
     """
-    return monte_carlo_tree_search(state, game)
+    if table is True:
+        table = table_for(game)
+    if table:
+        return table.best_move(game, state)
+    if book is True:
+        book = book_for(game)
+    if book:
+        move = book.move(game, state)
+        if move is not None:
+            return move
+    return monte_carlo_tree_search(state, game, stats=stats)
+
+class MCTSPlayer:
+    """
+    A Monte Carlo Tree Search player that keeps its search tree between calls.
+
+    After it plays a move and the opponent replies, the node of the new position is two levels under the
+    previous root. That subtree becomes the new root, with all the visits it already has, and the rest of
+    the old tree is released. Every move then runs `iterations` more iterations on top of the reused ones.
+
+    Use a separate instance for every game (or call `reset`) and for every side.
 
-def alpha_beta_cutoff_player(game, state, depth=3):
+    Attributes:
+        - iterations (int): The iterations run per move.
+        - root (MCTNode): The tree of the last searched position.
+        - reused_visits (list): The visits carried over to the new root at every move (0 when nothing was reused).
+    """
+
+    def __init__(self, iterations=1000):
+        self.iterations = iterations
+        self.root = None
+        self.reset()
+
+    def reset(self):
+        """Forgets the tree, e.g. before a new game."""
+        if self.root is not None:
+            release_tree(self.root)
+        self.root = None
+        self.game = None
+        self.reused_visits = []
+
+    def __call__(self, game, state, stats=None):
+        root = None
+        if self.root is not None and self.game is game:
+            root = find_subtree(self.root, state)
+            release_tree(self.root, keep=root)
+        elif self.root is not None:
+            release_tree(self.root)
+        self.reused_visits.append(root.N if root is not None else 0)
+
+        self.game = game
+        self.root = build_tree(state, game, self.iterations_to_run(root), root, stats=stats)
+        if stats is not None:
+            stats['reused_visits'] = stats.get('reused_visits', 0) + self.reused_visits[-1]
+
+        # return the move of the child node with the highest number of visits
+        max_state = max(self.root.children, key=lambda p: p.N)
+        return self.root.children.get(max_state)
+
+    def iterations_to_run(self, root):
+        """The number of iterations to run on the (possibly reused) root of a move: `iterations`."""
+        return self.iterations
+
+def parallel_mcts_player(game, state, mode='root', iterations=1000, workers=None, seed=None, pool=None, stats=None):
+    """
+    A player that uses Monte Carlo Tree Search on several worker processes.
+
+    Parameters:
+    - game: The game object representing the game being played.
+    - state: The current state of the game.
+    - mode: 'root' to grow independent trees and merge their root visit counts, or 'leaf' to run batches of
+      rollouts from the leaves of a single tree (default='root').
+    - iterations: The iterations per tree ('root') or the total rollouts ('leaf') (default=1000).
+    - workers: The number of worker processes (default: the number of CPUs).
+    - seed: A seed that makes the move reproducible, whatever the number of workers.
+    - pool: An existing multiprocessing pool, to avoid starting new processes on every move.
+    - stats: An optional dict that receives the 'playouts', the elapsed 'seconds' and the root 'visits'.
+
+    Returns:
+    - The best move determined by the parallel MCTS.
+    """
+    return parallel_monte_carlo_tree_search(state, game, iterations, mode, workers=workers, seed=seed, pool=pool,
+                                            stats=stats)
+
+def alpha_beta_cutoff_player(game, state, depth=3, tt=None, ordering=None, endgame=True, book=True,
+                             search='alpha_beta', stats=None, weights=None):
     """
     This function represents an alpha-beta cutoff player that uses the alpha-beta cutoff search algorithm and 
     an evaluation function to make decisions in a game.
@@ -160,8 +374,66 @@ def alpha_beta_cutoff_player(game, state, depth=3):
     - game: The game object representing the game being played.
     - state: The current state of the game.
     - depth: The maximum depth to search in the game tree (default=3).
+    - tt: An optional TranspositionTable kept between moves, e.g.
+      `functools.partial(alpha_beta_cutoff_player, tt=TranspositionTable())`.
+    - ordering: An optional MoveOrderer, e.g. `MoveOrderer.for_game(game)`, kept between moves like `tt`.
+    - endgame: On Reversi, positions with few empty squares are solved exactly by the endgame solver of the
+      process instead (see search/endgame.py); pass an EndgameSolver to use another one (e.g. with another
+      threshold), or endgame=False to always use the heuristic search.
+    - book: The opening book, as for `mcts_player`.
+    - search: 'alpha_beta' (default) or 'pvs' for the principal variation search of Reversi, which finds the
+      same moves with fewer nodes when it has a `tt` and an `ordering`.
+    - stats: An optional dict that receives the counters of the search, or the 'book_moves' and the
+      'endgame_solves' and 'endgame_nodes' when the move comes from the book or the endgame solver.
+    - weights: On Reversi, the weights of the heuristic terms to search with instead of HEURISTIC_WEIGHTS (see
+      `Reversi.with_weights`), e.g. the weights written by training/tune_weights.py.
 
     Returns:
     - The best move determined by the alpha-beta cutoff search algorithm and the .
     """
-    return game.alpha_beta_cutoff_search(state, depth)
\ No newline at end of file
+    if book is True:
+        book = book_for(game)
+    if book:
+        move = book.move(game, state)
+        if move is not None:
+            if stats is not None:
+                stats['book_moves'] = stats.get('book_moves', 0) + 1
+            return move
+    if endgame is True:
+        endgame = solver_for(game)
+    if endgame and endgame.applies(state):
+        nodes = endgame.nodes
+        move = endgame.best_move(state)
+        if stats is not None:
+            stats['endgame_solves'] = stats.get('endgame_solves', 0) + 1
+            stats['endgame_nodes'] = stats.get('endgame_nodes', 0) + endgame.nodes - nodes
+        return move
+    if weights is not None:
+        game = game.with_weights(weights)
+    if ordering is not None:
+        ordering.new_search()
+    if search == 'pvs':
+        return game.principal_variation_search(state, depth, tt=tt, stats=stats, ordering=ordering)
+    return game.alpha_beta_cutoff_search(state, depth, tt=tt, stats=stats, ordering=ordering)
+
+def timed_alpha_beta_player(game, state, time_limit=1.0, tt=None, stats=None, ordering=None, search='alpha_beta'):
+    """
+    An alpha-beta cutoff player with a wall-clock budget per move instead of a fixed depth. The search is deepened
+    two plies at a time over the odd depths (iterative deepening) and the move of the deepest completed
+    iteration is played.
+
+    Parameters:
+    - game: The game object representing the game being played.
+    - state: The current state of the game.
+    - time_limit: The budget per move in seconds (default=1.0).
+    - tt: An optional TranspositionTable shared by the iterations, and between moves if the caller keeps it.
+    - stats: An optional dict that receives the reached 'depth', the searched 'nodes' and the elapsed 'seconds'.
+    - ordering: An optional MoveOrderer. With a `tt` too, each iteration searches the best moves of the
+      previous one first.
+    - search: 'alpha_beta' (default) or 'pvs', the principal variation search with aspiration windows.
+      With 'pvs', `stats` also receives the null window and re-search counts.
+
+    Returns:
+    - The best move of the deepest search completed within the budget.
+    """
+    return iterative_deepening_search(game, state, time_limit, tt=tt, stats=stats, ordering=ordering, search=search)
@@ -0,0 +1,236 @@
+"""
+## pondering.py
+
+This module contains players that keep searching while the opponent is on the clock (pondering). After the
+player moves, a background thread searches the position the opponent has to reply to; when the reply comes, the
+thread is stopped and the player adopts what it found for that reply, so its own move takes less time. The work
+spent on the replies that were not played is dropped.
+
+The players learn about the moves through `Game.play_game`, which calls their `observe(game, move, state)` method
+after every move. Pondering pays off when the opponent does not use the CPU while thinking, e.g. a human at
+`manual_player`: the search thread runs in the same process, so against another AI of the same process it only
+takes turns with it.
+
+Classes:
+- PonderDeadline: A search deadline that passes as soon as pondering is stopped.
+- Ponderer: The background thread of a pondering player, started after its move and stopped at the reply.
+- PonderingMCTSPlayer: An MCTSPlayer that grows the subtree of the opponent's position on the opponent's time.
+- PonderingCutoffPlayer: An alpha-beta cutoff player that searches the likely replies in advance.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import threading
+import time
+
+from gamestate.gamestate import copy_board
+from monte_carlo.monte_carlo_tree_search import build_tree, find_subtree
+from players.players import MCTSPlayer, alpha_beta_cutoff_player
+from search.endgame import solver_for
+from search.iterative_deepening import SearchTimeout
+from search.opening_book import book_for
+from search.transposition_table import TranspositionTable
+from search.zobrist import PERSPECTIVE_KEYS
+
+
+class PonderDeadline:
+    """
+    A value for the `deadline` argument of the searches that has passed once `stop` is set.
+
+    The searches check `time.perf_counter() > deadline`; the comparison is answered by `__lt__`, so a pondering
+    search raises SearchTimeout at its next clock check after the reply comes in.
+    """
+
+    def __init__(self, stop):
+        self.stop = stop
+
+    def __lt__(self, now):
+        return self.stop.is_set()
+
+    def __gt__(self, now):
+        return not self.stop.is_set()
+
+
+class Ponderer:
+    """
+    The pondering part of a player: a background thread started by `observe` after the player's own move and
+    stopped when the opponent replies (or at the start of the player's next call).
+
+    Subclasses implement `ponder(game, state, stop)`, which searches `state` (the opponent to move) until the
+    `stop` event is set, and must call `stop_pondering` before they touch what the thread works on.
+
+    Attributes:
+        - pondering (bool): False (the `ponder` argument) disables pondering, e.g. to measure the player without it.
+        - side: The player the instance plays for, set at its first move.
+        - move_seconds (list): The time taken by every move of the player.
+        - ponder_seconds (list): The time spent pondering before every reply of the opponent.
+    """
+
+    def __init__(self, ponder=True):
+        self.pondering = ponder
+        self.side = None
+        self._thread = None
+        self._stop = None
+        self.move_seconds = []
+        self.ponder_seconds = []
+
+    def observe(self, game, move, state):
+        """Starts pondering after the player's move and stops it at the opponent's reply or at the end."""
+        if self.side is None:
+            return
+        if game.terminal_test(state) or game.to_move(state) == self.side:
+            self.stop_pondering()
+        elif self.pondering:
+            self.start_pondering(game, state)
+
+    def start_pondering(self, game, state):
+        """Starts the thread that ponders on `state`."""
+        self.stop_pondering()
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self.ponder, args=(game, state, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop_pondering(self):
+        """Stops the pondering thread, if any, and waits for it."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.ponder_seconds.append(time.perf_counter() - self._started)
+
+    def ponder(self, game, state, stop):
+        raise NotImplementedError
+
+
+class PonderingMCTSPlayer(MCTSPlayer, Ponderer):
+    """
+    An MCTSPlayer that keeps growing its tree on the opponent's time.
+
+    After its move, the node of the position the opponent has to reply to is searched until the reply, which
+    stops the search before its next iteration. Selection spends the iterations on the replies that look best for the opponent,
+    and the subtree of the actual reply is reused as the root of the next move, as in MCTSPlayer.
+
+    Unlike MCTSPlayer, `iterations` is the number of visits the root must have before the move is played, not
+    the number run per move: the visits the reply already got while pondering are iterations the move no longer
+    has to run. Without pondering the two are the same except for the reused visits.
+    """
+
+    # The iterations of one pondering search; it is normally stopped by the reply long before
+    PONDER_ITERATIONS = 1 << 30
+
+    def __init__(self, iterations=1000, ponder=True):
+        Ponderer.__init__(self, ponder)
+        MCTSPlayer.__init__(self, iterations)
+
+    def reset(self):
+        """Stops pondering and forgets the tree, e.g. before a new game."""
+        if getattr(self, '_thread', None) is not None:
+            self.stop_pondering()
+        MCTSPlayer.reset(self)
+
+    def __call__(self, game, state, stats=None):
+        self.stop_pondering()
+        self.side = game.to_move(state)
+        start = time.perf_counter()
+        move = MCTSPlayer.__call__(self, game, state, stats)
+        self.move_seconds.append(time.perf_counter() - start)
+        return move
+
+    def iterations_to_run(self, root):
+        """The iterations still needed for the root to reach `iterations` visits (at least one)."""
+        return max(1, self.iterations - (root.N if root is not None else 0))
+
+    def ponder(self, game, state, stop):
+        node = find_subtree(self.root, state, max_depth=1) if self.root is not None else None
+        if node is None:
+            return
+        build_tree(state, game, self.PONDER_ITERATIONS, node, stop=stop)
+
+
+class PonderingCutoffPlayer(Ponderer):
+    """
+    An alpha-beta cutoff player that searches the opponent's likely replies on the opponent's time.
+
+    The replies are tried in order of likelihood: first the best reply found by the player's own search (the
+    best move the transposition table holds for the opponent's position), then the others by `square_weight`.
+    For each of the first `replies`, the position after it is searched as on the player's next move, and the
+    move found is remembered. When the actual reply is one of them (a ponder hit), that move is played at once;
+    otherwise the search runs as usual, on a transposition table warmed by the pondering.
+
+    Positions of the opening book and of the endgame solver are not pondered on; they are looked up or solved
+    on the move, by `alpha_beta_cutoff_player`.
+
+    Attributes:
+        - depth (int): The search depth.
+        - replies (int): The number of replies pondered on.
+        - tt (TranspositionTable): The table kept between moves and shared with the pondering thread.
+        - ordering (MoveOrderer): An optional move orderer, as for `alpha_beta_cutoff_player`.
+        - search (str): 'alpha_beta' or 'pvs'.
+        - hits (int): The moves answered from pondering.
+    """
+
+    def __init__(self, depth=3, replies=3, tt=None, ordering=None, search='alpha_beta', ponder=True):
+        super().__init__(ponder)
+        self.depth = depth
+        self.replies = replies
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.ordering = ordering
+        self.search = search
+        self.hits = 0
+        self._moves = {}
+
+    def __call__(self, game, state, stats=None):
+        self.stop_pondering()
+        self.side = game.to_move(state)
+        start = time.perf_counter()
+        move = self._moves.get(state.key) if state.key is not None else None
+        if move is not None:
+            self.hits += 1
+            if stats is not None:
+                stats['ponder_hits'] = stats.get('ponder_hits', 0) + 1
+        else:
+            move = alpha_beta_cutoff_player(game, state, self.depth, tt=self.tt, ordering=self.ordering,
+                                            search=self.search, stats=stats)
+        self._moves.clear()
+        self.move_seconds.append(time.perf_counter() - start)
+        return move
+
+    def likely_replies(self, game, state):
+        """Returns the replies of the opponent in `state`, the likeliest first."""
+        replies = list(game.actions(state))
+        weight = getattr(game, 'square_weight', None)
+        if weight is not None:
+            replies.sort(key=lambda a: weight(a) if isinstance(a, tuple) else 0, reverse=True)
+        if state.key is not None:
+            best = self.tt.best_move(state.key ^ PERSPECTIVE_KEYS[self.side])
+            if best in replies:
+                replies.remove(best)
+                replies.insert(0, best)
+        return replies[:self.replies]
+
+    def ponder(self, game, state, stop):
+        # The replies are played on a copy of the board: the Reversi move generation writes into the board it
+        # checks and restores it, which the player's own thread must not see
+        state = state._replace(board=copy_board(state.board))
+        deadline = PonderDeadline(stop)
+        book = book_for(game)
+        endgame = solver_for(game)
+        for reply in self.likely_replies(game, state):
+            child = game.result(state, reply)
+            if stop.is_set():
+                return
+            if game.terminal_test(child) or child.key is None:
+                continue
+            if (book and book.move(game, child) is not None) or (endgame and endgame.applies(child)):
+                continue
+            if self.ordering is not None:
+                self.ordering.new_search()
+            function = game.principal_variation_search if self.search == 'pvs' else game.alpha_beta_cutoff_search
+            try:
+                move = function(child, self.depth, tt=self.tt, ordering=self.ordering, deadline=deadline)
+            except SearchTimeout:
+                return
+            self._moves[child.key] = move
@@ -0,0 +1,337 @@
+"""
+## game_records.py
+
+This module stores played games in a compact binary file, so that the games of a series or a tournament can be
+kept, streamed and replayed later.
+
+A file starts with a header (magic, version) followed by one frame per game. A frame is the length of its payload
+and a CRC32 of it, then the payload:
+
+- the seed of the game (NO_SEED if none), the result (the utility for 'X') and the number of moves;
+- the names of the game class and of the players of 'X' and 'O', each a length byte and UTF-8 text;
+- one byte per move: the square (x, y) as x * 16 + y, or PASS_CODE for the Reversi pass;
+- the time of every move, in microseconds (4 bytes each).
+
+Frames are only appended, so a file can hold any number of games and a file cut short by a crash loses at most
+its last game. The reader streams the frames one at a time and never loads the whole file. For random access,
+the writer also appends the offset of every frame to an index file next to the records (`path + '.idx'`, 8 bytes
+per game); GameRecordFile maps it into memory, and rebuilds it by scanning the frames if it is missing or stale.
+
+Classes:
+- GameRecord: A game as stored in the file, with its moves still encoded.
+- GameRecordWriter: Appends games to a record file and its index.
+- GameRecordFile: Random access to the games of a file through its index.
+
+Functions:
+- encode_move(move) / decode_move(code, game, state): The byte of a move, and the move of a byte.
+- player_name(player): The name under which a player is recorded.
+- read_records(path): A generator of the games of a file, in order.
+- replay(game, record): A generator of the states of a recorded game.
+- build_index(path): Writes the index file of a record file from its frames.
+- main(): Command line entry point, e.g. `python -m records.game_records games.rec --replay 0`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import functools
+import mmap
+import os
+import struct
+import zlib
+from collections import namedtuple
+
+from game.reversi import PASS
+
+MAGIC = b'GREC'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sH')
+# payload length, CRC32 of the payload
+FRAME = struct.Struct('<II')
+# seed, result, number of moves
+FIXED = struct.Struct('<QhH')
+INDEX_ENTRY = struct.Struct('<Q')
+NO_SEED = (1 << 64) - 1
+PASS_CODE = 0xFF
+
+GameRecord = namedtuple('GameRecord', 'game, players, seed, result, moves, seconds')
+GameRecord.__doc__ = """A recorded game: the game class name, the (X, O) player names, the seed (None if none), the
+utility for 'X', the moves as bytes (see encode_move) and the seconds of every move."""
+
+
+def encode_move(move):
+    """Returns the byte of a move: x * 16 + y for a square (x, y) with 0 <= x, y < 16, PASS_CODE for PASS."""
+    if move == PASS:
+        return PASS_CODE
+    x, y = move
+    if not (0 <= x < 16 and 0 <= y < 16):
+        raise ValueError('move cannot be recorded in one byte: {}'.format(move))
+    return x << 4 | y
+
+
+def decode_move(code, game, state):
+    """Returns the move of a byte in `state`; PASS_CODE is the pass only where the pass is a legal move."""
+    if code == PASS_CODE and PASS in game.actions(state):
+        return PASS
+    return code >> 4, code & 15
+
+
+def player_name(player):
+    """Returns the name a player is recorded under: its function name, that of a partial, or its class name."""
+    while isinstance(player, functools.partial):
+        player = player.func
+    return getattr(player, '__name__', type(player).__name__)
+
+
+def _text(value):
+    data = value.encode('utf-8')[:255]
+    return bytes([len(data)]) + data
+
+
+def _pack(record):
+    # The payload of a frame
+    seed = NO_SEED if record.seed is None else record.seed
+    n = len(record.moves)
+    return b''.join([
+        FIXED.pack(seed, int(record.result), n),
+        _text(record.game), _text(record.players[0]), _text(record.players[1]),
+        bytes(record.moves),
+        struct.pack('<{}I'.format(n), *(min(round(s * 1e6), 0xFFFFFFFF) for s in record.seconds)),
+    ])
+
+
+def _unpack(payload):
+    # The GameRecord of a frame payload
+    seed, result, n = FIXED.unpack_from(payload)
+    position = FIXED.size
+    texts = []
+    for _ in range(3):
+        length = payload[position]
+        texts.append(payload[position + 1:position + 1 + length].decode('utf-8'))
+        position += 1 + length
+    moves = bytes(payload[position:position + n])
+    micros = struct.unpack_from('<{}I'.format(n), payload, position + n)
+    return GameRecord(texts[0], (texts[1], texts[2]), None if seed == NO_SEED else seed, result, moves,
+                      tuple(t / 1e6 for t in micros))
+
+
+def _read_frame(f):
+    # The payload of the frame at the position of `f`, or None at the end of the file or of its complete frames
+    header = f.read(FRAME.size)
+    if len(header) < FRAME.size:
+        return None
+    length, crc = FRAME.unpack(header)
+    payload = f.read(length)
+    if len(payload) < length:
+        return None
+    if zlib.crc32(payload) != crc:
+        raise ValueError('corrupt game record at offset {}'.format(f.tell() - length - FRAME.size))
+    return payload
+
+
+def _open_records(path):
+    f = open(path, 'rb')
+    magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        f.close()
+        raise ValueError('not a game record file: {}'.format(path))
+    return f
+
+
+class GameRecordWriter:
+    """
+    Appends games to a record file, creating it if needed, and their offsets to its index file.
+
+    Use it as a context manager, or call `close` at the end; `Game.play_game(..., recorder=writer)` and
+    `run_tournament(..., records=path)` write every game they play.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new and not _index_is_current(path):
+            # a game cut short by a crash is dropped, so that the next one starts on a frame boundary
+            build_index(path)
+            with open(path, 'r+b') as f:
+                f.truncate(_scan_offsets(path)[1])
+        self.file = open(path, 'ab')
+        self.index = open(path + '.idx', 'wb' if new else 'ab')
+        if new:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def write(self, record):
+        """Appends a GameRecord and returns its offset."""
+        payload = _pack(record)
+        offset = self.file.tell()
+        self.file.write(FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+        self.index.write(INDEX_ENTRY.pack(offset))
+        return offset
+
+    def write_game(self, game, players, moves, seconds, result, seed=None):
+        """Appends a game played by `game` between the (X, O) `players` (names or players) with its moves."""
+        names = tuple(p if isinstance(p, str) else player_name(p) for p in players)
+        return self.write(GameRecord(type(game).__name__, names, seed, result,
+                                     bytes(encode_move(m) for m in moves), tuple(seconds)))
+
+    def flush(self):
+        self.file.flush()
+        self.index.flush()
+
+    def close(self):
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path):
+    """Yields the GameRecords of a file in order, reading one frame at a time."""
+    with _open_records(path) as f:
+        while True:
+            payload = _read_frame(f)
+            if payload is None:
+                return
+            yield _unpack(payload)
+
+
+def replay(game, record):
+    """Yields the states of a recorded game, from `game.initial` to the final state."""
+    state = game.initial
+    yield state
+    for code in record.moves:
+        move = decode_move(code, game, state)
+        if move not in game.actions(state):
+            raise ValueError('illegal move in game record: {}'.format(move))
+        state = game.result(state, move)
+        yield state
+
+
+def _scan_offsets(path):
+    # The offsets of the complete frames of a file, skipping over the payloads, and the end of the last one
+    offsets = []
+    end = os.path.getsize(path)
+    with _open_records(path) as f:
+        offset = FILE_HEADER.size
+        while offset + FRAME.size <= end:
+            f.seek(offset)
+            length, _ = FRAME.unpack(f.read(FRAME.size))
+            if offset + FRAME.size + length > end:
+                break
+            offsets.append(offset)
+            offset += FRAME.size + length
+    return offsets, offset
+
+
+def build_index(path):
+    """Writes the index file of a record file from its frames and returns the number of games."""
+    offsets, _ = _scan_offsets(path)
+    with open(path + '.idx', 'wb') as f:
+        f.write(b''.join(INDEX_ENTRY.pack(offset) for offset in offsets))
+    return len(offsets)
+
+
+def _index_is_current(path):
+    # Whether the index file ends with the last complete frame of the record file
+    index_path = path + '.idx'
+    if not os.path.exists(index_path):
+        return False
+    size = os.path.getsize(index_path)
+    if size % INDEX_ENTRY.size:
+        return False
+    end = os.path.getsize(path)
+    if size == 0:
+        return end == FILE_HEADER.size
+    with open(index_path, 'rb') as f:
+        f.seek(size - INDEX_ENTRY.size)
+        last, = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+    with open(path, 'rb') as f:
+        f.seek(last)
+        header = f.read(FRAME.size)
+    if len(header) < FRAME.size:
+        return False
+    length, _ = FRAME.unpack(header)
+    return last + FRAME.size + length == end
+
+
+class GameRecordFile:
+    """
+    Random access to the games of a record file: `len(records)` games, `records[i]` is the i-th GameRecord.
+    The index is memory-mapped, so opening a file of millions of games reads neither file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not _index_is_current(path):
+            build_index(path)
+        self.file = _open_records(path)
+        with open(path + '.idx', 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self.offsets = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.count = size // INDEX_ENTRY.size
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, i):
+        """Returns the offset of the i-th game in the record file."""
+        if not -self.count <= i < self.count:
+            raise IndexError('game record index out of range')
+        return INDEX_ENTRY.unpack_from(self.offsets, (i % self.count) * INDEX_ENTRY.size)[0]
+
+    def __getitem__(self, i):
+        self.file.seek(self.offset(i))
+        return _unpack(_read_frame(self.file))
+
+    def close(self):
+        if isinstance(self.offsets, mmap.mmap):
+            self.offsets.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    from benchmark.perft import GAMES, make_game
+
+    parser = argparse.ArgumentParser(description='Summarises or replays the games of a game record file.')
+    parser.add_argument('path', help='The game record file.')
+    parser.add_argument('--replay', type=int, metavar='N', help='Display the states of the N-th game.')
+    parser.add_argument('--index', action='store_true', help='Rebuild the index file.')
+    args = parser.parse_args(argv)
+
+    if args.index:
+        print(build_index(args.path), 'games indexed')
+    if args.replay is not None:
+        with GameRecordFile(args.path) as records:
+            record = records[args.replay]
+        names = {cls.__name__: name for name, cls in GAMES.items()}
+        if record.game not in names:
+            parser.error('cannot replay a game of {}'.format(record.game))
+        game = make_game(names[record.game])
+        print(f'{record.game}: {record.players[0]} (X) vs {record.players[1]} (O), seed {record.seed}')
+        for state in replay(game, record):
+            game.display(state)
+        print('result', record.result)
+        return
+
+    games = 0
+    results = {1: 0, 0: 0, -1: 0}
+    moves = 0
+    for record in read_records(args.path):
+        games += 1
+        moves += len(record.moves)
+        results[max(-1, min(1, record.result))] += 1
+    print(f'{games} games, {moves} moves: X won {results[1]}, O won {results[-1]}, ties {results[0]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+## endgame.py
+
+This module contains an exact endgame solver for Reversi. Once few squares are empty, the game tree to the end
+is small enough to search completely, so instead of the heuristic the position is solved: the solver finds the
+final disc difference under perfect play of both sides, and the move that reaches it.
+
+The search is a negamax alpha-beta over `(own, opp)` bitboards (see game/bitboard_reversi.py), so it works for
+the states of all the Reversi classes. The moves of a node are ordered:
+
+- fastest first: the moves that leave the opponent the fewest replies are searched first, as they are the most
+  likely to cause a cutoff;
+- by parity: the board is split into its four 4 x 4 quadrants, and the moves in a quadrant with an odd number of
+  empty squares come first (the player who plays first in an odd region usually gets its last square too).
+
+Near the end of the tree sorting costs more than it saves, so nodes with few empty squares use the parity order
+alone. The solver has its own transposition table, kept between the positions it solves, since the position
+after the next two moves is a subtree of the one solved on this move.
+
+Classes:
+- EndgameSolver: Solves the Reversi positions with at most `threshold` empty squares.
+
+Functions:
+- solver_for(game): The per-process solver of a game, or None if the game is not Reversi.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+from game.bitboard_reversi import board_to_bitboard, flip_mask, square_bit, SQUARES, FULL
+from game.reversi import Reversi, PASS
+from search.transposition_table import TranspositionTable, EXACT, LOWER, UPPER
+
+# The four 4 x 4 quadrants of the board, as bitboards
+QUADRANTS = []
+for _qx in (0, 4):
+    for _qy in (0, 4):
+        _mask = 0
+        for _x in range(_qx, _qx + 4):
+            for _y in range(_qy, _qy + 4):
+                _mask |= square_bit(_x, _y)
+        QUADRANTS.append(_mask)
+
+# Squares not on the first or last column: runs of opponent discs along a row or a diagonal are masked with it,
+# so that a shift cannot wrap a run into the next row
+INNER_COLUMNS = 0x7E7E7E7E7E7E7E7E
+
+
+def moves_of(own, opp):
+    """
+    Returns the bitboard of the legal moves of `own` against `opp`, like `move_mask`, with the shifts unrolled:
+    the solver spends most of its time generating moves.
+    """
+    empty = ~(own | opp) & FULL
+    inner = opp & INNER_COLUMNS
+    moves = 0
+    for step, run_mask in ((1, inner), (8, opp), (7, inner), (9, inner)):
+        run = (own << step) & run_mask
+        run |= (run << step) & run_mask
+        run |= (run << step) & run_mask
+        run |= (run << step) & run_mask
+        run |= (run << step) & run_mask
+        run |= (run << step) & run_mask
+        moves |= run << step
+        run = (own >> step) & run_mask
+        run |= (run >> step) & run_mask
+        run |= (run >> step) & run_mask
+        run |= (run >> step) & run_mask
+        run |= (run >> step) & run_mask
+        run |= (run >> step) & run_mask
+        moves |= run >> step
+    return moves & empty
+
+
+# Nodes with at most this many empty squares use the parity order alone, without the fastest first sort
+PARITY_ONLY_EMPTIES = 6
+
+# Nodes with fewer empty squares than this are not stored in the transposition table
+TT_MIN_EMPTIES = 7
+
+
+class EndgameSolver:
+    """
+    An exact Reversi endgame solver.
+
+    Attributes:
+        - threshold (int): The solver takes over in positions with at most this many empty squares.
+        - tt (TranspositionTable): The table of the solver, keyed by the hash of the `(own, opp)` bitboards.
+        - nodes (int): The nodes searched, over all the solved positions.
+        - solved (int): The number of positions solved.
+    """
+
+    def __init__(self, threshold=10, tt=None):
+        self.threshold = threshold
+        self.tt = tt if tt is not None else TranspositionTable(1 << 18)
+        self.nodes = 0
+        self.solved = 0
+
+    def empties(self, state):
+        """Returns the number of empty squares of a state of any of the Reversi classes."""
+        x_bits, o_bits = self.bitboard(state)
+        return 64 - (x_bits | o_bits).bit_count()
+
+    def bitboard(self, state):
+        """Returns the `(x_bits, o_bits)` bitboard of a state, whatever its board type."""
+        if isinstance(state.board, dict):
+            return board_to_bitboard(state.board)
+        return state.board
+
+    def applies(self, state):
+        """Returns True if the state is not over and has at most `threshold` empty squares."""
+        return bool(state.moves) and self.empties(state) <= self.threshold
+
+    def solve(self, state):
+        """
+        Solves a position.
+
+        Args:
+            state: A non-terminal state of any of the Reversi classes.
+
+        Returns:
+            tuple: The best move and the final disc difference (discs of the player to move minus those of the
+            opponent) it leads to under perfect play, as `(move, score)`.
+        """
+        x_bits, o_bits = self.bitboard(state)
+        own, opp = (x_bits, o_bits) if state.to_move == 'X' else (o_bits, x_bits)
+        self.tt.new_search()
+        self.solved += 1
+        if list(state.moves) == [PASS]:
+            return PASS, -self.search(opp, own, -64, 64)
+
+        best_move = None
+        best_score = -65
+        alpha = -64
+        for bit, flips in self.ordered(own, opp, moves_of(own, opp)):
+            score = -self.search(opp & ~flips, own | bit | flips, -64, -alpha)
+            if score > best_score:
+                best_score = score
+                best_move = SQUARES[bit.bit_length() - 1]
+                alpha = max(alpha, score)
+        return best_move, best_score
+
+    def best_move(self, state):
+        """Returns the move of a perfect player in the position."""
+        return self.solve(state)[0]
+
+    def ordered(self, own, opp, moves):
+        """
+        Returns the moves of the `moves` bitboard in search order, as `(bit, flips)` pairs: by parity, odd
+        quadrants first, and with more than PARITY_ONLY_EMPTIES empty squares, fastest first before that.
+        """
+        empty = ~(own | opp) & FULL
+        odd = 0
+        for quadrant in QUADRANTS:
+            if (empty & quadrant).bit_count() & 1:
+                odd |= quadrant
+        first = []
+        last = []
+        while moves:
+            bit = moves & -moves
+            moves ^= bit
+            (first if bit & odd else last).append((bit, flip_mask(own, opp, bit)))
+        if empty.bit_count() <= PARITY_ONLY_EMPTIES:
+            return first + last
+        # sorted is stable, so moves with as many replies keep the parity order
+        return sorted(first + last, key=lambda move: moves_of(opp & ~move[1], own | move[0] | move[1]).bit_count())
+
+    def search(self, own, opp, alpha, beta):
+        """
+        Returns the final disc difference of the position for the player owning `own`, if it is within
+        (alpha, beta); otherwise a bound on it on the failing side (fail-soft alpha-beta).
+        """
+        self.nodes += 1
+        moves = moves_of(own, opp)
+        if not moves:
+            if not moves_of(opp, own):
+                return own.bit_count() - opp.bit_count()
+            return -self.search(opp, own, -beta, -alpha)
+
+        empties = 64 - (own | opp).bit_count()
+        key = None
+        if empties >= TT_MIN_EMPTIES:
+            key = hash((own, opp))
+            entry = self.tt.probe(key)
+            if entry is not None:
+                if entry.flag == EXACT:
+                    return entry.score
+                if entry.flag == LOWER and entry.score >= beta:
+                    return entry.score
+                if entry.flag == UPPER and entry.score <= alpha:
+                    return entry.score
+            alpha_orig = alpha
+
+        best = -65
+        best_bit = None
+        for bit, flips in self.ordered(own, opp, moves):
+            score = -self.search(opp & ~flips, own | bit | flips, -beta, -alpha)
+            if score > best:
+                best = score
+                best_bit = bit
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if key is not None:
+            flag = LOWER if best >= beta else UPPER if best <= alpha_orig else EXACT
+            self.tt.store(key, empties, best, flag, best_bit)
+        return best
+
+    def stats(self):
+        """Returns the counters of the solver and of its table as a dict."""
+        return {'threshold': self.threshold, 'solved': self.solved, 'nodes': self.nodes, 'tt': self.tt.stats()}
+
+
+# The solver of this process
+_solver = None
+
+
+def solver_for(game):
+    """
+    Returns the endgame solver of this process, creating it the first time, or None if `game` is not one of the
+    Reversi classes.
+    """
+    global _solver
+    if not isinstance(game, Reversi):
+        return None
+    if _solver is None:
+        _solver = EndgameSolver()
+    return _solver
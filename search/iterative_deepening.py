@@ -0,0 +1,104 @@
+"""
+## iterative_deepening.py
+
+This module contains an iterative deepening driver for the alpha-beta cutoff search of a game. Instead of a fixed
+depth, the position is searched deeper and deeper until a wall-clock deadline. The move of the last fully
+completed depth is played; an iteration still running at the deadline is aborted and its result discarded.
+
+A cutoff search at `depth` looks `depth + 1` plies ahead and scores its leaves for the player to move there, so
+only the odd depths score them for the player to move at the root; the even ones choose the opponent's best
+move. The driver therefore deepens two plies at a time over the odd depths 1, 3, 5, ...
+
+Shallow iterations are cheap compared to the last one, and when a transposition table is given they fill it with
+best moves that make the next iteration search faster.
+
+Classes:
+- SearchTimeout: Raised inside a search when its deadline has passed.
+
+Functions:
+- iterative_deepening_search(game, state, time_limit, ...): Searches deeper until the time limit.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import time
+
+# A search checks the clock once every CHECK_INTERVAL nodes (a power of two).
+CHECK_INTERVAL = 64
+
+
+class SearchTimeout(Exception):
+    """Raised by a search when its deadline has passed."""
+
+
+def iterative_deepening_search(game, state, time_limit=1.0, max_depth=64, tt=None, stats=None, ordering=None,
+                               search='alpha_beta'):
+    """
+    Runs `game.alpha_beta_cutoff_search` at depth 1, 3, 5, ... until `time_limit` seconds have passed.
+
+    With search='pvs' the iterations run `game.principal_variation_search` instead, with an aspiration window
+    around the score of the previous iteration, which is two plies shallower and scores its leaves for the same
+    player.
+
+    The depth 1 iteration (a two ply search) always completes, so there is always a move to play. Every deeper
+    iteration is aborted as soon as the deadline passes, so a call never takes much longer than `time_limit`.
+
+    Args:
+        game: The game object. It must implement `alpha_beta_cutoff_search` with a `deadline` argument.
+        state: The current state of the game.
+        time_limit (float): The move budget in seconds.
+        max_depth (int): The deepest iteration to run; an even value stops at the odd depth below it.
+        tt (TranspositionTable, optional): A transposition table shared by the iterations.
+        stats (dict, optional): If given, it is updated with the reached 'depth' (the last completed iteration),
+            the searched 'nodes' (including the aborted iteration) and the elapsed 'seconds'.
+        ordering (MoveOrderer, optional): The move orderer of the search, shared by the iterations.
+        search (str): 'alpha_beta' or 'pvs'. The counters of `principal_variation_search` are added to `stats`.
+
+    Returns:
+        The best move of the last completed iteration.
+    """
+    start = time.perf_counter()
+    deadline = start + time_limit
+    search_stats = {'nodes': 0}
+    if ordering is not None:
+        ordering.new_search()
+
+    if search == 'pvs':
+        scores = {}
+
+        def run(depth, **kwargs):
+            iteration_stats = {}
+            try:
+                action = game.principal_variation_search(state, depth, tt=tt, stats=iteration_stats,
+                                                         ordering=ordering, guess=scores.get(depth - 2), **kwargs)
+            finally:
+                # an aborted iteration counts its nodes too
+                for key, value in iteration_stats.items():
+                    if key != 'score':
+                        search_stats[key] = search_stats.get(key, 0) + value
+            scores[depth] = iteration_stats['score']
+            return action
+    elif search == 'alpha_beta':
+        def run(depth, **kwargs):
+            return game.alpha_beta_cutoff_search(state, depth, tt=tt, stats=search_stats, ordering=ordering, **kwargs)
+    else:
+        raise ValueError('unknown search: {}'.format(search))
+
+    best_action = run(1)
+    depth_reached = 1
+    for depth in range(3, max_depth + 1, 2):
+        if time.perf_counter() >= deadline:
+            break
+        try:
+            best_action = run(depth, deadline=deadline)
+        except SearchTimeout:
+            break
+        depth_reached = depth
+
+    if stats is not None:
+        stats['depth'] = depth_reached
+        for key, value in search_stats.items():
+            stats[key] = stats.get(key, 0) + value
+        stats['seconds'] = time.perf_counter() - start
+    return best_action
@@ -0,0 +1,119 @@
+"""
+## move_ordering.py
+
+This module contains the move ordering shared by the alpha-beta searches. Alpha-beta prunes the most when the best
+move of every node is searched first, so the children of a node are sorted before they are searched:
+
+1. the principal variation (PV) move: the best move found for this position by an earlier search, e.g. the
+   previous iteration of iterative deepening, read from the transposition table,
+2. the killer moves: moves that caused a beta cutoff in a sibling position, at the same ply,
+3. the history heuristic: moves that caused cutoffs anywhere in the tree, weighted by the depth of the cutoff,
+4. the static weight of the square, e.g. `Reversi.WEIGHT_MATRIX`.
+
+The orderer also counts the cutoffs and how many of them happened on the first searched move, which is the usual
+measure of ordering quality: with perfect ordering every cutoff happens on the first move.
+
+Classes:
+- MoveOrderer: Orders the moves of a node and learns from the cutoffs of the search.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+
+
+class MoveOrderer:
+    """
+    Orders moves for alpha-beta search with the PV move, killer moves, a history table and static square weights.
+
+    A search calls `order` once for every node it expands, and `record_cutoff` when a move of the node causes a
+    cutoff. The killers and history are kept between searches; call `new_search` at the start of every move.
+
+    Attributes:
+        - weight (callable): Returns the static weight of a move, or None to skip that criterion.
+        - killers (dict): The killer moves of every ply, most recent first.
+        - history (dict): The history score of every (player, move) pair.
+        - ordered (int): The number of nodes ordered.
+        - cutoffs (int): The number of cutoffs.
+        - first_move_cutoffs (int): The number of cutoffs caused by the first searched move.
+    """
+
+    def __init__(self, weight=None, max_killers=2):
+        self.weight = weight
+        self.max_killers = max_killers
+        self.killers = {}
+        self.history = {}
+        self.reset_stats()
+
+    @classmethod
+    def for_game(cls, game, max_killers=2):
+        """Creates an orderer using the `square_weight` method of the game as the static weight, if it has one."""
+        return cls(getattr(game, 'square_weight', None), max_killers)
+
+    def reset_stats(self):
+        """Sets the counters to zero."""
+        self.ordered = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        """Forgets the killers and ages the history table, so that old cutoffs weigh less than new ones."""
+        self.killers = {}
+        self.history = {k: v >> 1 for k, v in self.history.items() if v > 1}
+
+    def order(self, moves, ply, player, pv_move=None):
+        """
+        Sorts the moves of a node, best first.
+
+        Args:
+            moves: The legal moves of the node.
+            ply: The distance of the node from the root.
+            player: The player to move at the node.
+            pv_move (optional): The best move of an earlier search of the node, searched first.
+
+        Returns:
+            list: The moves, in the order they should be searched.
+        """
+        self.ordered += 1
+        killers = self.killers.get(ply, ())
+        history = self.history
+        weight = self.weight
+
+        def key(move):
+            if move == pv_move:
+                return (0, 0, 0)
+            if move in killers:
+                return (1, killers.index(move), 0)
+            return (2, -history.get((player, move), 0), -weight(move) if weight else 0)
+
+        return sorted(moves, key=key)
+
+    def record_cutoff(self, move, ply, player, depth, index):
+        """
+        Learns from a cutoff.
+
+        Args:
+            move: The move that caused the cutoff.
+            ply: The distance of the node from the root.
+            player: The player to move at the node.
+            depth: The remaining search depth of the node. Deeper cutoffs get a larger history bonus.
+            index: The position of the move in the searched order.
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self.killers.setdefault(ply, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.max_killers:]
+        self.history[(player, move)] = self.history.get((player, move), 0) + depth * depth
+
+    def stats(self):
+        """Returns the counters and the first move cutoff rate as a dict."""
+        return {
+            'ordered': self.ordered,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+        }
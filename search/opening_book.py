@@ -0,0 +1,246 @@
+"""
+## opening_book.py
+
+This module contains an opening book for Reversi: the best move of the positions of the first plies, found once
+by a deep offline search and looked up during play instead of searching.
+
+A book file is a 16 byte header (the magic bytes `RVBK`, the format version, the search depth of the book and the
+number of entries) followed by the entries, sorted by the Zobrist hash of their position (see search/zobrist.py).
+An entry is 10 bytes: the 64-bit hash, the square of the move (`x * 8 + y`) and the number of times the position
+was seen while the book was built (at most 255).
+
+A book is opened with a memory map and searched with a binary search, so opening it costs nothing whatever its
+size, and a lookup reads about log2(entries) entries from the file.
+
+The positions of a book come from the full game tree of the first plies (`tree_positions`) and/or from the
+opening plies of self-play games (`self_play_positions`). Their moves come from `alpha_beta_cutoff_search` at
+the book depth, over a process pool. The depth must be odd: at an even depth the search scores its leaves for
+the opponent and finds the opponent's best move (see search/iterative_deepening.py).
+
+Classes:
+- OpeningBook: A book file opened with a memory map.
+
+Functions:
+- tree_positions(game, plies): The positions of the first `plies` plies, one per hash.
+- self_play_positions(game, games, plies, seed): The positions of the first `plies` plies of random games.
+- build_book(game_name, positions, depth, workers): The best move of each position, as {hash: (move, seen)}.
+- write_book(path, entries, depth): Writes the entries to a book file, sorted by hash.
+- load_book(path): Opens a book file and makes it the book of this process.
+- book_for(game): The book of this process, or None if there is none or the game is not Reversi.
+- main(): Command line entry point, e.g. `python -m search.opening_book book.bin --plies 6 --depth 5`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import random
+import struct
+
+from benchmark.perft import make_game
+from game.reversi import Reversi, PASS
+
+MAGIC = b'RVBK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ')  # magic, version, depth, number of entries
+ENTRY = struct.Struct('<QBB')  # position hash, move square, times seen
+
+
+def _key(game, state):
+    # The Zobrist hash of a state, computed if the state does not carry it
+    return state.key if state.key is not None else game.zobrist_key(state.board, state.to_move)
+
+
+class OpeningBook:
+    """
+    A book file, opened with a memory map.
+
+    Attributes:
+        - path (str): The book file.
+        - depth (int): The search depth the moves of the book were found with.
+        - count (int): The number of entries.
+        - hits, misses (int): Lookups that found / did not find the position.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            # the map stays valid after the file is closed
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.depth, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not an opening book file: {}'.format(path))
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, index):
+        """Returns the entry at `index` (in hash order) as a `(hash, square, seen)` tuple."""
+        return ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)
+
+    def probe(self, key):
+        """Returns the `(square, seen)` of a position hash, or None if it is not in the book."""
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, square, seen = self.entry(middle)
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                return square, seen
+        return None
+
+    def move(self, game, state):
+        """Returns the book move of a state, or None if it is not in the book (or the move is not legal there)."""
+        found = self.probe(_key(game, state))
+        if found is not None:
+            move = divmod(found[0], 8)
+            if move in state.moves:
+                self.hits += 1
+                return move
+        self.misses += 1
+        return None
+
+    def close(self):
+        self.data.close()
+
+
+def tree_positions(game, plies):
+    """Returns the non-terminal positions of the first `plies` plies of the game tree, one per hash."""
+    positions = {}
+    frontier = [game.initial]
+    for ply in range(plies):
+        next_frontier = []
+        for state in frontier:
+            key = _key(game, state)
+            if key in positions or game.terminal_test(state):
+                continue
+            positions[key] = state
+            next_frontier.extend(game.result(state, a) for a in game.actions(state))
+        frontier = next_frontier
+    return list(positions.values())
+
+
+def self_play_positions(game, games, plies, seed=0):
+    """
+    Returns the positions of the first `plies` plies of `games` random games, as `(state, seen)` pairs where
+    `seen` is the number of games the position appeared in, most seen first.
+    """
+    rng = random.Random(seed)
+    seen = {}
+    states = {}
+    for _ in range(games):
+        state = game.initial
+        for ply in range(plies):
+            if game.terminal_test(state):
+                break
+            key = _key(game, state)
+            states[key] = state
+            seen[key] = seen.get(key, 0) + 1
+            state = game.result(state, rng.choice(game.actions(state)))
+    return [(states[key], count) for key, count in sorted(seen.items(), key=lambda item: -item[1])]
+
+
+# The game of a worker process and the depth of its searches
+_worker = {}
+
+
+def _init_worker(game_name, depth):
+    _worker['game'] = make_game(game_name)
+    _worker['depth'] = depth
+
+
+def _search(state):
+    # Worker: the best move of a position
+    game = _worker['game']
+    return game.alpha_beta_cutoff_search(state, _worker['depth'])
+
+
+def build_book(game_name, positions, depth=3, workers=None):
+    """
+    Searches the best move of every position.
+
+    Args:
+        game_name (str): The name of the game in `benchmark.perft.GAMES`, to create it in the worker processes.
+        positions (list): The positions, as `(state, seen)` pairs.
+        depth (int): The depth of `alpha_beta_cutoff_search`, odd.
+        workers (int, optional): The number of worker processes (default: the number of CPUs).
+
+    Returns:
+        dict: {position hash: (move, seen)}, without the positions whose only move is PASS.
+    """
+    if depth < 1 or depth % 2 == 0:
+        raise ValueError('the book depth must be odd, not {}'.format(depth))
+    game = make_game(game_name)
+    positions = [(state, seen) for state, seen in positions if list(state.moves) != [PASS]]
+    states = [state for state, _ in positions]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        _init_worker(game_name, depth)
+        moves = list(map(_search, states))
+    else:
+        with multiprocessing.Pool(workers, _init_worker, (game_name, depth)) as pool:
+            moves = pool.map(_search, states, chunksize=8)
+    return {_key(game, state): (move, seen) for (state, seen), move in zip(positions, moves)}
+
+
+def write_book(path, entries, depth):
+    """Writes the {hash: (move, seen)} entries to a book file, sorted by hash."""
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, depth, len(entries)))
+        for key in sorted(entries):
+            (x, y), seen = entries[key]
+            f.write(ENTRY.pack(key, x * 8 + y, min(seen, 255)))
+
+
+# The book of this process
+_book = None
+
+
+def load_book(path):
+    """Opens a book file and makes it the book of this process, used by `book_for`."""
+    global _book
+    _book = OpeningBook(path)
+    return _book
+
+
+def book_for(game):
+    """Returns the book of this process, or None if no book was loaded or `game` is not one of the Reversi classes."""
+    if _book is None or not isinstance(game, Reversi):
+        return None
+    return _book
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Builds a Reversi opening book file.')
+    parser.add_argument('path', help='The book file to write.')
+    parser.add_argument('--game', default='bitboard', choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--plies', type=int, default=6, help='The full tree of the first plies is in the book.')
+    parser.add_argument('--self-play', type=int, default=0, metavar='GAMES',
+                        help='Also add the positions of the first --self-play-plies plies of random games.')
+    parser.add_argument('--self-play-plies', type=int, default=12)
+    parser.add_argument('--depth', type=int, default=3, help='The search depth of the book moves, odd (default=3).')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='The number of worker processes.')
+    args = parser.parse_args(argv)
+    if args.depth < 1 or args.depth % 2 == 0:
+        parser.error('--depth must be odd, not {}'.format(args.depth))
+
+    game = make_game(args.game)
+    positions = {_key(game, state): (state, 1) for state in tree_positions(game, args.plies)}
+    if args.self_play:
+        for state, seen in self_play_positions(game, args.self_play, args.self_play_plies, args.seed):
+            key = _key(game, state)
+            positions[key] = (state, positions[key][1] + seen if key in positions else seen)
+    entries = build_book(args.game, list(positions.values()), args.depth, args.workers)
+    write_book(args.path, entries, args.depth)
+    print('{} positions'.format(len(entries)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+## solution_table.py
+
+This module contains a solution table for TicTacToe: the minimax value of every position, solved once and
+looked up afterwards. Positions are stored under a canonical key, the smallest of the encodings of the board
+under its symmetries (the 8 rotations and reflections of a square board, the 4 that keep the shape of a
+rectangular one), so symmetric positions share one entry.
+
+The table can be used as a per-process memo, filled as positions are asked for (`table_for`), or solved
+completely in advance, saved to a JSON file and loaded at startup (`solve_all`, `save`, `load_table`).
+
+The best move is the first action, in the order of `game.actions(state)`, with the best value for the player to
+move, exactly as `minmax_player` and `alpha_beta_player` pick it, so they play the same moves with the table.
+
+Classes:
+- SolutionTable: The values of the positions of one board size.
+
+Functions:
+- table_for(game): The per-process table of a game, or None if the game is not a small TicTacToe board.
+- load_table(path): Loads a table saved with `SolutionTable.save` and makes it the per-process table.
+- main(): Command line entry point that solves a board and saves its table, e.g.
+  `python -m search.solution_table tictactoe.json`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+
+from game.tic_tac_toe import TicTacToe
+
+# Boards with more squares than this are not solved (a 3 x 3 board has 5478 positions, a 4 x 4 one millions).
+MAX_SQUARES = 9
+
+
+def symmetries(h, v):
+    """
+    Returns the symmetries of an h x v board as permutations: `perm[i]` is the index of the square that
+    square i of the transformed board comes from, with squares numbered row by row from (1, 1).
+    """
+    transforms = [
+        lambda x, y: (x, y),
+        lambda x, y: (h + 1 - x, v + 1 - y),
+        lambda x, y: (h + 1 - x, y),
+        lambda x, y: (x, v + 1 - y),
+    ]
+    if h == v:
+        transforms += [
+            lambda x, y: (y, x),
+            lambda x, y: (v + 1 - y, h + 1 - x),
+            lambda x, y: (y, h + 1 - x),
+            lambda x, y: (v + 1 - y, x),
+        ]
+    squares = [(x, y) for x in range(1, h + 1) for y in range(1, v + 1)]
+    index = {square: i for i, square in enumerate(squares)}
+    return [[index[transform(x, y)] for x, y in squares] for transform in transforms]
+
+
+class SolutionTable:
+    """
+    The minimax values (for 'X') of TicTacToe positions, stored under canonical keys.
+
+    Attributes:
+        - h, v, k (int): The board size and the line length of the game.
+        - values (dict): {canonical key: value for 'X'}.
+        - hits, misses (int): Lookups answered from the table and positions solved.
+    """
+
+    def __init__(self, h=3, v=3, k=3, values=None):
+        self.h = h
+        self.v = v
+        self.k = k
+        self.values = values if values is not None else {}
+        self.squares = [(x, y) for x in range(1, h + 1) for y in range(1, v + 1)]
+        self.permutations = symmetries(h, v)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_game(cls, game):
+        """Creates an empty table for the board of a TicTacToe game."""
+        return cls(game.h, game.v, game.k)
+
+    def key(self, board):
+        """Returns the canonical key of a board: its smallest encoding under the symmetries."""
+        cells = [board.get(square, '.') for square in self.squares]
+        return min(''.join([cells[i] for i in perm]) for perm in self.permutations)
+
+    def value(self, game, state):
+        """Returns the minimax value of the state for 'X', solving it if it is not in the table yet."""
+        key = self.key(state.board)
+        value = self.values.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        if game.terminal_test(state):
+            value = game.utility(state, 'X')
+        else:
+            children = [self.value(game, game.result(state, a)) for a in game.actions(state)]
+            value = max(children) if state.to_move == 'X' else min(children)
+        self.values[key] = value
+        return value
+
+    def best_move(self, game, state):
+        """
+        Returns the first action, in the order of `game.actions(state)`, with the best value for the player
+        to move, as minmax_player and alpha_beta_player choose it.
+        """
+        sign = 1 if state.to_move == 'X' else -1
+        best_action = None
+        best_value = None
+        for a in game.actions(state):
+            v = sign * self.value(game, game.result(state, a))
+            if best_action is None or v > best_value:
+                best_action = a
+                best_value = v
+        return best_action
+
+    def solve_all(self, game):
+        """Solves every position reachable from the initial state and returns the number of entries."""
+        self.value(game, game.initial)
+        return len(self.values)
+
+    def save(self, path):
+        """Saves the table to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump({'h': self.h, 'v': self.v, 'k': self.k, 'values': self.values}, f)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a table saved with `save`."""
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['h'], data['v'], data['k'], data['values'])
+
+
+# The tables of this process, by (h, v, k)
+_tables = {}
+
+
+def table_for(game):
+    """
+    Returns the table of this process for the board of `game`, creating an empty one (filled as it is used)
+    the first time. Returns None if `game` is not a TicTacToe game with at most MAX_SQUARES squares.
+    """
+    if type(game) is not TicTacToe or game.h * game.v > MAX_SQUARES:
+        return None
+    size = (game.h, game.v, game.k)
+    if size not in _tables:
+        _tables[size] = SolutionTable(*size)
+    return _tables[size]
+
+
+def load_table(path):
+    """Loads a table saved with `SolutionTable.save` and makes it the table of this process for its board."""
+    table = SolutionTable.load(path)
+    _tables[(table.h, table.v, table.k)] = table
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solves TicTacToe and saves the solution table as JSON.')
+    parser.add_argument('path', help='The file to save the table to.')
+    parser.add_argument('--size', type=int, nargs=3, default=[3, 3, 3], metavar=('H', 'V', 'K'))
+    args = parser.parse_args(argv)
+
+    game = TicTacToe(*args.size)
+    table = SolutionTable.for_game(game)
+    print('{} positions'.format(table.solve_all(game)))
+    table.save(args.path)
+
+
+if __name__ == '__main__':
+    main()
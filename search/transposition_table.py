@@ -0,0 +1,141 @@
+"""
+## transposition_table.py
+
+This module contains a bounded transposition table for alpha-beta searches. The table remembers the result of
+every searched position, keyed by its Zobrist hash, so positions reached through different move orders
+(transpositions) and positions searched again on the next move are not searched from scratch.
+
+An entry stores the remaining depth it was searched to, its score, whether the score is exact or only a lower /
+upper bound (after a beta / alpha cutoff), and the best move found.
+
+Classes:
+- TranspositionTable: A fixed-size table indexed by the low bits of the hash, with a configurable replacement policy.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+from collections import namedtuple
+
+# Bound types of an entry's score
+EXACT = 0
+LOWER = 1  # the score failed high, the real value is >= score
+UPPER = 2  # the score failed low, the real value is <= score
+
+TTEntry = namedtuple('TTEntry', 'key, depth, score, flag, move, generation')
+
+
+class TranspositionTable:
+    """
+    A fixed-size transposition table.
+
+    The number of slots is `size` rounded up to a power of two, and a position is stored in the slot given by the
+    low bits of its hash. When two positions share a slot, the replacement policy decides which one is kept:
+
+    - 'depth': keep the entry searched deeper, unless it is left over from an earlier search (see `new_search`).
+    - 'always': the new entry always replaces the old one.
+
+    Attributes:
+        - hits (int): Probes that found the position.
+        - misses (int): Probes that did not find the position.
+        - collisions (int): Misses where the slot held a different position.
+        - stores (int): Entries written.
+        - overwrites (int): Entries written over a different position.
+    """
+
+    POLICIES = ('depth', 'always')
+
+    def __init__(self, size=1 << 16, replacement='depth'):
+        if replacement not in self.POLICIES:
+            raise ValueError('unknown replacement policy: {}'.format(replacement))
+        slots = 1
+        while slots < size:
+            slots <<= 1
+        self.size = slots
+        self.mask = slots - 1
+        self.replacement = replacement
+        self.slots = [None] * slots
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Sets all the counters to zero."""
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Marks the start of a new search. Entries of earlier searches can then be replaced by shallower ones."""
+        self.generation += 1
+
+    def clear(self):
+        """Removes every entry."""
+        self.slots = [None] * self.size
+
+    def probe(self, key):
+        """
+        Looks up a position.
+
+        Args:
+            key (int): The hash of the position.
+
+        Returns:
+            TTEntry: The entry of the position, or None if it is not in the table.
+        """
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        if entry is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, flag, move=None):
+        """
+        Stores the result of a search of a position, subject to the replacement policy.
+
+        Args:
+            key (int): The hash of the position.
+            depth (int): The remaining depth the position was searched to.
+            score: The score of the position.
+            flag: EXACT, LOWER or UPPER.
+            move (optional): The best move found.
+        """
+        index = key & self.mask
+        old = self.slots[index]
+        if old is not None and self.replacement == 'depth':
+            if old.depth > depth and old.generation == self.generation:
+                return
+        if old is not None and old.key != key:
+            self.overwrites += 1
+        if move is None and old is not None and old.key == key:
+            move = old.move  # keep the best move of an earlier search of the same position
+        self.slots[index] = TTEntry(key, depth, score, flag, move, self.generation)
+        self.stores += 1
+
+    def best_move(self, key):
+        """Returns the best move stored for a position, or None. Does not update the counters."""
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry.key == key:
+            return entry.move
+        return None
+
+    def stats(self):
+        """Returns the counters and the fill rate of the table as a dict."""
+        probes = self.hits + self.misses
+        return {
+            'size': self.size,
+            'filled': sum(1 for entry in self.slots if entry is not None),
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
+
+    def __len__(self):
+        return self.size
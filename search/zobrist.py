@@ -0,0 +1,53 @@
+"""
+## zobrist.py
+
+This module contains the Zobrist hashing scheme for 8 x 8 board games. Every (square, tile) pair gets a
+random 64-bit number, and the hash of a position is the XOR of the numbers of its occupied squares, plus a
+fixed number when 'O' is to move. Placing or flipping a disc only XORs a few numbers into the hash, so a
+game can update the hash of a state incrementally in `result`.
+
+Squares are numbered `x * 8 + y`, the same as the bit numbering of BitboardReversi, so both Reversi
+implementations produce the same hashes for the same positions.
+
+Functions:
+- zobrist_hash(board, to_move): Computes the hash of a dict board from scratch.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import random
+
+_rng = random.Random(0x5EED)
+
+# PIECE_KEYS[tile][x * 8 + y]
+PIECE_KEYS = {
+    'X': [_rng.getrandbits(64) for _ in range(64)],
+    'O': [_rng.getrandbits(64) for _ in range(64)],
+}
+
+# XOR of both tiles of a square: flipping a disc on square i changes the hash by FLIP_KEYS[i]
+FLIP_KEYS = [x ^ o for x, o in zip(PIECE_KEYS['X'], PIECE_KEYS['O'])]
+
+# XORed in when 'O' is to move
+SIDE_KEY = _rng.getrandbits(64)
+
+# XORed into the hash by a search, so that entries stored for one root player are not read back for the other
+PERSPECTIVE_KEYS = {'X': 0, 'O': _rng.getrandbits(64)}
+
+
+def zobrist_hash(board, to_move):
+    """
+    Computes the hash of a position from scratch.
+
+    Args:
+        board (dict): A board of {(x, y): Player} entries, where Player is 'X' or 'O'.
+        to_move: The player to move, 'X' or 'O'.
+
+    Returns:
+        int: The 64-bit hash of the position.
+    """
+    key = SIDE_KEY if to_move == 'O' else 0
+    for (x, y), tile in board.items():
+        key ^= PIECE_KEYS[tile][x * 8 + y]
+    return key
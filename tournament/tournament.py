@@ -0,0 +1,347 @@
+"""
+## tournament.py
+
+This module runs headless tournaments between the players. A tournament is a list of matchups, each one a game,
+two players (A and B), a number of games and a seed. The games of all the matchups are spread over a process
+pool and their results are streamed back as they finish. By default the colours alternate: A plays 'X' in the
+even numbered games of a matchup and 'O' in the odd numbered ones.
+
+Every game gets its own seed, drawn from the seed of its matchup, and seeds both `random` and `numpy.random` in
+the process that plays it, so a tournament gives the same results whatever the number of workers.
+
+At the end every matchup is summarised from the point of view of player A: win, loss and tie rates with their
+Wilson score confidence intervals, the score (a tie counts half), and the time per game and per move of each
+player. With `instrumented`, the players report their searches to an Instrumentation (see
+instrumentation/instrumentation.py) and each summary also holds the merged search counters of A and of B.
+With `records`, every game is also appended to a game record file (see records/game_records.py).
+
+Functions:
+- make_player(name, game, options=None): Creates a player from the PLAYERS registry.
+- play_match(game, player_x, player_o, history=None): Plays one game without displaying it, timing every move.
+- wilson_interval(successes, n, z=1.96): The Wilson score confidence interval of a proportion.
+- summarize(matchup, records): The summary of the game records of one matchup.
+- run_tournament(matchups, workers=None, on_result=None, alternate=True, book=None, instrumented=False,
+  records=None): Plays the matchups, returns the summaries.
+- main(): Command line entry point, e.g.
+  `python -m tournament.tournament --match reversi alpha_beta_cutoff:depth=3 random 100 --workers 8`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import ast
+import functools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmark.perft import make_game
+from instrumentation.instrumentation import Instrumentation, instrument, merge_summaries
+from players.players import (minmax_player, random_player, alpha_beta_player, mcts_player, MCTSPlayer,
+                             alpha_beta_cutoff_player, timed_alpha_beta_player)
+from search.move_ordering import MoveOrderer
+from search.opening_book import load_book
+from search.transposition_table import TranspositionTable
+from records.game_records import GameRecord, GameRecordWriter, encode_move
+
+
+def _function_player(function):
+    # Factory of a player function, with its options bound as keyword arguments
+    def factory(game, **options):
+        return functools.partial(function, **options) if options else function
+    return factory
+
+
+def _cutoff_tt_player(game, **options):
+    # Depth limited alpha-beta with a transposition table and a move orderer kept for the whole game
+    return functools.partial(alpha_beta_cutoff_player, tt=TranspositionTable(), ordering=MoveOrderer.for_game(game),
+                             **options)
+
+
+# Player factories: factory(game, **options) returns a new player for one game.
+PLAYERS = {
+    'random': _function_player(random_player),
+    'minmax': _function_player(minmax_player),
+    'alpha_beta': _function_player(alpha_beta_player),
+    'mcts': _function_player(mcts_player),
+    'mcts_reuse': lambda game, **options: MCTSPlayer(**options),
+    'alpha_beta_cutoff': _function_player(alpha_beta_cutoff_player),
+    'alpha_beta_cutoff_tt': _cutoff_tt_player,
+    'timed_alpha_beta': _function_player(timed_alpha_beta_player),
+}
+
+
+def make_player(name, game, options=None):
+    """Creates a new player registered under `name` in PLAYERS for one game of `game`."""
+    if name not in PLAYERS:
+        raise ValueError('unknown player: {}'.format(name))
+    return PLAYERS[name](game, **(options or {}))
+
+
+def play_match(game, player_x, player_o, history=None):
+    """
+    Plays one game between two players, without displaying it. If a `history` list is given, the
+    `(move, seconds)` of every ply are appended to it.
+
+    Returns:
+        tuple: The utility of the final state for 'X', the number of plies, and the list of the seconds
+        spent on each move of 'X' and of 'O', as `(utility, plies, {'X': [...], 'O': [...]})`.
+    """
+    players = {'X': player_x, 'O': player_o}
+    move_seconds = {'X': [], 'O': []}
+    state = game.initial
+    plies = 0
+    while not game.terminal_test(state):
+        to_move = game.to_move(state)
+        start = time.perf_counter()
+        move = players[to_move](game, state)
+        move_seconds[to_move].append(time.perf_counter() - start)
+        if history is not None:
+            history.append((move, move_seconds[to_move][-1]))
+        state = game.result(state, move)
+        plies += 1
+    return game.utility(state, 'X'), plies, move_seconds
+
+
+def wilson_interval(successes, n, z=1.96):
+    """
+    Returns the Wilson score confidence interval `(low, high)` of the proportion `successes / n`,
+    by default the 95% interval. Unlike the normal approximation it stays inside [0, 1] for rates near 0 or 1.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+# The games created in a process, one per name, so that they are not recreated for every game.
+_games = {}
+
+
+def _play(task):
+    # Worker: plays one game of a matchup and returns its record.
+    matchup, index, seed, a_is_x, instrumented, recorded, final_state = task
+    name = matchup['game']
+    if name not in _games:
+        _games[name] = make_game(name)
+    game = _games[name]
+
+    random.seed(seed)
+    np.random.seed(seed)
+    player_a = make_player(matchup['a'], game, matchup.get('a_options'))
+    player_b = make_player(matchup['b'], game, matchup.get('b_options'))
+    if instrumented:
+        a_instrumentation, b_instrumentation = Instrumentation(), Instrumentation()
+        player_a = instrument(player_a, a_instrumentation, 'a')
+        player_b = instrument(player_b, b_instrumentation, 'b')
+    players = (player_a, player_b) if a_is_x else (player_b, player_a)
+
+    history = [] if recorded or final_state else None
+    start = time.perf_counter()
+    utility, plies, move_seconds = play_match(game, *players, history)
+    seconds = time.perf_counter() - start
+
+    a_colour, b_colour = ('X', 'O') if a_is_x else ('O', 'X')
+    a_utility = utility if a_is_x else -utility
+    record = {
+        'matchup': matchup['index'],
+        'game': index,
+        'seed': seed,
+        'a_colour': a_colour,
+        'utility': utility,
+        'result': 'win' if a_utility > 0 else 'loss' if a_utility < 0 else 'tie',
+        'plies': plies,
+        'seconds': seconds,
+        'a_move_seconds': move_seconds[a_colour],
+        'b_move_seconds': move_seconds[b_colour],
+    }
+    if recorded:
+        record['game_class'] = type(game).__name__
+        record['move_codes'] = [encode_move(move) for move, _ in history]
+        record['ply_seconds'] = [seconds for _, seconds in history]
+    if final_state:
+        state = game.initial
+        for move, _ in history:
+            state = game.result(state, move)
+        record['state'] = state
+    if instrumented:
+        record['a_instrumentation'] = a_instrumentation.summary()
+        record['b_instrumentation'] = b_instrumentation.summary()
+    return record
+
+
+def _tasks(matchups, alternate, instrumented=False, recorded=False, final_states=False):
+    # The (matchup, game index, seed, A plays 'X', instrumented, recorded, final state) task of every game
+    tasks = []
+    for index, matchup in enumerate(matchups):
+        matchup = dict(matchup, index=index)
+        rng = random.Random(matchup.get('seed', 0))
+        for game in range(matchup['games']):
+            tasks.append((matchup, game, rng.getrandbits(32), game % 2 == 0 or not alternate, instrumented,
+                          recorded, final_states))
+    return tasks
+
+
+def _timing(times):
+    if not times:
+        return {'count': 0, 'mean': 0.0, 'max': 0.0}
+    return {'count': len(times), 'mean': sum(times) / len(times), 'max': max(times)}
+
+
+def summarize(matchup, records):
+    """Summarises the game records of one matchup, from the point of view of player A."""
+    n = len(records)
+    summary = {key: matchup[key] for key in ('game', 'a', 'b', 'games') if key in matchup}
+    summary['seed'] = matchup.get('seed', 0)
+    for option in ('a_options', 'b_options'):
+        if matchup.get(option):
+            summary[option] = matchup[option]
+    for outcome, key in (('win', 'wins'), ('loss', 'losses'), ('tie', 'ties')):
+        count = sum(record['result'] == outcome for record in records)
+        summary[key] = count
+        summary[outcome + '_rate'] = count / n if n else 0.0
+        summary[outcome + '_ci'] = wilson_interval(count, n)
+    summary['score'] = (summary['wins'] + 0.5 * summary['ties']) / n if n else 0.0
+    summary['a_as_x'] = sum(record['a_colour'] == 'X' for record in records)
+    summary['game_seconds'] = _timing([record['seconds'] for record in records])
+    summary['mean_plies'] = sum(record['plies'] for record in records) / n if n else 0.0
+    summary['a_move_seconds'] = _timing([t for record in records for t in record['a_move_seconds']])
+    summary['b_move_seconds'] = _timing([t for record in records for t in record['b_move_seconds']])
+    for player in ('a', 'b'):
+        key = player + '_instrumentation'
+        if any(key in record for record in records):
+            summary[key] = merge_summaries([record[key] for record in records if key in record])
+    return summary
+
+
+def run_tournament(matchups, workers=None, on_result=None, alternate=True, book=None, instrumented=False,
+                   records=None, final_states=False):
+    """
+    Plays all the games of the matchups on a process pool.
+
+    Args:
+        matchups (list): One dict per matchup with the keys 'game' (a name of `benchmark.perft.GAMES`),
+            'a' and 'b' (names of PLAYERS), 'games' (the number of games), and optionally 'seed' (default 0)
+            and 'a_options' / 'b_options' (keyword arguments of the players).
+        workers (int, optional): The number of worker processes (default: the number of CPUs).
+            With 1 worker the games are played in this process.
+        on_result (callable, optional): Called with the record of every game as soon as it finishes.
+        alternate (bool): Whether the players swap colours every game. Otherwise A always plays 'X'.
+        book (str, optional): An opening book file, loaded in every worker process for the players that use it.
+        instrumented (bool): Whether the search counters of the players are collected, in the records and
+            the summaries.
+        records (str, optional): A game record file the games are appended to, as they finish.
+        final_states (bool): Whether the record of every game has its final 'state', e.g. to display it.
+
+    Returns:
+        dict: The 'matchups' summaries (see `summarize`), in the order given, and the total 'seconds'.
+    """
+    workers = workers or os.cpu_count()
+    tasks = _tasks(matchups, alternate, instrumented, records is not None, final_states)
+    writer = GameRecordWriter(records) if records is not None else None
+    game_records = [[] for _ in matchups]
+
+    start = time.perf_counter()
+    if workers == 1:
+        if book is not None:
+            load_book(book)
+        results = map(_play, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, load_book if book is not None else None,
+                                    (book,) if book is not None else ())
+        results = pool.imap_unordered(_play, tasks)
+    try:
+        for record in results:
+            if writer is not None:
+                _write_record(writer, matchups[record['matchup']], record)
+            game_records[record['matchup']].append(record)
+            if on_result is not None:
+                on_result(record)
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if writer is not None:
+            writer.close()
+
+    summaries = []
+    for matchup, matchup_records in zip(matchups, game_records):
+        matchup_records.sort(key=lambda record: record['game'])
+        summaries.append(summarize(matchup, matchup_records))
+    return {'matchups': summaries, 'seconds': time.perf_counter() - start}
+
+
+def _player_spec(name, options):
+    # The player as given on the command line, 'name' or 'name:key=value,key=value'
+    if not options:
+        return name
+    return name + ':' + ','.join('{}={!r}'.format(key, value) for key, value in options.items())
+
+
+def _write_record(writer, matchup, record):
+    # Appends a finished game to the game record file; the moves are then dropped from the record
+    a, b = (_player_spec(matchup[key], matchup.get(key + '_options')) for key in ('a', 'b'))
+    players = (a, b) if record['a_colour'] == 'X' else (b, a)
+    writer.write(GameRecord(record.pop('game_class'), players, record['seed'], record['utility'],
+                            bytes(record.pop('move_codes')), tuple(record.pop('ply_seconds'))))
+
+
+def _parse_player(spec):
+    # 'name' or 'name:key=value,key=value' with Python literal values
+    name, _, options = spec.partition(':')
+    parsed = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        parsed[key] = ast.literal_eval(value)
+    return name, parsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Plays tournaments between the players and reports them as JSON.')
+    parser.add_argument('--match', nargs=4, action='append', default=[], metavar=('GAME', 'A', 'B', 'GAMES'),
+                        help='A matchup, e.g. `--match reversi alpha_beta_cutoff:depth=3 random 100`. '
+                             'Player options are given as name:key=value,key=value.')
+    parser.add_argument('--config', help='A JSON file with a list of matchups (see run_tournament).')
+    parser.add_argument('--seed', type=int, default=0, help='The seed of the --match matchups (default=0).')
+    parser.add_argument('--workers', type=int, default=None, help='The number of worker processes.')
+    parser.add_argument('--fixed-colours', action='store_true', help='Player A always plays X.')
+    parser.add_argument('--book', help='An opening book file for the players (see search/opening_book.py).')
+    parser.add_argument('--instrument', action='store_true',
+                        help='Collect the search counters of the players (nodes, cutoffs, TT probes, rollouts...).')
+    parser.add_argument('--records', help='A game record file the games are appended to.')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write the record of every game to stderr as a JSON line when it finishes.')
+    args = parser.parse_args(argv)
+
+    matchups = []
+    if args.config:
+        with open(args.config) as f:
+            matchups.extend(json.load(f))
+    for game, a, b, games in args.match:
+        a, a_options = _parse_player(a)
+        b, b_options = _parse_player(b)
+        matchups.append({'game': game, 'a': a, 'b': b, 'games': int(games), 'seed': args.seed,
+                         'a_options': a_options, 'b_options': b_options})
+    if not matchups:
+        parser.error('no matchups given, use --match or --config')
+
+    def stream(record):
+        print(json.dumps(record), file=sys.stderr, flush=True)
+
+    report = run_tournament(matchups, args.workers, stream if args.stream else None, not args.fixed_colours,
+                            args.book, args.instrument, args.records)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+## self_play.py
+
+This module generates training data from Reversi self-play, e.g. to tune the weights of `heuristic_score`
+offline. Every worker process plays games with a policy against itself and writes each position it moves from
+into its own shard of preallocated, memory-mapped `.npy` arrays:
+
+- boards: (capacity, 2, 8, 8) int8 planes, the discs of 'X' and the discs of 'O';
+- to_move: (capacity,) int8, 1 where 'X' is to move, -1 where 'O' is;
+- policy: (capacity, 65) float32, the visit distribution of the MCTS root over the squares (x * 8 + y) and the
+  pass (64), or the move played (one-hot) for the alpha-beta policy;
+- results: (capacity,) int8, the result of the game for 'X' (1, 0 or -1).
+
+Each worker only writes its own shard, so no locks are needed. A game is written once it is over, and a small
+JSON progress file per shard records how many positions and games are complete, after the arrays are flushed.
+The shards hold exactly the positions asked for: the last game of a shard is written up to the rows that fit.
+A run that is interrupted is resumed by running it again: each shard continues after its last complete game,
+and since every game has its own seed (from the run seed, the worker and the game number), the resumed run
+writes the same data as an uninterrupted one.
+
+The first `random_plies` moves of every game are random and not recorded, so that the games differ.
+
+Functions:
+- mcts_policy(game, state, iterations): The move of MCTS and the visit distribution of its root.
+- cutoff_policy(game, state, depth): The move of `alpha_beta_cutoff_player`, as a one-hot distribution.
+- self_play_game(game, policy, rng, random_plies): Plays one game and returns its positions and result.
+- open_shard(directory, worker, capacity): The arrays and progress of a worker's shard, created or resumed.
+- generate(directory, positions, workers, ...): Fills the shards with self-play positions.
+- load_dataset(directory): The complete positions of all the shards.
+- main(): Command line entry point, e.g. `python -m training.self_play data --positions 100000 --policy mcts`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmark.perft import make_game
+from game.batch_eval import states_to_array
+from game.reversi import PASS
+from monte_carlo.monte_carlo_tree_search import build_tree
+from players.players import alpha_beta_cutoff_player
+
+# index of the pass in a policy vector
+PASS_INDEX = 64
+# name: (dtype, shape of one position)
+ARRAYS = {
+    'boards': (np.int8, (2, 8, 8)),
+    'to_move': (np.int8, ()),
+    'policy': (np.float32, (65,)),
+    'results': (np.int8, ()),
+}
+
+
+def _move_index(move):
+    # The index of a move in a policy vector
+    return PASS_INDEX if move == PASS else move[0] * 8 + move[1]
+
+
+def mcts_policy(game, state, iterations=400):
+    """Returns the move of Monte Carlo Tree Search (the most visited) and the visit distribution of its root."""
+    root = build_tree(state, game, iterations)
+    distribution = np.zeros(65, dtype=np.float32)
+    for child, move in root.children.items():
+        distribution[_move_index(move)] = child.N
+    best = max(root.children, key=lambda child: child.N)
+    return root.children[best], distribution / distribution.sum()
+
+
+def cutoff_policy(game, state, depth=3):
+    """Returns the move of `alpha_beta_cutoff_player` and a distribution with all the weight on it."""
+    move = alpha_beta_cutoff_player(game, state, depth)
+    distribution = np.zeros(65, dtype=np.float32)
+    distribution[_move_index(move)] = 1
+    return move, distribution
+
+
+POLICIES = {
+    'mcts': (mcts_policy, 'iterations'),
+    'alpha_beta_cutoff': (cutoff_policy, 'depth'),
+}
+
+
+def self_play_game(game, policy, rng, random_plies=4):
+    """
+    Plays one game of `policy` against itself after `random_plies` random moves (chosen with `rng`).
+
+    Returns:
+        tuple: The (states, policy distributions) of the positions the policy moved from, and the result for 'X'.
+    """
+    state = game.initial
+    states = []
+    distributions = []
+    ply = 0
+    while not game.terminal_test(state):
+        if ply < random_plies:
+            move = rng.choice(list(game.actions(state)))
+        else:
+            move, distribution = policy(game, state)
+            states.append(state)
+            distributions.append(distribution)
+        state = game.result(state, move)
+        ply += 1
+    return states, distributions, int(np.sign(game.utility(state, 'X')))
+
+
+def _shard_path(directory, worker, name):
+    # The file of one array of a worker's shard
+    return os.path.join(directory, 'shard-{:03d}-{}.npy'.format(worker, name))
+
+
+def _progress_path(directory, worker):
+    # The progress file of a worker's shard
+    return os.path.join(directory, 'shard-{:03d}.json'.format(worker))
+
+
+def open_shard(directory, worker, capacity):
+    """
+    Returns the memory-mapped arrays of a worker's shard (a dict by name, see ARRAYS) and its progress
+    ({'positions': ..., 'games': ...}). A new shard is preallocated with `capacity` positions; an existing one is
+    opened for writing after its complete games.
+    """
+    progress_path = _progress_path(directory, worker)
+    if os.path.exists(progress_path):
+        with open(progress_path) as f:
+            progress = json.load(f)
+        arrays = {name: np.load(_shard_path(directory, worker, name), mmap_mode='r+') for name in ARRAYS}
+    else:
+        progress = {'positions': 0, 'games': 0}
+        arrays = {name: np.lib.format.open_memmap(_shard_path(directory, worker, name), mode='w+', dtype=dtype,
+                                                  shape=(capacity,) + shape)
+                  for name, (dtype, shape) in ARRAYS.items()}
+        _save_progress(directory, worker, progress)
+    return arrays, progress
+
+
+def _save_progress(directory, worker, progress):
+    # Written to a temporary file first, so that the progress file is always complete
+    path = _progress_path(directory, worker)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(progress, f)
+    os.replace(path + '.tmp', path)
+
+
+def _game_seed(seed, worker, game):
+    return int(np.random.SeedSequence([seed, worker, game]).generate_state(1)[0])
+
+
+def _fill_shard(task):
+    # Worker: plays games into one shard until it is full, the last one only up to the rows that fit; returns
+    # the positions written and the seconds taken
+    directory, worker, capacity, game_name, policy_name, strength, random_plies, seed, flush_every = task
+    game = make_game(game_name)
+    function, option = POLICIES[policy_name]
+    policy = functools.partial(function, **{option: strength})
+    arrays, progress = open_shard(directory, worker, capacity)
+    capacity = len(arrays['results'])
+    start = time.perf_counter()
+    written = 0
+    unflushed = 0
+    while progress['positions'] < capacity:
+        game_seed = _game_seed(seed, worker, progress['games'])
+        random.seed(game_seed)
+        np.random.seed(game_seed % (1 << 32))
+        states, distributions, result = self_play_game(game, policy, random.Random(game_seed), random_plies)
+        first = progress['positions']
+        n = min(len(states), capacity - first)
+        if n:
+            states, distributions = states[:n], distributions[:n]
+            boards, x_to_move = states_to_array(states)
+            arrays['boards'][first:first + n, 0] = boards == 1
+            arrays['boards'][first:first + n, 1] = boards == -1
+            arrays['to_move'][first:first + n] = np.where(x_to_move, 1, -1)
+            arrays['policy'][first:first + n] = distributions
+            arrays['results'][first:first + n] = result
+        progress['positions'] += n
+        progress['games'] += 1
+        written += n
+        unflushed += 1
+        if unflushed >= flush_every:
+            _flush(directory, worker, arrays, progress)
+            unflushed = 0
+    _flush(directory, worker, arrays, progress)
+    return worker, written, time.perf_counter() - start
+
+
+def _flush(directory, worker, arrays, progress):
+    # The arrays are on disk before the progress that counts them
+    for array in arrays.values():
+        array.flush()
+    _save_progress(directory, worker, progress)
+
+
+def generate(directory, positions=100000, workers=None, game='bitboard', policy='mcts', strength=None,
+             random_plies=4, seed=0, flush_every=10, on_shard=None, on_progress=None, report_every=10.0):
+    """
+    Generates self-play positions into the shards of `directory`, one shard per worker process.
+
+    Args:
+        directory (str): The directory of the shards; created if needed. A directory with shards is resumed,
+            with the settings it was created with (kept in 'dataset.json').
+        positions (int): The total number of positions, split evenly between the shards.
+        workers (int, optional): The number of worker processes and shards (default: the number of CPUs).
+        game (str): A Reversi game name of `benchmark.perft.GAMES`.
+        policy (str): 'mcts' or 'alpha_beta_cutoff'.
+        strength (int, optional): The MCTS iterations (default 400) or the search depth (default 3).
+        random_plies (int): The random, unrecorded moves at the start of every game.
+        seed (int): The seed of the run.
+        flush_every (int): The games between two flushes of a shard; at most that many are played again after
+            an interruption.
+        on_shard (callable, optional): Called with `(worker, positions, seconds)` when a shard is full.
+        on_progress (callable, optional): Called every `report_every` seconds with the positions written so far
+            by this run and their rate per second, read from the progress files of the shards.
+
+    Returns:
+        dict: The 'positions' written by this run, its 'seconds' and the 'positions_per_second'.
+    """
+    os.makedirs(directory, exist_ok=True)
+    settings_path = os.path.join(directory, 'dataset.json')
+    if os.path.exists(settings_path):
+        with open(settings_path) as f:
+            settings = json.load(f)
+    else:
+        if positions < 1:
+            raise ValueError('positions must be at least 1, not {}'.format(positions))
+        workers = workers or os.cpu_count()
+        if strength is None:
+            strength = 400 if policy == 'mcts' else 3
+        settings = {'game': game, 'policy': policy, 'strength': strength, 'random_plies': random_plies,
+                    'seed': seed, 'workers': workers, 'positions': positions}
+        with open(settings_path, 'w') as f:
+            json.dump(settings, f, indent=2)
+    # The positions of every shard; the first shards take one more when they do not divide evenly
+    share, extra = divmod(settings['positions'], settings['workers'])
+    tasks = [(directory, worker, share + (worker < extra), settings['game'], settings['policy'],
+              settings['strength'], settings['random_plies'], settings['seed'], flush_every)
+             for worker in range(settings['workers']) if share + (worker < extra)]
+
+    def complete():
+        # The positions of the complete games of all the shards
+        total = 0
+        for worker in range(settings['workers']):
+            try:
+                with open(_progress_path(directory, worker)) as f:
+                    total += json.load(f)['positions']
+            except (FileNotFoundError, ValueError):
+                pass
+        return total
+
+    initial = complete()
+    start = time.perf_counter()
+    written = 0
+    pool = multiprocessing.Pool(len(tasks))
+    try:
+        results = pool.imap_unordered(_fill_shard, tasks)
+        for _ in tasks:
+            while True:
+                try:
+                    worker, count, seconds = results.next(timeout=report_every)
+                    break
+                except multiprocessing.TimeoutError:
+                    if on_progress is not None:
+                        so_far = complete() - initial
+                        on_progress(so_far, so_far / (time.perf_counter() - start))
+            written += count
+            if on_shard is not None:
+                on_shard(worker, count, seconds)
+    finally:
+        pool.terminate()
+    seconds = time.perf_counter() - start
+    return {'positions': written, 'seconds': seconds, 'positions_per_second': written / seconds if seconds else 0.0}
+
+
+def load_dataset(directory):
+    """Returns the complete positions of all the shards of `directory`, as a dict of arrays by name (ARRAYS)."""
+    with open(os.path.join(directory, 'dataset.json')) as f:
+        settings = json.load(f)
+    parts = {name: [] for name in ARRAYS}
+    for worker in range(settings['workers']):
+        if not os.path.exists(_progress_path(directory, worker)):
+            continue
+        with open(_progress_path(directory, worker)) as f:
+            count = json.load(f)['positions']
+        for name in ARRAYS:
+            parts[name].append(np.load(_shard_path(directory, worker, name), mmap_mode='r')[:count])
+    return {name: np.concatenate(arrays) if arrays else np.zeros((0,) + ARRAYS[name][1], ARRAYS[name][0])
+            for name, arrays in parts.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generates Reversi self-play training data.')
+    parser.add_argument('directory', help='The directory of the shards; an existing one is resumed.')
+    parser.add_argument('--positions', type=int, default=100000, help='The total number of positions.')
+    parser.add_argument('--workers', type=int, default=None, help='The number of worker processes.')
+    parser.add_argument('--game', default='bitboard', choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--policy', default='mcts', choices=list(POLICIES))
+    parser.add_argument('--strength', type=int, default=None,
+                        help='The MCTS iterations (default=400) or the alpha-beta depth (default=3).')
+    parser.add_argument('--random-plies', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    def show(worker, positions, seconds):
+        print(f'shard {worker}: {positions} positions in {seconds:.1f}s')
+
+    def progress(positions, rate):
+        print(f'{positions} positions, {rate:.1f} positions per second', flush=True)
+
+    report = generate(args.directory, args.positions, args.workers, args.game, args.policy, args.strength,
+                      args.random_plies, args.seed, on_shard=show, on_progress=progress)
+    print(f"{report['positions']} positions in {report['seconds']:.1f}s,"
+          f" {report['positions_per_second']:.1f} positions per second")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+## tune_weights.py
+
+This module tunes the weights of the terms of `Reversi.heuristic_score` (HEURISTIC_WEIGHTS: tiles, corners,
+corner proximity, mobility and discs), and measures the tuned weights against the current ones in Elo.
+
+Two methods are available:
+
+- texel: a regression on the positions of a self-play dataset (training/self_play.py). The score is linear in
+  the weights, so the five terms of every position are computed once, in batches with `heuristic_score_batch`,
+  and a logistic model of the game result from the point of view of the player to move is fitted to them by
+  Newton's method. The sigmoid's scale is first fitted to the current weights and kept, so the tuned weights
+  have the same scale as the current ones. It takes seconds, even on a large dataset.
+- spsa: simultaneous perturbation stochastic approximation on game results. Every iteration perturbs all the
+  weights at once, in a random direction relative to their size, and plays the two perturbed versions against
+  each other; the score difference is a noisy estimate of the gradient along that direction. Slower, but it
+  optimises what matters, the results of the games at the search depth.
+
+Games are played in pairs from the same random opening, once with each colour, on a process pool using every
+CPU. The players are `alpha_beta_cutoff_player` with the weights as an option, without the endgame solver and
+the opening book so that only the heuristic decides.
+
+Functions:
+- term_matrix(boards, x_to_move, workers, chunk, pool): The five heuristic terms of a batch of positions.
+- texel_tune(dataset, weights, workers, ..., pool): The weights fitted to the results of a dataset.
+- play_pairs(game_name, weights_a, weights_b, pairs, ...): The score of A over pairs of games.
+- spsa_tune(game_name, weights, iterations, pairs, ...): The weights tuned by SPSA.
+- elo(score): The Elo difference of a score.
+- main(): Command line entry point, e.g. `python -m training.tune_weights --method texel --data data`.
+
+Authors:
+- Giannopoulos Georgios
+- Giannopoulos Ioannis
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmark.perft import make_game
+from game.batch_eval import heuristic_score_batch
+from game.reversi import Reversi
+from players.players import alpha_beta_cutoff_player
+from training.self_play import load_dataset
+
+TERMS = ('tiles', 'corners', 'proximity', 'mobility', 'discs')
+
+
+def _terms(args):
+    # Worker: the terms of a chunk of positions, one column per term
+    boards, x_to_move = args
+    return np.stack([heuristic_score_batch(boards, x_to_move, unit) for unit in np.eye(len(TERMS))], axis=1)
+
+
+def term_matrix(boards, x_to_move, workers=None, chunk=20000, pool=None):
+    """
+    Returns the (N, 5) matrix of the heuristic terms of the positions, from the point of view of the player to
+    move, so that `heuristic_score_batch(boards, x_to_move, weights) == term_matrix(...) @ weights`.
+    The chunks of positions are scored on `pool`, or else on a pool of `workers` processes.
+    """
+    chunks = [(boards[i:i + chunk], x_to_move[i:i + chunk]) for i in range(0, len(boards), chunk)]
+    if pool is not None:
+        parts = pool.map(_terms, chunks)
+    elif len(chunks) <= 1 or workers == 1:
+        parts = [_terms(c) for c in chunks]
+    else:
+        with multiprocessing.Pool(min(workers or os.cpu_count(), len(chunks))) as pool:
+            parts = pool.map(_terms, chunks)
+    return np.concatenate(parts) if parts else np.zeros((0, len(TERMS)))
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
+
+
+def _log_loss(p, y):
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def texel_tune(dataset, weights=Reversi.HEURISTIC_WEIGHTS, workers=None, iterations=25, ridge=1e-6, pool=None):
+    """
+    Fits the weights to the results of a self-play dataset (see `load_dataset`).
+
+    The expected result for the player to move is modelled as `sigmoid(k * score)`. The scale k is fitted to
+    the current `weights` first; then the weights are fitted with k fixed, by Newton's method on the log loss
+    (a draw counts as half a win), with a small ridge penalty. The terms are computed on `pool` if given.
+
+    Returns:
+        dict: The tuned 'weights', the scale 'k', and the 'loss' of the current and of the tuned weights.
+    """
+    boards = (dataset['boards'][:, 0].astype(np.int8) - dataset['boards'][:, 1]).astype(np.int8)
+    x_to_move = dataset['to_move'] == 1
+    # the result for the player to move: 1 win, 0.5 draw, 0 loss
+    y = (dataset['results'].astype(np.float64) * dataset['to_move'] + 1) / 2
+    features = term_matrix(boards, x_to_move, workers, pool=pool)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    # the scale of the current weights, by Newton's method on a single parameter
+    scores = features @ weights
+    k = 1.0 / (np.std(scores) or 1.0)
+    for _ in range(iterations):
+        p = _sigmoid(k * scores)
+        gradient = np.mean((p - y) * scores)
+        hessian = np.mean(p * (1 - p) * scores * scores)
+        if hessian <= 0:
+            break
+        k -= gradient / hessian
+    base_loss = _log_loss(_sigmoid(k * scores), y)
+
+    # the weights (times k), by Newton's method on the logistic regression of y on the terms
+    scaled = features * k
+    w = weights.copy()
+    loss = base_loss
+    for _ in range(iterations):
+        p = _sigmoid(scaled @ w)
+        gradient = scaled.T @ (p - y) / len(y) + ridge * w
+        hessian = (scaled.T * (p * (1 - p))) @ scaled / len(y) + ridge * np.eye(len(w))
+        step = np.linalg.solve(hessian, gradient)
+        # a full Newton step can overshoot far from the optimum: halve it until the loss decreases
+        for _ in range(30):
+            new_loss = _log_loss(_sigmoid(scaled @ (w - step)), y)
+            if new_loss <= loss:
+                break
+            step /= 2
+        else:
+            break
+        w -= step
+        converged = loss - new_loss < 1e-10
+        loss = new_loss
+        if converged:
+            break
+    return {'weights': tuple(float(v) for v in w), 'k': float(k), 'loss': base_loss, 'tuned_loss': loss,
+            'positions': len(y)}
+
+
+# The games created in a process
+_games = {}
+
+
+def _play_pair(task):
+    # Worker: plays an opening of random moves, then a game from it with each colour; returns the score of A
+    game_name, weights_a, weights_b, depth, opening_plies, seed = task
+    if game_name not in _games:
+        _games[game_name] = make_game(game_name)
+    game = _games[game_name]
+    rng = random.Random(seed)
+    opening = game.initial
+    for _ in range(opening_plies):
+        if game.terminal_test(opening):
+            break
+        opening = game.result(opening, rng.choice(list(game.actions(opening))))
+    players = {'A': game.with_weights(weights_a), 'B': game.with_weights(weights_b)}
+    score = 0.0
+    for a_colour in ('X', 'O'):
+        state = opening
+        while not game.terminal_test(state):
+            mover = 'A' if game.to_move(state) == a_colour else 'B'
+            state = game.result(state, alpha_beta_cutoff_player(players[mover], state, depth, endgame=False,
+                                                                book=False))
+        utility = game.utility(state, a_colour)
+        score += 1.0 if utility > 0 else 0.5 if utility == 0 else 0.0
+    return score
+
+
+def play_pairs(game_name, weights_a, weights_b, pairs=16, depth=1, opening_plies=6, seed=0, pool=None):
+    """
+    Plays `pairs` pairs of games between the weights A and B, each pair from its own random opening with both
+    colours, and returns the score of A (a win counts 1 and a draw half) over the 2 * pairs games.
+    """
+    rng = random.Random(seed)
+    tasks = [(game_name, tuple(weights_a), tuple(weights_b), depth, opening_plies, rng.getrandbits(32))
+             for _ in range(pairs)]
+    scores = pool.map(_play_pair, tasks) if pool is not None else list(map(_play_pair, tasks))
+    return sum(scores) / (2 * pairs)
+
+
+def spsa_tune(game_name, weights=Reversi.HEURISTIC_WEIGHTS, iterations=20, pairs=8, depth=1, opening_plies=6,
+              a=0.01, c=0.1, seed=0, pool=None, on_iteration=None):
+    """
+    Tunes the weights with SPSA on the results of games.
+
+    Each weight moves relative to its size: iteration i perturbs the weights by a factor `1 + c_i * delta` with a
+    random sign `delta` per weight, plays the two perturbations against each other, and moves every weight by
+    `a_i * (score - 0.5) / (c_i * delta)` of its size, with the usual decreasing gains a_i and c_i. The score
+    of a few pairs of games is noisy, so the gains are small: with the defaults, an iteration moves a weight by
+    at most a / (2 c) = 5% of its size, and by about 1% for a typical score.
+
+    Args:
+        on_iteration (callable, optional): Called with `(iteration, weights, score)` after every iteration.
+
+    Returns:
+        tuple: The tuned weights.
+    """
+    rng = np.random.default_rng(seed)
+    theta = np.asarray(weights, dtype=np.float64)
+    size = np.abs(theta) + 1e-9
+    for i in range(iterations):
+        a_i = a / (i + 1) ** 0.602
+        c_i = c / (i + 1) ** 0.101
+        delta = rng.choice((-1.0, 1.0), size=len(theta))
+        plus = theta + size * c_i * delta
+        minus = theta - size * c_i * delta
+        score = play_pairs(game_name, plus, minus, pairs, depth, opening_plies, seed * 100003 + i, pool)
+        theta = theta + size * a_i * (score - 0.5) / (c_i * delta)
+        if on_iteration is not None:
+            on_iteration(i, tuple(theta), score)
+    return tuple(float(v) for v in theta)
+
+
+def elo(score, games=None):
+    """
+    Returns the Elo difference of a score (a fraction of the points), and with the number of `games` the
+    half width of its 95% interval too, as `(elo, margin)`. The interval is the Wilson score interval, which
+    stays wide at a score of 0 or 1, and its bounds are clamped to [1e-3, 1 - 1e-3] like the score.
+    """
+    def to_elo(s):
+        s = min(max(s, 1e-3), 1 - 1e-3)
+        return -400 * math.log10(1 / s - 1)
+
+    if games is None:
+        return to_elo(score)
+    # the 95% Wilson score interval: a centre pulled towards 1/2 and a half width that is never 0
+    z = 1.96
+    centre = (score + z * z / (2 * games)) / (1 + z * z / games)
+    half = z * math.sqrt(score * (1 - score) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+    return to_elo(score), (to_elo(centre + half) - to_elo(centre - half)) / 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tunes the weights of the Reversi heuristic.')
+    parser.add_argument('--method', default='texel', choices=['texel', 'spsa'])
+    parser.add_argument('--data', help='A self-play dataset directory (training/self_play.py), for texel.')
+    parser.add_argument('--game', default='bitboard', choices=['reversi', 'bitboard', 'compact'])
+    parser.add_argument('--iterations', type=int, default=20, help='The SPSA iterations.')
+    parser.add_argument('--pairs', type=int, default=8, help='The pairs of games of every SPSA iteration.')
+    parser.add_argument('--depth', type=int, default=1, help='The search depth of the games (default=1).')
+    parser.add_argument('--elo-pairs', type=int, default=50, help='The pairs of games of the Elo match.')
+    parser.add_argument('--workers', type=int, default=None, help='The number of worker processes.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='A JSON file for the tuned weights and the report.')
+    args = parser.parse_args(argv)
+    if args.method == 'texel' and not args.data:
+        parser.error('--method texel needs --data')
+
+    start = time.perf_counter()
+    current = Reversi.HEURISTIC_WEIGHTS
+    report = {'method': args.method, 'current': list(current)}
+    with multiprocessing.Pool(args.workers or os.cpu_count()) as pool:
+        if args.method == 'texel':
+            fit = texel_tune(load_dataset(args.data), current, pool=pool)
+            tuned = fit['weights']
+            report.update(positions=fit['positions'], k=fit['k'], loss=fit['loss'], tuned_loss=fit['tuned_loss'])
+            print(f"{fit['positions']} positions: log loss {fit['loss']:.4f} -> {fit['tuned_loss']:.4f}")
+        else:
+            def show(i, weights, score):
+                print(f"iteration {i}: score {score:.3f}, weights {', '.join(f'{w:.3f}' for w in weights)}",
+                      flush=True)
+            tuned = spsa_tune(args.game, current, args.iterations, args.pairs, args.depth, seed=args.seed,
+                              pool=pool, on_iteration=show)
+
+        score = play_pairs(args.game, tuned, current, args.elo_pairs, args.depth, seed=args.seed + 1, pool=pool)
+    gain, margin = elo(score, 2 * args.elo_pairs)
+    report.update(weights=list(tuned), score=score, games=2 * args.elo_pairs, elo=gain, elo_margin=margin,
+                  seconds=time.perf_counter() - start)
+
+    for name, old, new in zip(TERMS, current, tuned):
+        print(f'{name:10} {old:10.3f} -> {new:10.3f}')
+    print(f"tuned vs current: score {score:.3f} over {2 * args.elo_pairs} games, Elo {gain:+.0f} +/- {margin:.0f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()